@@ -50,12 +50,18 @@ setup(
     tests_require=parse_requirements("test"),
     setup_requires=["setuptools-scm"],
     use_scm_version=True,
-    extras_require={"testing": parse_requirements("test")},
+    extras_require={
+        "testing": parse_requirements("test", "arrow", "zstd", "http2", "fast"),
+        "arrow": parse_requirements("arrow"),
+        "zstd": parse_requirements("zstd"),
+        "http2": parse_requirements("http2"),
+        "fast": parse_requirements("fast"),
+    },
     include_package_data=True,
-    # entry_points="""
-    #     [swh.cli.subcommands]
-    #     spdx=swh.spdx.cli
-    # """,
+    entry_points="""
+        [swh.cli.subcommands]
+        spdx=swh.spdx.cli
+    """,
     classifiers=[
         "Programming Language :: Python :: 3",
         "Intended Audience :: Developers",
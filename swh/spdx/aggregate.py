@@ -0,0 +1,241 @@
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from swh.spdx.document import get_verification_code
+from swh.spdx.node import Node
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+
+
+class DirectoryAggregate:
+    """Totals of the subtree of a directory, built from the totals of its
+    subdirectories.
+
+    The SHA1 checksums of the files are kept in the aggregate of their own
+    directory only, the verification code being computed on demand. Files
+    without a SHA1 checksum are left out of the verification code.
+
+    The aggregate of a subtree only partly traversed, e.g. when the budget of
+    the traversal was exceeded, is marked as incomplete.
+    """
+
+    __slots__ = (
+        "file_count",
+        "directory_count",
+        "total_size",
+        "unknown_sizes",
+        "licenses",
+        "sha1s",
+        "children",
+        "complete",
+        "_verification_code",
+    )
+
+    file_count: int
+    directory_count: int
+    total_size: int
+    unknown_sizes: int
+    licenses: FrozenSet[str]
+    complete: bool
+
+    def __init__(
+        self,
+        files: List[Node],
+        children: Tuple["DirectoryAggregate", ...] = (),
+        licenses: FrozenSet[str] = frozenset(),
+        complete: bool = True,
+    ):
+        """
+        Initialize a new instance of the DirectoryAggregate class.
+
+        Args:
+            files (List[Node]): The content nodes of the directory itself.
+            children (Tuple[DirectoryAggregate]): The aggregates of the
+                subdirectories.
+            licenses (FrozenSet[str]): The licenses of the files of the
+                directory itself.
+            complete (bool): Whether the entries of the directory itself were
+                traversed, the aggregate being incomplete if they were not or if
+                one of the subdirectories is incomplete.
+        """
+        lengths = [node.length for node in files]
+        self.sha1s = tuple(
+            node.checksums["sha1"] for node in files if "sha1" in node.checksums
+        )
+        self.children = children
+        self.file_count = len(files) + sum(child.file_count for child in children)
+        self.directory_count = len(children) + sum(
+            child.directory_count for child in children
+        )
+        self.total_size = sum(length for length in lengths if length is not None)
+        self.total_size += sum(child.total_size for child in children)
+        self.unknown_sizes = lengths.count(None)
+        self.unknown_sizes += sum(child.unknown_sizes for child in children)
+        self.licenses = licenses.union(*(child.licenses for child in children))
+        self.complete = complete and all(child.complete for child in children)
+        self._verification_code: Optional[str] = None
+
+    def iter_sha1s(self) -> Iterator[str]:
+        """
+        Iterates over the SHA1 checksums of the files of the subtree.
+
+        Yields:
+            str: the hexadecimal SHA1 checksums, in no particular order
+        """
+        stack = [self]
+        while stack:
+            aggregate = stack.pop()
+            yield from aggregate.sha1s
+            stack.extend(aggregate.children)
+
+    @property
+    def verification_code(self) -> str:
+        """The SPDX package verification code of the subtree."""
+        if self._verification_code is None:
+            self._verification_code = get_verification_code(self.iter_sha1s())
+        return self._verification_code
+
+    def to_dict(self) -> dict:
+        """
+        Returns the totals of the subtree, e.g. to serialize them to JSON.
+
+        Returns:
+            dict: the file and directory counts, the total size of the files
+            and the number of files of unknown size, the sorted licenses, the
+            verification code and whether the subtree was fully traversed
+        """
+        return {
+            "file_count": self.file_count,
+            "directory_count": self.directory_count,
+            "total_size": self.total_size,
+            "unknown_sizes": self.unknown_sizes,
+            "licenses": sorted(self.licenses),
+            "verification_code": self.verification_code,
+            "complete": self.complete,
+        }
+
+
+class Aggregator:
+    """Computes the aggregates of the directories of traversals, in one
+    post-order pass over each traversal.
+
+    The aggregates are memoized by directory SWHID, so that identical subtrees
+    are only aggregated once, even across traversals of different roots. The
+    incomplete aggregates of the directories missing from a truncated traversal,
+    or having such a subdirectory, are not memoized: they are only kept until
+    the next traversal is aggregated.
+    """
+
+    def __init__(self, get_licenses: Optional[Callable[[Node], Iterable[str]]] = None):
+        """
+        Initialize a new instance of the Aggregator class.
+
+        Args:
+            get_licenses (Callable): Optional function returning the licenses
+                detected in a content node, no license is aggregated if not given.
+        """
+        self.get_licenses = get_licenses
+        self.aggregates: Dict["CoreSWHID", DirectoryAggregate] = {}
+        # Incomplete aggregates of the last traversal aggregated
+        self.incomplete: Dict["CoreSWHID", DirectoryAggregate] = {}
+
+    def get_aggregate(self, directory: Node) -> DirectoryAggregate:
+        """
+        Returns the aggregate of a directory already aggregated.
+
+        Args:
+            directory (Node): the directory node
+
+        Returns:
+            DirectoryAggregate: the aggregate of the subtree of the directory
+        """
+        aggregate = self.aggregates.get(directory.swhid)
+        if aggregate is None:
+            aggregate = self.incomplete[directory.swhid]
+        return aggregate
+
+    def aggregate(
+        self, node_collection: dict, root: Optional[Node] = None
+    ) -> DirectoryAggregate:
+        """
+        Computes the aggregates of all the directories of a traversal, from the
+        deepest ones up, skipping the subtrees already aggregated. The
+        directories missing from the node collection are aggregated as empty
+        and incomplete.
+
+        Args:
+            node_collection (dict): the result of traverse_root
+            root (Node): the root directory node, defaults to the first
+                directory of the node collection
+
+        Returns:
+            DirectoryAggregate: the aggregate of the root directory
+        """
+        if root is None:
+            root = next(iter(node_collection))
+        self.incomplete = {}
+        if root.swhid in self.aggregates:
+            return self.aggregates[root.swhid]
+        # Directories whose subdirectories are being aggregated
+        stack = [(root, iter(node_collection.get(root, [])))]
+        while stack:
+            directory, children = stack[-1]
+            for child in children:
+                if (
+                    child.is_directory
+                    and child.swhid not in self.aggregates
+                    and child.swhid not in self.incomplete
+                ):
+                    stack.append((child, iter(node_collection.get(child, []))))
+                    break
+            else:
+                stack.pop()
+                self.add_directory(directory, node_collection.get(directory))
+        return self.get_aggregate(root)
+
+    def add_directory(self, directory: Node, children: Optional[List[Node]]):
+        """
+        Computes the aggregate of a directory whose subdirectories are already
+        aggregated.
+
+        Args:
+            directory (Node): the directory node
+            children (List[Node]): the child nodes of the directory, None if
+                the directory was not traversed
+
+        Returns:
+            None
+        """
+        if directory.swhid in self.aggregates:
+            return
+        complete = children is not None
+        if children is None:
+            children = []
+        files = [child for child in children if not child.is_directory]
+        licenses: FrozenSet[str] = frozenset()
+        if self.get_licenses is not None:
+            licenses = frozenset(
+                license for node in files for license in self.get_licenses(node)
+            )
+        aggregate = DirectoryAggregate(
+            files,
+            tuple(
+                self.get_aggregate(child) for child in children if child.is_directory
+            ),
+            licenses,
+            complete=complete,
+        )
+        if aggregate.complete:
+            self.aggregates[directory.swhid] = aggregate
+        else:
+            self.incomplete[directory.swhid] = aggregate
@@ -0,0 +1,249 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
+
+from swh.spdx.entries import DirectoryEntries
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+
+# Object types of the SWHIDs of swh-storage directory entries, by entry type
+STORAGE_ENTRY_OBJECT_TYPES = {
+    "file": "cnt",
+    "dir": "dir",
+    "rev": "rev",
+}
+
+STORAGE_CHECKSUMS = ("sha1", "sha256", "sha1_git", "blake2s256")
+
+
+class Backend:
+    """Source of the directory entries and contents of the archive."""
+
+    def get_directory_entries(self, dir_swhid: "CoreSWHID") -> DirectoryEntries:
+        """
+        Retrieves the entries of a directory specified by its SWHID.
+
+        Args:
+            dir_swhid (CoreSWHID): The SWHID of the directory.
+
+        Returns:
+            DirectoryEntries: the entries of the directory
+        """
+        raise NotImplementedError
+
+    def get_content(self, content_object_checksums: dict) -> str:
+        """
+        Retrieves the text of a content specified by its checksums.
+
+        Args:
+            content_object_checksums (dict): The checksums of the content.
+
+        Returns:
+            str: the text of the content
+        """
+        raise NotImplementedError
+
+    def get_content_data(self, content_object_checksums: dict) -> bytes:
+        """
+        Retrieves the raw data of a content specified by its checksums.
+
+        Args:
+            content_object_checksums (dict): The checksums of the content.
+
+        Returns:
+            bytes: the data of the content
+        """
+        raise NotImplementedError
+
+
+class GraphQLBackend(Backend):
+    """Backend querying the GraphQL API of the archive, page by page."""
+
+    def get_directory_entries(self, dir_swhid: "CoreSWHID") -> DirectoryEntries:
+        from swh.spdx.children import get_directory_entries
+
+        return get_directory_entries(dir_swhid)
+
+    def get_content(self, content_object_checksums: dict) -> str:
+        from swh.spdx.content import get_content_from_hashes
+
+        return get_content_from_hashes(content_object_checksums)
+
+    def get_content_data(self, content_object_checksums: dict) -> bytes:
+        from swh.spdx.content import get_content_data_from_hashes
+
+        data = get_content_data_from_hashes(content_object_checksums)
+        assert data is not None
+        return data
+
+
+class StorageBackend(Backend):
+    """Backend using a swh-storage API, e.g. a remote or in-memory swh.storage.
+
+    The whole subtree of a directory is listed with a single recursive
+    ``directory_ls`` call, and the entries of its subdirectories are kept until
+    they are requested.
+    """
+
+    def __init__(self, storage):
+        """
+        Initialize a new instance of the StorageBackend class.
+
+        Args:
+            storage: The storage, providing ``directory_ls`` and ``content_get_data``.
+        """
+        self.storage = storage
+        # Entries of the subdirectories listed recursively, by sha1_git
+        self._listed_entries: Dict[bytes, DirectoryEntries] = {}
+
+    def list_directories(
+        self, dir_id: bytes, storage_entries: Iterable[dict]
+    ) -> Dict[bytes, DirectoryEntries]:
+        """
+        Groups the entries of a recursive directory listing by directory.
+
+        Args:
+            dir_id (bytes): The sha1_git of the listed directory.
+            storage_entries (Iterable[dict]): The entries returned by
+                ``directory_ls(dir_id, recursive=True)``, whose names are paths
+                relative to the listed directory.
+
+        Returns:
+            Dict[bytes, DirectoryEntries]: the entries of the listed directory and
+            of all its subdirectories, by sha1_git
+        """
+        storage_entries = list(storage_entries)
+        directory_ids = {b"": dir_id}
+        for entry in storage_entries:
+            if entry["type"] == "dir":
+                directory_ids[entry["name"]] = entry["target"]
+        grouped_entries: Dict[bytes, List[dict]] = {}
+        for entry in storage_entries:
+            parent_path, _, _ = entry["name"].rpartition(b"/")
+            grouped_entries.setdefault(parent_path, []).append(entry)
+        listed_directories = {}
+        for path, directory_id in directory_ids.items():
+            if directory_id in listed_directories:
+                # Identical subtree found under several paths
+                continue
+            entries = grouped_entries.get(path, [])
+            directory_entries = DirectoryEntries()
+            directory_entries.add_entries(
+                [
+                    entry["name"].rpartition(b"/")[2].decode("utf-8", "replace")
+                    for entry in entries
+                ],
+                [
+                    f"swh:1:{STORAGE_ENTRY_OBJECT_TYPES[entry['type']]}:"
+                    f"{entry['target'].hex()}"
+                    for entry in entries
+                ],
+                [get_storage_entry_target(entry) for entry in entries],
+            )
+            listed_directories[directory_id] = directory_entries
+        return listed_directories
+
+    def get_directory_entries(self, dir_swhid: "CoreSWHID") -> DirectoryEntries:
+        dir_id = dir_swhid.object_id
+        if dir_id not in self._listed_entries:
+            self._listed_entries.update(
+                self.list_directories(
+                    dir_id, self.storage.directory_ls(dir_id, recursive=True)
+                )
+            )
+        # Entries are only kept until they are requested, the caller is
+        # responsible for caching them
+        return self._listed_entries.pop(dir_id)
+
+    def get_content(self, content_object_checksums: dict) -> str:
+        return self.get_content_data(content_object_checksums).decode(
+            "utf-8", "replace"
+        )
+
+    def get_content_data(self, content_object_checksums: dict) -> bytes:
+        data = self.storage.content_get_data(
+            bytes.fromhex(content_object_checksums["sha1"])
+        )
+        if data is None:
+            raise ValueError(
+                f"Content {content_object_checksums['sha1']} not found in storage"
+            )
+        return data
+
+
+def get_storage_entry_target(entry: dict) -> Optional[dict]:
+    """
+    Builds the target of a swh-storage directory entry, in the shape returned
+    by the GraphQL server.
+
+    Args:
+        entry (dict): the swh-storage directory entry
+
+    Returns:
+        dict: the "hashes" and "length" of a content entry or the "id" of a
+        directory entry
+    """
+    if entry["type"] == "dir":
+        return {"id": entry["target"].hex()}
+    if entry["type"] == "file":
+        target = {
+            "hashes": {
+                checksum: entry[checksum].hex()
+                for checksum in STORAGE_CHECKSUMS
+                if entry.get(checksum) is not None
+            }
+        }
+        if entry.get("length") is not None:
+            target["length"] = entry["length"]
+        return target
+    return None
+
+
+class InMemoryBackend(Backend):
+    """Backend serving directories and contents from memory, e.g. in tests."""
+
+    def __init__(
+        self,
+        directories: Optional[Dict["CoreSWHID", list]] = None,
+        contents: Optional[Dict[str, Union[str, bytes]]] = None,
+    ):
+        """
+        Initialize a new instance of the InMemoryBackend class.
+
+        Args:
+            directories (dict): The entries of each directory, by SWHID, as lists
+                of child name, child swhid and child checksums.
+            contents (dict): The text or data of each content, by hexadecimal
+                sha1_git.
+        """
+        self.directories = directories if directories is not None else {}
+        self.contents = contents if contents is not None else {}
+
+    def get_directory_entries(self, dir_swhid: "CoreSWHID") -> DirectoryEntries:
+        if dir_swhid not in self.directories:
+            raise ValueError(f"Directory {str(dir_swhid)} not found")
+        entries = self.directories[dir_swhid]
+        directory_entries = DirectoryEntries()
+        directory_entries.add_entries(
+            [entry[0] for entry in entries],
+            [str(entry[1]) for entry in entries],
+            [entry[2] for entry in entries],
+        )
+        return directory_entries
+
+    def get_content(self, content_object_checksums: dict) -> str:
+        content = self.get_stored_content(content_object_checksums)
+        if isinstance(content, bytes):
+            return content.decode("utf-8", "replace")
+        return content
+
+    def get_content_data(self, content_object_checksums: dict) -> bytes:
+        content = self.get_stored_content(content_object_checksums)
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return content
+
+    def get_stored_content(self, content_object_checksums: dict) -> Union[str, bytes]:
+        sha1_git = content_object_checksums["sha1_git"]
+        if sha1_git not in self.contents:
+            raise ValueError(f"Content {sha1_git} not found")
+        return self.contents[sha1_git]
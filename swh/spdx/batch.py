@@ -0,0 +1,313 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import json
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.budget import Budget
+from swh.spdx.cache import LRUCache
+from swh.spdx.concurrency import ConcurrencyController
+from swh.spdx.connection import set_concurrency_controller, set_http2, set_rate_limiter
+from swh.spdx.document import get_spdx_document
+from swh.spdx.node import Node
+from swh.spdx.profile import Profiler, enable_profiling, get_profiler
+from swh.spdx.ratelimit import RateLimiter
+from swh.spdx.resolve import resolve_root_directories
+from swh.spdx.traverse import traverse_root
+
+# LRUCache of the directory entries of the worker process, see init_worker
+_worker_cache: Any = None
+# Limits of the budget of each root processed by the worker, see init_worker
+_worker_limits: Optional[dict] = None
+
+
+def get_document_path(swhid: CoreSWHID, output_dir: str) -> str:
+    """
+    Builds the path of the SPDX document generated for a root.
+
+    Args:
+        swhid (CoreSWHID): SWHID of the root
+        output_dir (str): directory the documents are written to
+
+    Returns:
+        str: path of the SPDX document
+    """
+    file_name = f"{swhid.object_type.value}_{swhid.object_id.hex()}.spdx.json"
+    return os.path.join(output_dir, file_name)
+
+
+def process_root(
+    swhid: CoreSWHID,
+    root_directory: CoreSWHID,
+    output_dir: str,
+    cache: Optional[dict] = None,
+    limits: Optional[dict] = None,
+) -> dict:
+    """
+    Traverses the root directory of a SWHID and writes its SPDX document.
+
+    Args:
+        swhid (CoreSWHID): SWHID of the root, as given by the user
+        root_directory (CoreSWHID): SWHID of the root directory it resolves to
+        output_dir (str): directory the document is written to
+        cache (dict): optional mapping of directory SWHIDs to their entries
+        limits (dict): optional arguments of the Budget of the root; the
+            document of a root exceeding its budget describes the directories
+            traversed until then
+
+    Returns:
+        dict: the timings and results of the processing of the root
+    """
+    start = time.monotonic()
+    budget = Budget(**limits) if limits else None
+    root = Node(name=swhid.object_id.hex(), swhid=root_directory)
+    node_collection = traverse_root(
+        root,
+        first_iteration=True,
+        node_collection={},
+        cache=cache,
+        bulk=True,
+        budget=budget,
+    )
+    traversal_seconds = time.monotonic() - start
+    document_path = get_document_path(swhid, output_dir)
+    with open(document_path, "w") as document_file:
+        json.dump(get_spdx_document(node_collection, root), document_file)
+    return {
+        "swhid": str(swhid),
+        "directory": str(root_directory),
+        "document": document_path,
+        "nodes": sum(len(children) for children in node_collection.values()) + 1,
+        "traversal_seconds": traversal_seconds,
+        "seconds": time.monotonic() - start,
+        "truncated": budget.exceeded if budget is not None else None,
+        "error": None,
+    }
+
+
+def get_failure(swhid: CoreSWHID, error: Exception, start: float) -> dict:
+    """
+    Builds the summary of a root whose processing failed.
+
+    Args:
+        swhid (CoreSWHID): SWHID of the root
+        error (Exception): the error raised
+        start (float): monotonic time the processing started at
+
+    Returns:
+        dict: the timings and error of the processing of the root
+    """
+    return {
+        "swhid": str(swhid),
+        "directory": None,
+        "document": None,
+        "nodes": 0,
+        "traversal_seconds": None,
+        "seconds": time.monotonic() - start,
+        "truncated": None,
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+def process_roots(
+    swhids: List[CoreSWHID],
+    output_dir: str,
+    concurrency: int = 4,
+    cache: Optional[dict] = None,
+    limits: Optional[dict] = None,
+) -> List[dict]:
+    """
+    Resolves a chunk of SWHIDs to root directories with batched queries, then
+    traverses them concurrently and writes one SPDX document per root.
+
+    The SWHIDs which can not be resolved are reported as failed without
+    failing the rest of the chunk. If a batched query fails, e.g. because of an
+    object missing from the archive, the SWHIDs are resolved one at a time.
+
+    Args:
+        swhids (List[CoreSWHID]): SWHIDs of the roots
+        output_dir (str): directory the documents are written to
+        concurrency (int): number of roots traversed at the same time
+        cache (dict): optional mapping of directory SWHIDs to their entries
+        limits (dict): optional arguments of the Budget of each root
+
+    Returns:
+        List[dict]: the timings and results of the processing of each root
+    """
+    start = time.monotonic()
+    errors: Dict[CoreSWHID, Exception] = {}
+    try:
+        root_directories = resolve_root_directories(swhids, errors=errors)
+    except Exception:
+        root_directories = {}
+        for swhid in swhids:
+            try:
+                root_directories.update(
+                    resolve_root_directories([swhid], errors=errors)
+                )
+            except Exception as e:
+                errors[swhid] = e
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            swhid: executor.submit(
+                process_root, swhid, root_directory, output_dir, cache, limits
+            )
+            for swhid, root_directory in root_directories.items()
+        }
+        for swhid in swhids:
+            if swhid in errors:
+                results.append(get_failure(swhid, errors[swhid], start))
+                continue
+            try:
+                results.append(futures[swhid].result())
+            except Exception as e:
+                results.append(get_failure(swhid, e, start))
+    return results
+
+
+def init_worker(
+    cache_bytes: int,
+    rate_limiter: Optional[RateLimiter],
+    profile: bool = False,
+    max_in_flight: Optional[int] = None,
+    http2: bool = False,
+    limits: Optional[dict] = None,
+):
+    """
+    Initializes a worker process with its cache of directory entries, and the
+    rate limiter shared by all the workers.
+
+    Args:
+        cache_bytes (int): maximum size of the cache of the worker, in bytes
+        rate_limiter (RateLimiter): rate limiter shared by all the workers
+        profile (bool): whether to enable profiling in the worker
+        max_in_flight (int): maximum number of queries in flight from the
+            worker, adapted to the response of the server, if given
+        http2 (bool): whether to multiplex the requests of the worker over
+            shared HTTP/2 connections
+        limits (dict): optional arguments of the Budget of each root
+
+    Returns:
+        None
+    """
+    global _worker_cache, _worker_limits
+    _worker_cache = LRUCache(max_bytes=cache_bytes)
+    _worker_limits = limits
+    set_rate_limiter(rate_limiter)
+    if profile:
+        enable_profiling()
+    if max_in_flight is not None:
+        set_concurrency_controller(ConcurrencyController(max_limit=max_in_flight))
+    set_http2(http2)
+
+
+def process_roots_in_worker(
+    swhids: List[CoreSWHID], output_dir: str, concurrency: int
+) -> Tuple[List[dict], Optional[dict]]:
+    """
+    Runs process_roots in a worker process, with the cache of the worker.
+
+    Args:
+        swhids (List[CoreSWHID]): SWHIDs of the roots
+        output_dir (str): directory the documents are written to
+        concurrency (int): number of roots traversed at the same time
+
+    Returns:
+        Tuple[List[dict], Optional[dict]]: the timings and results of the
+        processing of each root, and the profiling timings of the worker since
+        its last chunk if profiling is enabled
+    """
+    results = process_roots(
+        swhids, output_dir, concurrency, cache=_worker_cache, limits=_worker_limits
+    )
+    profiler = get_profiler()
+    return results, profiler.get_state(reset=True) if profiler else None
+
+
+def run_batch(
+    swhids: List[CoreSWHID],
+    output_dir: str,
+    processes: int = 4,
+    concurrency: int = 4,
+    rate_limit: Optional[float] = None,
+    chunk_size: int = 16,
+    profile: bool = False,
+    max_in_flight: Optional[int] = None,
+    http2: bool = False,
+    limits: Optional[dict] = None,
+    cache_bytes: int = 256 * 1024 * 1024,
+) -> Dict:
+    """
+    Generates the SPDX documents of many roots with a pool of worker processes.
+
+    The worker processes share a single rate limit, and each of them traverses
+    several roots concurrently, with its own bounded cache of directory entries.
+    The cache is not shared, as looking up a directory in another process costs
+    as much as fetching a small one.
+
+    Args:
+        swhids (List[CoreSWHID]): SWHIDs of the directories, revisions,
+            releases or snapshots to process
+        output_dir (str): directory the documents and the summary are written to
+        processes (int): number of worker processes
+        concurrency (int): number of roots traversed at the same time by a worker
+        rate_limit (float): maximum number of requests per second sent by all
+            the workers, unlimited if None
+        chunk_size (int): number of roots sent to a worker at once, which are
+            resolved to root directories with batched queries
+        profile (bool): whether to profile the workers; profiling is also
+            enabled by the SWH_SPDX_PROFILE environment variable
+        max_in_flight (int): maximum number of queries in flight from each
+            worker; if given, the number of queries in flight and the size of
+            batched queries adapt to the latency and throttling of the server
+        http2 (bool): whether each worker multiplexes its queries and downloads
+            over a few HTTP/2 connections
+        limits (dict): optional arguments of the Budget of each root, e.g.
+            {"max_nodes": 1000000, "timeout": 600}; the roots exceeding their
+            budget get the document of their partial traversal
+        cache_bytes (int): maximum size of the cache of directory entries of
+            each worker, in bytes, the least recently used entries being evicted
+
+    Returns:
+        dict: the summary of the batch, also written to summary.json, with the
+        profiling report of all the workers if profiling is enabled
+    """
+    start = time.monotonic()
+    os.makedirs(output_dir, exist_ok=True)
+    rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+    chunks = [
+        swhids[index : index + chunk_size]
+        for index in range(0, len(swhids), chunk_size)
+    ]
+    roots: List[dict] = []
+    profiler: Optional[Profiler] = None
+    with multiprocessing.Pool(
+        processes,
+        initializer=init_worker,
+        initargs=(cache_bytes, rate_limiter, profile, max_in_flight, http2, limits),
+    ) as pool:
+        worker = partial(
+            process_roots_in_worker, output_dir=output_dir, concurrency=concurrency
+        )
+        for results, profile_state in pool.imap_unordered(worker, chunks):
+            roots.extend(results)
+            if profile_state is not None:
+                if profiler is None:
+                    profiler = Profiler()
+                profiler.merge(profile_state)
+    summary = {
+        "roots": roots,
+        "succeeded": sum(1 for root in roots if root["error"] is None),
+        "failed": sum(1 for root in roots if root["error"] is not None),
+        "truncated": sum(1 for root in roots if root["truncated"] is not None),
+        "seconds": time.monotonic() - start,
+    }
+    if profiler is not None:
+        summary["profile"] = profiler.get_report()
+    with open(os.path.join(output_dir, "summary.json"), "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return summary
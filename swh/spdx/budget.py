@@ -0,0 +1,231 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+from typing import Iterator, Optional
+
+# Budget of the job running in the current thread, see use_budget
+_budget: ContextVar[Optional["Budget"]] = ContextVar("budget", default=None)
+
+
+class BudgetExceeded(Exception):
+    """Raised when a job exceeds one of the limits of its budget."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"The {reason} budget is exceeded")
+        self.reason = reason
+
+
+class Budget:
+    """Limits of the resources used by a job, e.g. the traversal of a root and
+    the download of its contents.
+
+    Once a limit is reached the budget is marked as exceeded, and every further
+    charge raises BudgetExceeded, so that the job stops and returns its partial
+    results.
+    """
+
+    def __init__(
+        self,
+        max_nodes: Optional[int] = None,
+        max_requests: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Initialize a new instance of the Budget class.
+
+        Args:
+            max_nodes (int): The maximum number of nodes traversed. The
+                directory whose entries reach the limit is kept whole.
+            max_requests (int): The maximum number of requests sent.
+            max_bytes (int): The maximum number of content bytes downloaded.
+            timeout (float): The maximum duration of the job, in seconds from
+                the creation of the budget.
+        """
+        self.max_nodes = max_nodes
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.nodes = 0
+        self.requests = 0
+        self.bytes = 0
+        # Name of the first limit reached
+        self.exceeded: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the job was stopped before its end."""
+        return self.exceeded is not None
+
+    def exceed(self, reason: str):
+        """
+        Marks the budget as exceeded and stops the job.
+
+        Args:
+            reason (str): the name of the limit reached, unless another one was
+                reached before
+
+        Returns:
+            None
+        """
+        if self.exceeded is None:
+            self.exceeded = reason
+        raise BudgetExceeded(self.exceeded)
+
+    def check(self):
+        """
+        Stops the job if a limit is reached, or its deadline is passed.
+
+        Returns:
+            None
+        """
+        if self.exceeded is not None:
+            raise BudgetExceeded(self.exceeded)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.exceed("time")
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self.exceed("nodes")
+
+    def charge_nodes(self, count: int):
+        """
+        Counts traversed nodes.
+
+        Args:
+            count (int): the number of nodes
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.nodes += count
+
+    def charge_request(self):
+        """
+        Counts a request about to be sent, stopping the job instead if the
+        request would exceed the budget.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.check()
+            if self.max_requests is not None and self.requests >= self.max_requests:
+                self.exceed("requests")
+            self.requests += 1
+
+    def charge_bytes(self, count: int):
+        """
+        Counts downloaded bytes, stopping the job if they exceed the budget.
+
+        Args:
+            count (int): the number of bytes
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.bytes += count
+            if self.max_bytes is not None and self.bytes > self.max_bytes:
+                self.exceed("bytes")
+
+    def get_state(self) -> dict:
+        """
+        Returns the resources used by the job, e.g. for a summary.
+
+        Returns:
+            dict: the numbers of nodes, requests and bytes, and the name of the
+            limit reached, if any
+        """
+        return {
+            "nodes": self.nodes,
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "exceeded": self.exceeded,
+        }
+
+
+@contextmanager
+def use_budget(budget: Optional[Budget]) -> Iterator[Optional[Budget]]:
+    """
+    Charges the traversals and downloads of the current thread to a budget.
+
+    Args:
+        budget (Budget): the budget, None to keep the current one
+
+    Yields:
+        Budget: the budget charged
+    """
+    if budget is None:
+        yield _budget.get()
+        return
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+def get_budget() -> Optional[Budget]:
+    """
+    Returns the budget charged by the current thread.
+
+    Returns:
+        Budget: the budget, None if the resources are not limited
+    """
+    return _budget.get()
+
+
+def check_budget():
+    """
+    Stops the job of the current thread if its budget is exceeded.
+
+    Returns:
+        None
+    """
+    budget = _budget.get()
+    if budget is not None:
+        budget.check()
+
+
+def charge_nodes(count: int):
+    """
+    Counts nodes traversed by the current thread.
+
+    Args:
+        count (int): the number of nodes
+
+    Returns:
+        None
+    """
+    budget = _budget.get()
+    if budget is not None:
+        budget.charge_nodes(count)
+
+
+def charge_request():
+    """
+    Counts a request about to be sent by the current thread.
+
+    Returns:
+        None
+    """
+    budget = _budget.get()
+    if budget is not None:
+        budget.charge_request()
+
+
+def charge_bytes(count: int):
+    """
+    Counts content bytes downloaded by the current thread.
+
+    Args:
+        count (int): the number of bytes
+
+    Returns:
+        None
+    """
+    budget = _budget.get()
+    if budget is not None:
+        budget.charge_bytes(count)
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+import sys
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def get_size(value: Any) -> int:
+    """
+    Estimates the memory size of a cached value.
+
+    Args:
+        value: the cached value
+
+    Returns:
+        int: the size of the value, in bytes
+    """
+    if hasattr(value, "nbytes"):
+        return value.nbytes
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Bounded in-memory mapping evicting the least recently used items.
+
+    It can be given wherever a cache mapping is accepted, e.g. to get_child,
+    the traversal functions or get_content_from_hashes, to avoid repeated
+    requests for the same directories or contents in long-running processes.
+    The size of the cached values is accounted in bytes, and the cache is safe
+    to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_items: Optional[int] = None,
+        sizeof: Callable[[Any], int] = get_size,
+    ):
+        """
+        Initialize a new instance of the LRUCache class.
+
+        Args:
+            max_bytes (int): The maximum total size of the cached values.
+            max_items (int): The optional maximum number of cached values.
+            sizeof (Callable): The function estimating the size of a value.
+        """
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.sizeof = sizeof
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        # Does not count as a hit nor make the item recently used
+        return key in self._items
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns a cached value and marks it as recently used.
+
+        Args:
+            key: the key of the value, e.g. a SWHID or a checksum
+            default: the value returned if the key is not cached
+
+        Returns:
+            the cached value, or default
+        """
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                raise KeyError(key)
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def __setitem__(self, key: Hashable, value: Any):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+            if size > self.max_bytes:
+                # Would evict everything else and still not fit
+                return
+            self._items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes or (
+                self.max_items is not None and len(self._items) > self.max_items
+            ):
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.evictions += 1
+
+    def __delitem__(self, key: Hashable):
+        with self._lock:
+            self.nbytes -= self._items.pop(key)[1]
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Removes a value from the cache, if cached.
+
+        Args:
+            key: the key of the value
+
+        Returns:
+            bool: True if the value was cached
+        """
+        with self._lock:
+            if key not in self._items:
+                return False
+            self.nbytes -= self._items.pop(key)[1]
+            return True
+
+    def clear(self):
+        """
+        Removes all the values from the cache, keeping the statistics.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the statistics of the cache.
+
+        Returns:
+            dict: the numbers of hits, misses and evictions, the hit ratio, and the
+            number and total size of the cached values
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "items": len(self._items),
+                "bytes": self.nbytes,
+            }
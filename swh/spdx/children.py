@@ -1,43 +1,166 @@
-from swh.model.swhids import CoreSWHID, ObjectType
-from swh.spdx.connection import get_graphql_client
-from swh.spdx.query import get_query_children
+from typing import TYPE_CHECKING, Iterable, Optional
 
+from swh.spdx.connection import execute_query, get_graphql_client
+from swh.spdx.entries import DirectoryEntries
+from swh.spdx.inflight import InFlightRequests
+from swh.spdx.profile import stage
+from swh.spdx.query import DEFAULT_ENTRY_FIELDS, get_query_children, normalize_fields
 
-def get_child(dir_swhid: CoreSWHID, dir_name: str) -> dict:
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+    from swh.spdx.backend import Backend
+
+# Directories being fetched by the threads of this process
+_directory_requests = InFlightRequests()
+
+
+def get_directory_entries_page(
+    dir_swhid: "CoreSWHID",
+    cursor: Optional[str] = None,
+    client=None,
+    fields: Optional[Iterable[str]] = None,
+) -> dict:
+    """
+    Retrieves a page of the entries of a directory specified by its SWHID.
+
+    Args:
+        dir_swhid (CoreSWHID): The SWHID of the directory.
+        cursor (str): The cursor after which the page starts, None for the
+            first page.
+        client (gql.Client): Optional graphql client to reuse.
+        fields (Iterable[str]): The fields of the content entries to retrieve,
+            see get_query_children.
+
+    Returns:
+        dict: the page of the directory entries connection, with its
+        totalCount, pageInfo and edges
+    """
+    if client is None:
+        client = get_graphql_client()
+    params = {"swhid": str(dir_swhid), "cursor": cursor}
+    response = execute_query(client, get_query_children(fields), params)
+    return response["directory"]["entries"]
+
+
+def get_directory_entries(
+    dir_swhid: "CoreSWHID", fields: Optional[Iterable[str]] = None
+) -> DirectoryEntries:
+    """
+    Retrieves the entries of a directory specified by its SWHID, page by page.
+
+    Args:
+        dir_swhid (CoreSWHID): The SWHID of the directory.
+        fields (Iterable[str]): The fields of the content entries to retrieve,
+            e.g. only ("sha1",) to compute a verification code, see
+            get_query_children. Smaller responses are faster to transfer and
+            decode.
+
+    Returns:
+        DirectoryEntries: the entries of the directory, each page being decoded
+        at once.
+    """
+    client = get_graphql_client()
+    has_next_page = True
+    cursor = None
+    entries = DirectoryEntries()
+    while has_next_page:
+        page = get_directory_entries_page(
+            dir_swhid, cursor, client=client, fields=fields
+        )
+        has_next_page = page["pageInfo"]["hasNextPage"]
+        cursor = page["pageInfo"]["endCursor"]
+        with stage("decode", dir_swhid):
+            entries.add_page(page["edges"])
+    return entries
+
+
+def get_cached_directory_entries(
+    dir_swhid: "CoreSWHID",
+    cache: Optional[dict] = None,
+    backend: Optional["Backend"] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> DirectoryEntries:
+    """
+    Retrieves the entries of a directory, unless they are already cached.
+
+    Args:
+        dir_swhid (CoreSWHID): The SWHID of the directory.
+        cache (dict): Optional mapping of directory SWHIDs to their entries,
+            shared between calls so that a directory is only fetched once.
+        backend (Backend): Optional source of the directory entries, the GraphQL
+            API of the archive is queried if not given.
+        fields (Iterable[str]): The fields of the content entries to retrieve,
+            see get_query_children. Backends may return more fields.
+
+    Returns:
+        DirectoryEntries: the entries of the directory
+    """
+    fields = normalize_fields(fields)
+    # Entries with other fields than the default ones are cached separately
+    key = dir_swhid if fields == DEFAULT_ENTRY_FIELDS else (dir_swhid, fields)
+    if cache is not None:
+        entries = cache.get(key)
+        if entries is not None:
+            return entries
+
+    def fetch() -> DirectoryEntries:
+        if backend is None:
+            if fields == DEFAULT_ENTRY_FIELDS:
+                entries = get_directory_entries(dir_swhid)
+            else:
+                entries = get_directory_entries(dir_swhid, fields=fields)
+        else:
+            entries = backend.get_directory_entries(dir_swhid)
+        if cache is not None:
+            cache[key] = entries
+        return entries
+
+    # Concurrent lookups of the same directory wait for the first one
+    return _directory_requests.run((key, backend), fetch)
+
+
+def get_child(
+    dir_swhid: "CoreSWHID",
+    dir_name: str,
+    cache: Optional[dict] = None,
+    backend: Optional["Backend"] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> dict:
     """
     Retrieves the child details of a directory specified by its SWHID.
 
     Args:
         dir_swhid (CoreSWHID): The SWHID of the directory.
         dir_name (str): The name of the directory whose children details needs to be retrieved.
+        cache (dict): Optional mapping of directory SWHIDs to their entries,
+            shared between calls so that a directory is only fetched once.
+        backend (Backend): Optional source of the directory entries, the GraphQL
+            API of the archive is queried if not given.
+        fields (Iterable[str]): The fields of the content entries to retrieve,
+            see get_query_children.
 
     Returns:
         Dict[str: List]: A dictionary containing the child details,
         where the keys are child names and the values is a list of swhid,
         checksums and directory path of child.
     """
+    from swh.model.swhids import ObjectType
+
     if not dir_swhid.object_type == ObjectType.DIRECTORY:
         raise ValueError(f"{str(dir_swhid)} is not a valid directory SWHID")
-    client = get_graphql_client()
-    has_next_page = True
-    cursor = None
+    entries = get_cached_directory_entries(
+        dir_swhid, cache=cache, backend=backend, fields=fields
+    )
+    # Decodes the SWHIDs and checksums of the entries
+    with stage("swhid", dir_swhid):
+        rows = list(entries)
     # Initialize child details as empty dictionary
     child_details = {}
-    query = get_query_children()
-    while has_next_page:
-        params = {"swhid": str(dir_swhid), "cursor": cursor}
-        response = client.execute(query, params)
-        page_info = response["directory"]["entries"]["pageInfo"]
-        has_next_page = page_info["hasNextPage"]
-        cursor = page_info["endCursor"]
-        edges = response["directory"]["entries"]["edges"]
-        for edge in edges:
-            node = edge["node"]
-            child_name = node["name"]["text"]
+    with stage("paths", dir_swhid):
+        for child_name, child_swhid, child_checksums in rows:
+            # Paths are not cached since the same directory can be found under
+            # different parents, e.g. in several releases of a project
             child_path = f"{dir_name}/{child_name}"
-            str_child_swhid = node["target"]["swhid"]
-            child_swhid = CoreSWHID.from_string(str_child_swhid)
-            child_checksums = node["target"]["node"]
             # Appends items in child_details with key as child_name
             # and value as list of child_swhid, child_checksums and child_path
             child_details[child_name] = [
@@ -1,18 +1,202 @@
-# import click
+import click
 
-# from swh.core.cli import CONTEXT_SETTINGS
-# from swh.core.cli import swh as swh_cli_group
+from swh.core.cli import CONTEXT_SETTINGS
+from swh.core.cli import swh as swh_cli_group
 
 
-# @swh_cli_group.group(name="spdx", context_settings=CONTEXT_SETTINGS)
-# @click.pass_context
-# def spdx_cli_group(ctx):
-#     """spdx main command."""
+@swh_cli_group.group(name="spdx", context_settings=CONTEXT_SETTINGS)
+@click.pass_context
+def spdx_cli_group(ctx):
+    """Software Heritage SPDX documents generation."""
 
 
-# @spdx_cli_group.command()
-# @click.option("--bar", help="Something")
-# @click.pass_context
-# def bar(ctx, bar):
-#     """Do something."""
-#     click.echo("bar")
+@spdx_cli_group.command()
+@click.argument("swhids_file", type=click.File("r"))
+@click.option(
+    "--output-dir",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Directory the SPDX documents and the summary are written to",
+)
+@click.option(
+    "--processes",
+    "-p",
+    default=4,
+    show_default=True,
+    help="Number of worker processes",
+)
+@click.option(
+    "--concurrency",
+    "-c",
+    default=4,
+    show_default=True,
+    help="Number of roots traversed at the same time by each worker",
+)
+@click.option(
+    "--rate-limit",
+    type=float,
+    default=None,
+    help="Maximum number of requests per second, shared by all the workers",
+)
+@click.option(
+    "--max-in-flight",
+    type=int,
+    default=None,
+    help="Maximum number of queries in flight from each worker, adapted to the "
+    "latency and throttling of the server",
+)
+@click.option(
+    "--http2",
+    is_flag=True,
+    default=False,
+    help="Multiplex the queries and downloads of each worker over HTTP/2 "
+    "connections",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Report the time spent in each stage and the slowest directories",
+)
+@click.option(
+    "--max-nodes",
+    type=int,
+    default=None,
+    help="Stop the traversal of a root after this number of nodes",
+)
+@click.option(
+    "--max-requests",
+    type=int,
+    default=None,
+    help="Stop the traversal of a root after this number of requests",
+)
+@click.option(
+    "--max-bytes",
+    type=int,
+    default=None,
+    help="Stop the processing of a root after this number of downloaded bytes",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=None,
+    help="Stop the traversal of a root after this number of seconds",
+)
+@click.pass_context
+def batch(
+    ctx,
+    swhids_file,
+    output_dir,
+    processes,
+    concurrency,
+    rate_limit,
+    max_in_flight,
+    http2,
+    profile,
+    max_nodes,
+    max_requests,
+    max_bytes,
+    timeout,
+):
+    """Generate one SPDX document per SWHID listed in SWHIDS_FILE.
+
+    SWHIDS_FILE contains one directory, revision, release or snapshot SWHID per
+    line. A summary of the timings is written to summary.json in the output
+    directory. The roots exceeding one of the limits get the document of their
+    partial traversal, and are reported as truncated in the summary.
+    """
+    from swh.model.swhids import CoreSWHID
+    from swh.spdx.batch import run_batch
+    from swh.spdx.profile import format_report
+
+    swhids = [
+        CoreSWHID.from_string(line.strip())
+        for line in swhids_file
+        if line.strip() and not line.startswith("#")
+    ]
+    limits = {
+        name: value
+        for name, value in [
+            ("max_nodes", max_nodes),
+            ("max_requests", max_requests),
+            ("max_bytes", max_bytes),
+            ("timeout", timeout),
+        ]
+        if value is not None
+    }
+    summary = run_batch(
+        swhids,
+        output_dir,
+        processes=processes,
+        concurrency=concurrency,
+        rate_limit=rate_limit,
+        profile=profile,
+        max_in_flight=max_in_flight,
+        http2=http2,
+        limits=limits or None,
+    )
+    click.echo(
+        f"{summary['succeeded']} roots processed, {summary['failed']} failed "
+        f"in {summary['seconds']:.1f}s"
+    )
+    if summary.get("truncated"):
+        click.echo(f"{summary['truncated']} roots truncated by their limits")
+    if "profile" in summary:
+        click.echo(format_report(summary["profile"]), err=True)
+    if summary["failed"]:
+        ctx.exit(1)
+
+
+@spdx_cli_group.command()
+@click.argument("swhids", nargs=-1, required=True)
+@click.option(
+    "--output-dir",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Directory the SPDX documents are written to",
+)
+@click.option(
+    "--subpackages/--no-subpackages",
+    default=True,
+    show_default=True,
+    help="Also write one SPDX document per top-level directory of each root",
+)
+@click.option(
+    "--threads",
+    "-t",
+    default=4,
+    show_default=True,
+    help="Number of threads writing the documents",
+)
+def packages(swhids, output_dir, subpackages, threads):
+    """Generate the SPDX documents of the packages of SWHIDS, and of their
+    top-level directories, traversing each root directory once.
+    """
+    import os
+
+    from swh.model.swhids import CoreSWHID
+    from swh.spdx.node import Node
+    from swh.spdx.packages import write_package_documents
+    from swh.spdx.resolve import resolve_root_directories
+    from swh.spdx.traverse import traverse_root
+
+    core_swhids = [CoreSWHID.from_string(swhid) for swhid in swhids]
+    root_directories = resolve_root_directories(core_swhids)
+    cache: dict = {}
+    node_collections = (
+        traverse_root(
+            Node(name=swhid.object_id.hex(), swhid=root_directories[swhid]),
+            first_iteration=True,
+            node_collection={},
+            cache=cache,
+            bulk=True,
+        )
+        for swhid in core_swhids
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    paths = write_package_documents(
+        node_collections, output_dir, subpackages=subpackages, max_workers=threads
+    )
+    click.echo(f"{len(paths)} documents written")
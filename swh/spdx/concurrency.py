@@ -0,0 +1,149 @@
+import threading
+import time
+from typing import Optional
+
+# HTTP status codes of the responses of an overloaded or throttling server
+CONGESTION_STATUS_CODES = (429, 502, 503, 504)
+
+
+def is_congestion_error(error: BaseException) -> bool:
+    """
+    Tells whether a query failed because the server is overloaded or throttles
+    the client, as opposed to an error of the query itself.
+
+    Args:
+        error (BaseException): the exception raised by the query
+
+    Returns:
+        bool: True for throttling responses, server overload and timeouts
+    """
+    if getattr(error, "code", None) in CONGESTION_STATUS_CODES:
+        return True
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
+
+class ConcurrencyController:
+    """Adapts the number of queries in flight to the response of the server,
+    with additive increase and multiplicative decrease (AIMD).
+
+    Each query takes a share of the limit equal to its cost, e.g. the number of
+    objects of a batched query. The limit grows by one cost unit per limit worth
+    of successful queries, and is multiplied by decrease_factor, at most once per
+    observed latency, when the server throttles or fails with an overload error,
+    or when the latency per cost unit exceeds latency_tolerance times the lowest
+    one observed. The recommended size of batched queries follows the same rule.
+    """
+
+    def __init__(
+        self,
+        max_limit: float = 16,
+        min_limit: float = 1,
+        initial_limit: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 3.0,
+        max_batch_size: int = 50,
+    ):
+        """
+        Initialize a new instance of the ConcurrencyController class.
+
+        Args:
+            max_limit (float): The maximum total cost of the queries in flight.
+            min_limit (float): The minimum total cost of the queries in flight.
+            initial_limit (float): The initial limit, defaults to min_limit.
+            decrease_factor (float): The factor applied to the limit on congestion.
+            latency_tolerance (float): The ratio to the lowest latency per cost
+                unit above which the server is considered congested.
+            max_batch_size (int): The maximum recommended size of batched queries.
+        """
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = initial_limit if initial_limit is not None else min_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.max_batch_size = max_batch_size
+        self.batch_size = float(max_batch_size)
+        self.in_flight = 0.0
+        self.min_latency: Optional[float] = None
+        self.successes = 0
+        self.congestions = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, cost: float = 1):
+        """
+        Waits until a query of the given cost can be sent. A query costing more
+        than the limit is sent once no other query is in flight.
+
+        Args:
+            cost (float): the cost of the query
+
+        Returns:
+            None
+        """
+        with self._condition:
+            while self.in_flight and self.in_flight + cost > self.limit:
+                self._condition.wait()
+            self.in_flight += cost
+
+    def release(
+        self, cost: float, latency: float, error: Optional[BaseException] = None
+    ):
+        """
+        Records the outcome of a query and adapts the limit.
+
+        Args:
+            cost (float): the cost of the query, as given to acquire
+            latency (float): the duration of the query, in seconds
+            error (BaseException): the exception raised by the query, if any
+
+        Returns:
+            None
+        """
+        with self._condition:
+            self.in_flight -= cost
+            congested = error is not None and is_congestion_error(error)
+            if error is None:
+                unit_latency = latency / max(cost, 1)
+                if self.min_latency is None or unit_latency < self.min_latency:
+                    self.min_latency = unit_latency
+                congested = unit_latency > self.latency_tolerance * self.min_latency
+            if congested:
+                self.decrease(latency)
+            elif error is None:
+                self.successes += 1
+                self.limit = min(self.max_limit, self.limit + cost / self.limit)
+                if cost > 1:
+                    self.batch_size = min(self.max_batch_size, self.batch_size + 1)
+            self._condition.notify_all()
+
+    def decrease(self, latency: float):
+        """
+        Decreases the limit and the batch size, unless they were already
+        decreased during the last latency, since the queries in flight then
+        were sent before the previous decrease.
+
+        Args:
+            latency (float): the duration of the query which saw the congestion
+
+        Returns:
+            None
+        """
+        now = time.monotonic()
+        if now - self._last_decrease < latency:
+            return
+        self._last_decrease = now
+        self.congestions += 1
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self.batch_size = max(1.0, self.batch_size * self.decrease_factor)
+
+    def get_batch_size(self, requested: int) -> int:
+        """
+        Returns the size of the next batched query.
+
+        Args:
+            requested (int): the size requested by the caller
+
+        Returns:
+            int: the requested size, reduced while the server is congested
+        """
+        return max(1, min(requested, int(self.batch_size)))
@@ -1,5 +1,23 @@
-from gql import Client
-from gql.transport.aiohttp import AIOHTTPTransport
+import json
+import time
+from typing import Any, Callable, Generator
+
+from swh.spdx.budget import charge_bytes, charge_request
+from swh.spdx.profile import stage
+
+GRAPHQL_URL = "https://archive.softwareheritage.org/graphql/"
+
+# Rate limiter shared by all the queries sent by the current process, see
+# set_rate_limiter
+_rate_limiter = None
+
+# Controller of the queries in flight from the current process, see
+# set_concurrency_controller
+_concurrency_controller = None
+
+# Whether queries and downloads are multiplexed over shared HTTP/2 connections,
+# see set_http2
+_http2 = False
 
 
 def get_graphql_client():
@@ -12,6 +30,245 @@ def get_graphql_client():
     Returns:
         gql.Client: graphql client through which query will be executed
     """
-    transport = AIOHTTPTransport(url="https://archive.softwareheritage.org/graphql/")
+    # gql and aiohttp are slow to import, only load them on the first network call
+    from gql import Client
+
+    if _http2:
+        from swh.spdx.http2 import SharedHTTPXTransport
+
+        # httpx requests all the response encodings it can decode
+        transport = SharedHTTPXTransport(
+            url=GRAPHQL_URL, json_deserialize=get_json_deserializer()
+        )
+    else:
+        from gql.transport.aiohttp import AIOHTTPTransport
+
+        transport = AIOHTTPTransport(
+            url=GRAPHQL_URL,
+            headers={"Accept-Encoding": get_accept_encoding()},
+            json_deserialize=get_json_deserializer(),
+        )
     client = Client(transport=transport, fetch_schema_from_transport=True)
     return client
+
+
+def get_json_deserializer() -> Callable:
+    """
+    Returns the fastest JSON decoder available to decode the responses.
+
+    Args:
+        None
+
+    Returns:
+        Callable: orjson.loads if orjson is installed, json.loads otherwise
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def get_accept_encoding() -> str:
+    """
+    Builds the Accept-Encoding header of the queries, listing the compressed
+    response encodings aiohttp can decode with the installed modules.
+
+    Args:
+        None
+
+    Returns:
+        str: gzip and deflate, then br and zstd if their decoders are installed
+    """
+    from aiohttp import compression_utils
+
+    encodings = ["gzip", "deflate"]
+    if getattr(compression_utils, "HAS_BROTLI", False):
+        encodings.append("br")
+    if getattr(compression_utils, "HAS_ZSTD", False):
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+def set_http2(enabled: bool):
+    """
+    Sets whether the queries and content downloads of the current process are
+    multiplexed over a few shared HTTP/2 connections, instead of opening one
+    HTTP/1.1 connection per concurrent request.
+
+    Args:
+        enabled (bool): whether to use HTTP/2, which requires httpx and h2
+
+    Returns:
+        None
+    """
+    global _http2
+    if enabled:
+        # Fails early if httpx is not installed
+        import swh.spdx.http2  # noqa
+    _http2 = enabled
+
+
+def download_text(url: str) -> str:
+    """
+    Downloads a raw content within the configured rate limit.
+
+    Args:
+        url (str): the URL of the raw content
+
+    Returns:
+        str: the text of the content
+    """
+    # requests is slow to import, only load it when content is fetched
+    from requests.exceptions import HTTPError
+
+    charge_request()
+    acquire_request()
+    response: Any
+    with stage("download"):
+        if _http2:
+            from swh.spdx.http2 import get_http_client
+
+            response = get_http_client().get(url)
+        else:
+            import requests
+
+            response = requests.get(url)
+        if not response.status_code == 200:
+            raise HTTPError("Error downloading content")
+        charge_bytes(len(response.content))
+        return response.text
+
+
+def iter_download(url: str, chunk_size: int = 65536) -> Generator[bytes, None, None]:
+    """
+    Downloads a raw content by chunks within the configured rate limit, the
+    download stops if the iteration is stopped.
+
+    Args:
+        url (str): the URL of the raw content
+        chunk_size (int): the size of the chunks
+
+    Yields:
+        bytes: the chunks of the content
+    """
+    from requests.exceptions import HTTPError
+
+    charge_request()
+    acquire_request()
+    with stage("download"):
+        if _http2:
+            from swh.spdx.http2 import get_http_client
+
+            with get_http_client().stream("GET", url) as response:
+                if not response.status_code == 200:
+                    raise HTTPError("Error downloading content")
+                for chunk in response.iter_bytes(chunk_size):
+                    charge_bytes(len(chunk))
+                    yield chunk
+        else:
+            import requests
+
+            with requests.get(url, stream=True) as response:
+                if not response.status_code == 200:
+                    raise HTTPError("Error downloading content")
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    charge_bytes(len(chunk))
+                    yield chunk
+
+
+def set_rate_limiter(rate_limiter):
+    """
+    Sets the rate limiter acquired before each request sent to the archive by
+    the current process.
+
+    Args:
+        rate_limiter (RateLimiter): the rate limiter, possibly shared with other
+            processes, or None to disable rate limiting
+
+    Returns:
+        None
+    """
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def acquire_request():
+    """
+    Waits until the configured rate limiter, if any, allows sending a request.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+
+
+def set_concurrency_controller(concurrency_controller):
+    """
+    Sets the controller adapting the number of queries in flight from the
+    current process to the response of the server.
+
+    Args:
+        concurrency_controller (ConcurrencyController): the controller, or None
+            to send queries without limiting their concurrency
+
+    Returns:
+        None
+    """
+    global _concurrency_controller
+    _concurrency_controller = concurrency_controller
+
+
+def get_batch_size(requested: int) -> int:
+    """
+    Returns the size of the next batched query, reduced by the configured
+    concurrency controller, if any, while the server is congested.
+
+    Args:
+        requested (int): the size requested by the caller
+
+    Returns:
+        int: the size of the next batched query
+    """
+    if _concurrency_controller is None:
+        return requested
+    return _concurrency_controller.get_batch_size(requested)
+
+
+def execute_query(client, query, params: dict, cost: float = 1) -> dict:
+    """
+    Executes a GraphQL query within the configured rate limit, and the
+    concurrency allowed by the configured concurrency controller. The query is
+    charged to the budget of the current job, if any.
+
+    Args:
+        client (gql.Client): graphql client through which query will be executed
+        query (gql.Query): the query to execute
+        params (dict): the parameters of the query
+        cost (float): the cost of the query for the concurrency controller, e.g.
+            the number of objects queried by a batched query
+
+    Returns:
+        dict: the response of the server
+    """
+    charge_request()
+    acquire_request()
+    controller = _concurrency_controller
+    if controller is None:
+        # The time spent waiting for the server and decoding its response
+        with stage("query", params.get("swhid")):
+            return client.execute(query, params)
+    controller.acquire(cost)
+    start = time.monotonic()
+    try:
+        with stage("query", params.get("swhid")):
+            response = client.execute(query, params)
+    except Exception as error:
+        controller.release(cost, time.monotonic() - start, error=error)
+        raise
+    controller.release(cost, time.monotonic() - start)
+    return response
@@ -1,27 +1,460 @@
-import requests
-from requests.exceptions import HTTPError
+import codecs
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+)
 
-from swh.spdx.connection import get_graphql_client
-from swh.spdx.query import get_query_content
+from swh.spdx.budget import Budget, BudgetExceeded, charge_bytes, use_budget
+from swh.spdx.connection import (
+    download_text,
+    execute_query,
+    get_graphql_client,
+    iter_download,
+)
+from swh.spdx.inflight import InFlightRequests
+from swh.spdx.query import CONTENT_CHECKSUMS, get_query_content, get_query_content_data
 
+if TYPE_CHECKING:
+    from swh.spdx.backend import Backend
+    from swh.spdx.node import Node
 
-def get_content_from_hashes(content_object_checksums: dict) -> str:
-    client = get_graphql_client()
-    query = get_query_content()
-    params = {
-        "sha1": content_object_checksums["sha1"],
-        "sha256": content_object_checksums["sha256"],
-        "sha1_git": content_object_checksums["sha1_git"],
-        "blake2s256": content_object_checksums["blake2s256"],
+# Contents being fetched by the threads of this process
+_content_requests = InFlightRequests()
+_content_data_requests = InFlightRequests()
+
+# Number of leading bytes of a content looked at to detect binary data
+BINARY_DETECTION_SIZE = 8000
+
+# Byte order marks of the text encodings, UTF-32 ones first since the UTF-32 LE
+# mark starts with the UTF-16 LE one
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Encoding of the texts which are neither marked nor valid UTF-8, which decodes
+# any data, e.g. the Latin-1 text of old license files
+FALLBACK_ENCODING = "latin-1"
+
+# Cached in place of the data of the binary contents skipped, so that they are
+# not downloaded again, see get_content_data_from_hashes
+SKIPPED_BINARY = "skipped binary content"
+
+
+def get_checksums_key(content_object_checksums: dict) -> str:
+    """
+    Returns the key identifying a content in the caches, from its checksums.
+
+    Args:
+        content_object_checksums (dict): The checksums of the content.
+
+    Returns:
+        str: its sha1_git, or another of its checksums if it is not known
+    """
+    for name in ("sha1_git",) + CONTENT_CHECKSUMS:
+        if content_object_checksums.get(name):
+            return content_object_checksums[name]
+    raise ValueError("The content has no checksum")
+
+
+def get_content_params(content_object_checksums: dict) -> dict:
+    """
+    Selects the checksums a content is queried by, among the ones known, e.g.
+    when only some of them were retrieved with the directory entries.
+
+    Args:
+        content_object_checksums (dict): The checksums of the content.
+
+    Returns:
+        dict: the checksums of CONTENT_CHECKSUMS known, by name
+    """
+    return {
+        name: content_object_checksums[name]
+        for name in CONTENT_CHECKSUMS
+        if content_object_checksums.get(name)
     }
-    response = client.execute(query, params)
+
+
+def get_content_from_hashes(
+    content_object_checksums: dict,
+    backend: Optional["Backend"] = None,
+    cache: Optional[MutableMapping] = None,
+) -> str:
+    """
+    Retrieves the text of a content specified by its checksums.
+
+    Args:
+        content_object_checksums (dict): The checksums of the content.
+        backend (Backend): Optional source of the content, the GraphQL API
+            of the archive is queried if not given.
+        cache (MutableMapping): Optional cache of the texts of the contents,
+            keyed by sha1_git, e.g. an LRUCache.
+
+    Returns:
+        str: the text of the content
+    """
+    key = get_checksums_key(content_object_checksums)
+    if cache is not None:
+        content = cache.get(key)
+        if content is not None:
+            return content
+
+    def fetch() -> str:
+        content = fetch_content_from_hashes(content_object_checksums, backend=backend)
+        if cache is not None:
+            cache[key] = content
+        return content
+
+    # Concurrent lookups of the same content wait for the first one
+    return _content_requests.run((key, backend), fetch)
+
+
+def fetch_content_from_hashes(
+    content_object_checksums: dict, backend: Optional["Backend"] = None
+) -> str:
+    """
+    Fetches the text of a content specified by its checksums, without caching.
+
+    Args:
+        content_object_checksums (dict): The checksums of the content.
+        backend (Backend): Optional source of the content, the GraphQL API
+            of the archive is queried if not given.
+
+    Returns:
+        str: the text of the content
+    """
+    if backend is not None:
+        return backend.get_content(content_object_checksums)
+
+    client = get_graphql_client()
+    params = get_content_params(content_object_checksums)
+    query = get_query_content(params)
+    response = execute_query(client, query, params)
     raw_content = response["contentByHashes"]["data"]["raw"]
     if raw_content is None:
         # Content size exceeded 10000 bytes
         content_download_url = response["contentByHashes"]["data"]["url"]
-        downloaded_content = requests.get(content_download_url)
-        if not downloaded_content.status_code == 200:
-            raise HTTPError("Error downloading content")
-        return downloaded_content.text
+        return download_text(content_download_url)
     text_content = raw_content["text"]
+    # The bytes of the content, not its characters, are charged
+    charge_bytes(len(text_content.encode()))
     return text_content
+
+
+def get_byte_order_mark_encoding(data: bytes) -> Optional[str]:
+    """
+    Detects the encoding of a text from its byte order mark.
+
+    Args:
+        data (bytes): the data of the text, or its first bytes
+
+    Returns:
+        str: the encoding, or None if the text does not start with a byte
+        order mark
+    """
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if data.startswith(mark):
+            return encoding
+    return None
+
+
+def is_binary(data: bytes) -> bool:
+    """
+    Detects binary data from its first bytes, like git does: data is binary if
+    a NUL byte appears in its first BINARY_DETECTION_SIZE bytes. UTF-16 and
+    UTF-32 texts, which have NUL bytes, are detected by their byte order mark.
+
+    Args:
+        data (bytes): the data, or its first bytes
+
+    Returns:
+        bool: True if the data is binary
+    """
+    if get_byte_order_mark_encoding(data) is not None:
+        return False
+    return b"\0" in data[:BINARY_DETECTION_SIZE]
+
+
+def get_content_data_from_hashes(
+    content_object_checksums: dict,
+    backend: Optional["Backend"] = None,
+    cache: Optional[MutableMapping] = None,
+    skip_binary: bool = False,
+) -> Optional[bytes]:
+    """
+    Retrieves the raw data of a content specified by its checksums, without
+    decoding it.
+
+    Args:
+        content_object_checksums (dict): The checksums of the content.
+        backend (Backend): Optional source of the content, the GraphQL API
+            of the archive is queried if not given.
+        cache (MutableMapping): Optional cache of the data of the contents,
+            keyed by sha1_git, or of SKIPPED_BINARY for the binary contents
+            skipped; it must not be shared with a cache of texts.
+        skip_binary (bool): Whether to stop downloading binary contents once
+            detected as binary.
+
+    Returns:
+        bytes: the data of the content, or None if skip_binary is set and the
+        content is binary
+    """
+    key = get_checksums_key(content_object_checksums)
+    if cache is not None:
+        data = cache.get(key)
+        if data == SKIPPED_BINARY:
+            if skip_binary:
+                return None
+            # The data of the binary content is now needed
+        elif data is not None:
+            return None if skip_binary and is_binary(data) else data
+
+    def fetch() -> Optional[bytes]:
+        data = fetch_content_data_from_hashes(
+            content_object_checksums, backend=backend, skip_binary=skip_binary
+        )
+        if cache is not None:
+            cache[key] = data if data is not None else SKIPPED_BINARY
+        return data
+
+    return _content_data_requests.run((key, backend, skip_binary), fetch)
+
+
+def fetch_content_data_from_hashes(
+    content_object_checksums: dict,
+    backend: Optional["Backend"] = None,
+    skip_binary: bool = False,
+) -> Optional[bytes]:
+    """
+    Fetches the raw data of a content specified by its checksums, without caching.
+
+    Args:
+        content_object_checksums (dict): The checksums of the content.
+        backend (Backend): Optional source of the content, the GraphQL API
+            of the archive is queried if not given.
+        skip_binary (bool): Whether to stop downloading binary contents once
+            detected as binary.
+
+    Returns:
+        bytes: the data of the content, or None if skip_binary is set and the
+        content is binary
+    """
+    if backend is not None:
+        data = backend.get_content_data(content_object_checksums)
+        return None if skip_binary and is_binary(data) else data
+
+    import base64
+
+    client = get_graphql_client()
+    params = get_content_params(content_object_checksums)
+    query = get_query_content_data(params)
+    response = execute_query(client, query, params)
+    raw_content = response["contentByHashes"]["data"]["raw"]
+    if raw_content is not None:
+        data = base64.b64decode(raw_content["base64"])
+        charge_bytes(len(data))
+        return None if skip_binary and is_binary(data) else data
+
+    # Content size exceeded 10000 bytes, its data is downloaded in chunks so that
+    # binary contents can be skipped after their first bytes
+    content_download_url = response["contentByHashes"]["data"]["url"]
+    chunks = []
+    head = b""
+    download = iter_download(content_download_url)
+    for chunk in download:
+        chunks.append(chunk)
+        if len(head) < BINARY_DETECTION_SIZE:
+            head += chunk[: BINARY_DETECTION_SIZE - len(head)]
+            if skip_binary and is_binary(head):
+                # Closes the connection without downloading the rest
+                download.close()
+                return None
+    return b"".join(chunks)
+
+
+def decode_content(data: bytes, encoding: Optional[str] = None) -> str:
+    """
+    Decodes the data of a text content, invalid bytes are replaced.
+
+    Unless given, the encoding is detected from the byte order mark of the
+    content, otherwise the content is decoded as UTF-8 if it is valid UTF-8,
+    and as FALLBACK_ENCODING if it is not.
+
+    Args:
+        data (bytes): the data of the content
+        encoding (str): the encoding of the content, detected if not given
+
+    Returns:
+        str: the text of the content
+    """
+    if encoding is None:
+        encoding = get_byte_order_mark_encoding(data)
+    if encoding is None:
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            encoding = FALLBACK_ENCODING
+    return data.decode(encoding, "replace")
+
+
+def get_content_key(node: "Node") -> str:
+    """
+    Returns the key identifying the content of a content node, i.e. its sha1_git.
+
+    Args:
+        node (Node): the content node
+
+    Returns:
+        str: the hexadecimal sha1_git of the content
+    """
+    # The identifier of a content SWHID is the sha1_git of the content
+    return node.checksums.get("sha1_git") or node.swhid.object_id.hex()
+
+
+def get_content_checksums(node: "Node") -> dict:
+    """
+    Returns the checksums a content node is fetched by, its sha1_git being
+    taken from its SWHID if it was not retrieved with the directory entries.
+
+    Args:
+        node (Node): the content node
+
+    Returns:
+        dict: the checksums of the content
+    """
+    if node.checksums.get("sha1_git"):
+        return node.checksums
+    return dict(node.checksums, sha1_git=node.swhid.object_id.hex())
+
+
+def group_nodes_by_content(nodes: Iterable["Node"]) -> Dict[str, List["Node"]]:
+    """
+    Groups content nodes having the same content, the other nodes, e.g.
+    directories and submodules, are ignored.
+
+    Args:
+        nodes (Iterable[Node]): the nodes to group
+
+    Returns:
+        Dict[str, List[Node]]: the content nodes, keyed by sha1_git
+    """
+    nodes_by_content: Dict[str, List["Node"]] = {}
+    for node in nodes:
+        if node.is_content:
+            nodes_by_content.setdefault(get_content_key(node), []).append(node)
+    return nodes_by_content
+
+
+def get_contents_from_nodes(
+    nodes: Iterable["Node"],
+    scan: Optional[Callable[[str], Any]] = None,
+    backend: Optional["Backend"] = None,
+    cache: Optional[MutableMapping] = None,
+    raw: bool = False,
+    budget: Optional[Budget] = None,
+) -> Dict["Node", Any]:
+    """
+    Fetches and scans the content of content nodes, once per unique content.
+
+    The same file often appears many times in a tree under different paths, so
+    the nodes are grouped by sha1_git and each unique content is fetched and
+    scanned once, then its result is shared by all the nodes having it.
+
+    Args:
+        nodes (Iterable[Node]): the nodes whose content is fetched, directory
+            and submodule nodes are ignored
+        scan (Callable): optional function analysing the text of a content,
+            e.g. to detect licenses
+        backend (Backend): optional source of the contents
+        cache (MutableMapping): optional cache of the texts of the contents,
+            keyed by sha1_git, or of their data if raw is set
+        raw (bool): whether to fetch the raw data of the contents; only the
+            text contents which are scanned are then decoded, and binary
+            contents are not scanned, their result is None
+        budget (Budget): optional limits of the requests, downloaded bytes and
+            duration of the fetches, otherwise those of the current job apply;
+            the contents fetched until a limit is reached are returned, and the
+            budget is marked as exceeded
+
+    Returns:
+        Dict[Node, Any]: the text (or data if raw is set) of each content node,
+        or the result of its scan if a scan function is given
+    """
+    results: Dict["Node", Any] = {}
+    with use_budget(budget):
+        try:
+            fetch_contents_from_nodes(nodes, results, scan, backend, cache, raw)
+        except BudgetExceeded:
+            pass
+    return results
+
+
+def fetch_contents_from_nodes(
+    nodes: Iterable["Node"],
+    results: Dict["Node", Any],
+    scan: Optional[Callable[[str], Any]] = None,
+    backend: Optional["Backend"] = None,
+    cache: Optional[MutableMapping] = None,
+    raw: bool = False,
+):
+    """
+    Fetches and scans the contents of get_contents_from_nodes, adding them to
+    the results as they are fetched.
+
+    Args:
+        nodes (Iterable[Node]): the nodes whose content is fetched
+        results (Dict[Node, Any]): the results, filled in place
+        scan (Callable): optional function analysing the text of a content
+        backend (Backend): optional source of the contents
+        cache (MutableMapping): optional cache of the contents
+        raw (bool): whether to fetch the raw data of the contents
+
+    Returns:
+        None
+    """
+    for same_content_nodes in group_nodes_by_content(nodes).values():
+        result = get_content_result(
+            get_content_checksums(same_content_nodes[0]), scan, backend, cache, raw
+        )
+        for node in same_content_nodes:
+            results[node] = result
+
+
+def get_content_result(
+    checksums: dict,
+    scan: Optional[Callable[[str], Any]] = None,
+    backend: Optional["Backend"] = None,
+    cache: Optional[MutableMapping] = None,
+    raw: bool = False,
+) -> Any:
+    """
+    Fetches and scans a content, see get_contents_from_nodes.
+
+    Args:
+        checksums (dict): the checksums of the content
+        scan (Callable): optional function analysing the text of the content
+        backend (Backend): optional source of the content
+        cache (MutableMapping): optional cache of the contents
+        raw (bool): whether to fetch the raw data of the content
+
+    Returns:
+        the text or data of the content, or the result of its scan
+    """
+    if not raw:
+        content = get_content_from_hashes(checksums, backend=backend, cache=cache)
+        return scan(content) if scan is not None else content
+    if scan is None:
+        return get_content_data_from_hashes(checksums, backend=backend, cache=cache)
+    data = get_content_data_from_hashes(
+        checksums, backend=backend, cache=cache, skip_binary=True
+    )
+    return scan(decode_content(data)) if data is not None else None
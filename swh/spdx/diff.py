@@ -0,0 +1,132 @@
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from swh.spdx.node import Node
+from swh.spdx.traverse import traverse_root
+
+if TYPE_CHECKING:
+    from swh.spdx.backend import Backend
+
+
+def get_child_node(child_name: str, child_properties: list) -> Node:
+    """
+    Builds a child node from the properties returned by get_child.
+
+    Args:
+        child_name (str): The name of the child node.
+        child_properties (list): list of swhid, checksums and directory path of the child
+
+    Returns:
+        Node: the child node, with its checksums and path set
+    """
+    child = Node(name=child_name, swhid=child_properties[0])
+    child.set_checksums(child_properties)
+    child.set_path(child_properties)
+    return child
+
+
+def collect_subtree(
+    node: Node,
+    nodes: List[Node],
+    cache: Optional[dict] = None,
+    backend: Optional["Backend"] = None,
+):
+    """
+    Appends a node and, if it is a directory, all the nodes of its subtree.
+
+    Args:
+        node (Node): root node of the subtree
+        nodes (List[Node]): list the nodes are appended to
+        cache (dict): optional mapping of directory SWHIDs to their entries
+        backend (Backend): optional source of the directory entries
+
+    Returns:
+        None
+    """
+    nodes.append(node)
+    if node.is_directory:
+        node_collection = traverse_root(
+            node, node_collection={}, cache=cache, backend=backend
+        )
+        for children in node_collection.values():
+            nodes.extend(children)
+
+
+def diff_directories(
+    old_node: Node,
+    new_node: Node,
+    diff: Dict[str, list],
+    cache: Optional[dict] = None,
+    backend: Optional["Backend"] = None,
+):
+    """
+    Walks two directory nodes together and records the differences of their
+    subtrees, skipping the subtrees having the same SWHID on both sides.
+
+    Args:
+        old_node (Node): directory node of the old tree
+        new_node (Node): directory node of the new tree
+        diff (dict): the added, removed and modified nodes found so far
+        cache (dict): optional mapping of directory SWHIDs to their entries
+        backend (Backend): optional source of the directory entries
+
+    Returns:
+        None
+    """
+    old_children = old_node.get_children(cache=cache, backend=backend)
+    new_children = new_node.get_children(cache=cache, backend=backend)
+    for child_name, child_properties in old_children.items():
+        if child_name not in new_children:
+            old_child = get_child_node(child_name, child_properties)
+            collect_subtree(old_child, diff["removed"], cache=cache, backend=backend)
+    for child_name, child_properties in new_children.items():
+        new_child = get_child_node(child_name, child_properties)
+        if child_name not in old_children:
+            collect_subtree(new_child, diff["added"], cache=cache, backend=backend)
+            continue
+        old_child = get_child_node(child_name, old_children[child_name])
+        if old_child.swhid == new_child.swhid:
+            # Identical subtrees, nothing to walk
+            continue
+        if old_child.is_directory != new_child.is_directory:
+            # A file replaced by a directory or the other way around
+            collect_subtree(old_child, diff["removed"], cache=cache, backend=backend)
+            collect_subtree(new_child, diff["added"], cache=cache, backend=backend)
+            continue
+        diff["modified"].append((old_child, new_child))
+        if new_child.is_directory:
+            diff_directories(old_child, new_child, diff, cache=cache, backend=backend)
+
+
+def diff_roots(
+    old_root: Node,
+    new_root: Node,
+    cache: Optional[dict] = None,
+    backend: Optional["Backend"] = None,
+) -> Dict[str, list]:
+    """
+    Computes the differences between two root directories, to patch the SPDX
+    output of the old root instead of regenerating it.
+
+    Only the directories whose SWHID differ between both sides are fetched,
+    so the cost depends on the size of the changes rather than of the tree.
+
+    Args:
+        old_root (Node): root directory node of the previous version
+        new_root (Node): root directory node of the new version
+        cache (dict): optional mapping of directory SWHIDs to their entries
+        backend (Backend): optional source of the directory entries
+
+    Returns:
+        Dict[str, list]: the "added" and "removed" nodes, including the whole
+        subtrees of added or removed directories, and the "modified" pairs of
+        old and new nodes found at the same path with different SWHIDs
+    """
+    if not (old_root.is_directory and new_root.is_directory):
+        raise ValueError("Both roots must be directory nodes")
+    # Set the path of both root directory nodes, as traverse_root does
+    old_root.path = old_root.path or old_root.name
+    new_root.path = new_root.path or new_root.name
+    diff: Dict[str, list] = {"added": [], "removed": [], "modified": []}
+    if old_root.swhid != new_root.swhid:
+        diff_directories(old_root, new_root, diff, cache=cache, backend=backend)
+    return diff
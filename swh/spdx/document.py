@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+import hashlib
+from typing import Iterable, List, Optional
+
+from swh.spdx.node import Node
+
+# Names of the SPDX checksum algorithms of the hashes of content nodes
+SPDX_CHECKSUM_ALGORITHMS = {
+    "sha1": "SHA1",
+    "sha256": "SHA256",
+}
+
+
+def get_verification_code(sha1s: Iterable[str]) -> str:
+    """
+    Computes the SPDX package verification code of a set of files.
+
+    Args:
+        sha1s (Iterable[str]): hexadecimal SHA1 checksums of the files
+
+    Returns:
+        str: the SHA1 of the concatenation of the sorted file checksums
+    """
+    return hashlib.sha1("".join(sorted(sha1s)).encode()).hexdigest()
+
+
+def get_content_nodes(node_collection: dict) -> List[Node]:
+    """
+    Lists the content nodes of a traversal result, in traversal order.
+
+    Args:
+        node_collection (dict): the result of traverse_root
+
+    Returns:
+        List[Node]: the content nodes found
+    """
+    return [
+        child
+        for children in node_collection.values()
+        for child in children
+        if not child.is_directory
+    ]
+
+
+def get_spdx_file(node: Node, root: Node, index: int) -> dict:
+    """
+    Builds the SPDX file element of a content node.
+
+    Args:
+        node (Node): the content node
+        root (Node): the root directory node the path of the file is relative to
+        index (int): the index of the file in the document, used for its SPDX id
+
+    Returns:
+        dict: the SPDX file element
+    """
+    relative_path = node.path[len(root.path) :].lstrip("/")
+    return {
+        "SPDXID": f"SPDXRef-File-{index}",
+        "fileName": f"./{relative_path}",
+        "checksums": [
+            {"algorithm": algorithm, "checksumValue": node.checksums[checksum]}
+            for checksum, algorithm in SPDX_CHECKSUM_ALGORITHMS.items()
+            if checksum in node.checksums
+        ],
+        "licenseConcluded": "NOASSERTION",
+        "copyrightText": "NOASSERTION",
+    }
+
+
+def get_spdx_document(
+    node_collection: dict, root: Optional[Node] = None, created: Optional[str] = None
+) -> dict:
+    """
+    Builds a SPDX 2.3 document describing the package of a traversed root directory.
+
+    Args:
+        node_collection (dict): the result of traverse_root
+        root (Node): the root directory node, defaults to the first directory
+            of the node collection
+        created (str): the creation date of the document, defaults to now
+
+    Returns:
+        dict: the SPDX document, ready to be serialized to JSON
+    """
+    if root is None:
+        root = next(iter(node_collection))
+    return build_spdx_document(root, get_content_nodes(node_collection), created)
+
+
+def build_spdx_document(
+    root: Node,
+    content_nodes: List[Node],
+    created: Optional[str] = None,
+    verification_code: Optional[str] = None,
+    licenses: Iterable[str] = (),
+) -> dict:
+    """
+    Builds a SPDX 2.3 document describing the package of a directory from its
+    content nodes, e.g. of a subtree of a traversal.
+
+    Args:
+        root (Node): the directory node of the package
+        content_nodes (List[Node]): the content nodes of the package
+        created (str): the creation date of the document, defaults to now
+        verification_code (str): the package verification code, computed from
+            the SHA1 checksums of the content nodes if not given
+        licenses (Iterable[str]): the licenses found in the files of the package
+
+    Returns:
+        dict: the SPDX document, ready to be serialized to JSON
+    """
+    if created is None:
+        created = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    if verification_code is None:
+        # Like in the aggregates, files without a SHA1 checksum are left out
+        verification_code = get_verification_code(
+            node.checksums["sha1"] for node in content_nodes if "sha1" in node.checksums
+        )
+    files = [
+        get_spdx_file(node, root, index)
+        for index, node in enumerate(content_nodes, start=1)
+    ]
+    package = {
+        "SPDXID": "SPDXRef-Package",
+        "name": root.name,
+        "downloadLocation": "NOASSERTION",
+        "filesAnalyzed": True,
+        "packageVerificationCode": {"packageVerificationCodeValue": verification_code},
+        "licenseConcluded": "NOASSERTION",
+        "licenseDeclared": "NOASSERTION",
+        "copyrightText": "NOASSERTION",
+        "externalRefs": [
+            {
+                "referenceCategory": "PERSISTENT-ID",
+                "referenceType": "swh",
+                "referenceLocator": str(root.swhid),
+            }
+        ],
+    }
+    if licenses:
+        package["licenseInfoFromFiles"] = sorted(licenses)
+    relationships = [
+        {
+            "spdxElementId": "SPDXRef-DOCUMENT",
+            "relationshipType": "DESCRIBES",
+            "relatedSpdxElement": package["SPDXID"],
+        }
+    ] + [
+        {
+            "spdxElementId": package["SPDXID"],
+            "relationshipType": "CONTAINS",
+            "relatedSpdxElement": spdx_file["SPDXID"],
+        }
+        for spdx_file in files
+    ]
+    return {
+        "spdxVersion": "SPDX-2.3",
+        "dataLicense": "CC0-1.0",
+        "SPDXID": "SPDXRef-DOCUMENT",
+        "name": root.name,
+        "documentNamespace": f"https://archive.softwareheritage.org/spdx/{root.swhid}",
+        "creationInfo": {"created": created, "creators": ["Tool: swh-spdx"]},
+        "packages": [package],
+        "files": files,
+        "relationships": relationships,
+    }
@@ -0,0 +1,224 @@
+from array import array
+import sys
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+
+# Size in bytes of the checksums of content entries
+CHECKSUM_SIZES = {
+    "sha1": 20,
+    "sha256": 32,
+    "sha1_git": 20,
+    "blake2s256": 32,
+}
+
+CONTENT_SWHID_PREFIX = "swh:1:cnt:"
+DIRECTORY_SWHID_PREFIX = "swh:1:dir:"
+
+
+class DirectoryEntries:
+    """Entries of a directory, decoded a whole page at a time into compact arrays.
+
+    Names, interned, and SWHIDs are kept as strings, and each checksum as a
+    fixed-width binary array holding the checksums of all the entries. CoreSWHID
+    objects and checksum dictionaries are only built when an entry is accessed.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize a new, empty, instance of the DirectoryEntries class.
+        """
+        self.names: List[str] = []
+        self.swhids: List[str] = []
+        # 1 for directory entries, 0 for the others
+        self.directory_flags = bytearray()
+        self.checksums: Dict[str, bytearray] = {
+            checksum: bytearray() for checksum in CHECKSUM_SIZES
+        }
+        # 1 for entries having the checksum, 0 for the others
+        self.checksum_flags: Dict[str, bytearray] = {
+            checksum: bytearray() for checksum in CHECKSUM_SIZES
+        }
+        # Length in bytes of the content entries, -1 if unknown
+        self.lengths = array("q")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Estimates the memory size of the entries, e.g. for cache accounting.
+
+        Returns:
+            int: the size of the entries, in bytes
+        """
+        return (
+            sum(len(name) for name in self.names)
+            + sum(len(swhid) for swhid in self.swhids)
+            + len(self.directory_flags)
+            + sum(len(checksums) for checksums in self.checksums.values())
+            + sum(len(flags) for flags in self.checksum_flags.values())
+            + len(self.lengths) * self.lengths.itemsize
+        )
+
+    def add_entries(
+        self, names: List[str], swhids: List[str], targets: List[Optional[dict]]
+    ):
+        """
+        Appends a page of entries.
+
+        Args:
+            names (List[str]): names of the entries
+            swhids (List[str]): SWHIDs of the entries targets
+            targets (List[dict]): the targets nodes of the entries, as returned by
+                the GraphQL server, with either the "hashes" and optionally the
+                "length" of a content, or the "id" of a directory
+
+        Returns:
+            None
+        """
+        # Names like README or src are shared by many directories
+        self.names.extend(map(sys.intern, names))
+        self.swhids.extend(swhids)
+        self.directory_flags.extend(
+            swhid.startswith(DIRECTORY_SWHID_PREFIX) for swhid in swhids
+        )
+        hashes = [(target or {}).get("hashes") or {} for target in targets]
+        # Directories only have their identifier, stored as their sha1 checksum
+        # as done by Node.set_checksums
+        for index, target in enumerate(targets):
+            if target and "id" in target:
+                hashes[index] = {"sha1": target["id"]}
+        for checksum, size in CHECKSUM_SIZES.items():
+            values = [entry_hashes.get(checksum) for entry_hashes in hashes]
+            missing = "00" * size
+            # A single hex decoding for the whole page
+            self.checksums[checksum].extend(
+                bytes.fromhex("".join(value or missing for value in values))
+            )
+            self.checksum_flags[checksum].extend(value is not None for value in values)
+        lengths = [(target or {}).get("length") for target in targets]
+        self.lengths.extend(-1 if length is None else length for length in lengths)
+
+    def add_page(self, edges: List[dict]):
+        """
+        Appends the entries of a page of the directory entries connection.
+
+        Args:
+            edges (List[dict]): the edges of the page, as returned by the
+                GraphQL server
+
+        Returns:
+            None
+        """
+        nodes = [edge["node"] for edge in edges]
+        self.add_entries(
+            [node["name"]["text"] for node in nodes],
+            [node["target"]["swhid"] for node in nodes],
+            [node["target"]["node"] for node in nodes],
+        )
+
+    def is_directory(self, index: int) -> bool:
+        """
+        Checks if an entry is a directory.
+
+        Args:
+            index (int): the index of the entry
+
+        Returns:
+            bool: True if the entry is a directory
+        """
+        return self.directory_flags[index] == 1
+
+    def is_content(self, index: int) -> bool:
+        """
+        Checks if an entry is a content, and not e.g. the revision of a submodule.
+
+        Args:
+            index (int): the index of the entry
+
+        Returns:
+            bool: True if the entry is a content
+        """
+        return self.swhids[index].startswith(CONTENT_SWHID_PREFIX)
+
+    def get_swhid(self, index: int) -> "CoreSWHID":
+        """
+        Builds the CoreSWHID of an entry.
+
+        Args:
+            index (int): the index of the entry
+
+        Returns:
+            CoreSWHID: the SWHID of the entry target
+        """
+        from swh.model.swhids import CoreSWHID
+
+        return CoreSWHID.from_string(self.swhids[index])
+
+    def get_checksum(self, index: int, checksum: str) -> Optional[bytes]:
+        """
+        Returns a checksum of an entry, as bytes.
+
+        Args:
+            index (int): the index of the entry
+            checksum (str): the name of the checksum
+
+        Returns:
+            bytes: the checksum, or None if the entry does not have it
+        """
+        if not self.checksum_flags[checksum][index]:
+            return None
+        size = CHECKSUM_SIZES[checksum]
+        return bytes(self.checksums[checksum][index * size : (index + 1) * size])
+
+    def get_checksums(self, index: int) -> Dict[str, str]:
+        """
+        Builds the dictionary of the hexadecimal checksums of an entry, as set by
+        Node.set_checksums.
+
+        Args:
+            index (int): the index of the entry
+
+        Returns:
+            Dict[str, str]: the checksums of the entry
+        """
+        checksums = {}
+        for checksum, size in CHECKSUM_SIZES.items():
+            if self.checksum_flags[checksum][index]:
+                start = index * size
+                checksums[checksum] = self.checksums[checksum][
+                    start : start + size
+                ].hex()
+        return checksums
+
+    def get_length(self, index: int) -> Optional[int]:
+        """
+        Returns the length of a content entry.
+
+        Args:
+            index (int): the index of the entry
+
+        Returns:
+            int: the length of the content in bytes, None if unknown or if the
+            entry is not a content
+        """
+        length = self.lengths[index]
+        return None if length < 0 else length
+
+    def __iter__(self) -> Iterator[list]:
+        """
+        Iterates over the entries as lists of child name, child swhid and child
+        checksums, in the shape returned by the GraphQL server.
+        """
+        for index, name in enumerate(self.names):
+            checksums: dict
+            if self.is_directory(index):
+                checksums = {"id": self.get_checksums(index).get("sha1")}
+            else:
+                checksums = {"hashes": self.get_checksums(index)}
+                if self.lengths[index] >= 0:
+                    checksums["length"] = self.lengths[index]
+            yield [name, self.get_swhid(index), checksums]
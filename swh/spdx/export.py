@@ -0,0 +1,188 @@
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from swh.spdx.node import Node
+from swh.spdx.traverse import iter_traverse_root
+
+if TYPE_CHECKING:
+    from swh.spdx.backend import Backend
+
+# Checksums exported as binary columns, with their size in bytes
+CHECKSUM_COLUMNS = {
+    "sha1": 20,
+    "sha256": 32,
+    "sha1_git": 20,
+    "blake2s256": 32,
+}
+
+EXPORT_FORMATS = ("parquet", "arrow")
+
+
+def get_schema():
+    """
+    Builds the Arrow schema of the exported node tables.
+
+    Args:
+        None
+
+    Returns:
+        pyarrow.Schema: one row per node, with its checksums as binary columns
+        and the row index of its parent directory
+    """
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("path", pa.string()),
+            ("name", pa.string()),
+            ("swhid", pa.string()),
+            ("type", pa.string()),
+        ]
+        + [(checksum, pa.binary(size)) for checksum, size in CHECKSUM_COLUMNS.items()]
+        + [("parent", pa.int64())]
+    )
+
+
+class NodeTableWriter:
+    """Writes traversed nodes to a Parquet or Arrow IPC file, by record batches."""
+
+    def __init__(self, path: str, format: str = "parquet", batch_size: int = 65536):
+        """
+        Initialize a new instance of the NodeTableWriter class.
+
+        Args:
+            path (str): The path of the file to write.
+            format (str): The format of the file, either "parquet" or "arrow".
+            batch_size (int): The number of rows buffered before a record batch
+                is written.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required to export nodes, install swh.spdx[arrow]"
+            ) from None
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {format}")
+        self.schema = get_schema()
+        self.batch_size = batch_size
+        if format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+        self._columns: Dict[str, list] = {name: [] for name in self.schema.names}
+        # Row indexes of the directories whose children are not written yet
+        self._directory_rows: Dict[Node, int] = {}
+        self.row_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_node(self, node: Node, parent: Optional[int]):
+        """
+        Buffers the row of a node, and writes a record batch if the buffer is full.
+
+        Args:
+            node (Node): the node to write
+            parent (int): the row index of the parent directory, None for the root
+
+        Returns:
+            None
+        """
+        if node.is_directory:
+            self._directory_rows[node] = self.row_count
+        columns = self._columns
+        columns["path"].append(node.path)
+        columns["name"].append(node.name)
+        columns["swhid"].append(str(node.swhid))
+        columns["type"].append(node.swhid.object_type.value)
+        # Directories keep their identifier as sha1 checksum, see
+        # Node.set_checksums, which is not a checksum of their own
+        checksums = node.checksums if node.is_content else {}
+        for checksum in CHECKSUM_COLUMNS:
+            value = checksums.get(checksum)
+            columns[checksum].append(bytes.fromhex(value) if value else None)
+        columns["parent"].append(parent)
+        self.row_count += 1
+        if len(columns["path"]) >= self.batch_size:
+            self.flush()
+
+    def write_directory(self, directory: Node, children: List[Node]):
+        """
+        Writes a directory and its children, as yielded by iter_traverse_root.
+
+        Args:
+            directory (Node): the directory node
+            children (List[Node]): the child nodes of the directory
+
+        Returns:
+            None
+        """
+        if directory not in self._directory_rows:
+            # Root directory
+            self.add_node(directory, None)
+        parent = self._directory_rows.pop(directory)
+        for child in children:
+            self.add_node(child, parent)
+
+    def flush(self):
+        """
+        Writes the buffered rows as a record batch.
+
+        Returns:
+            None
+        """
+        import pyarrow as pa
+
+        if not self._columns["path"]:
+            return
+        batch = pa.record_batch(
+            [self._columns[name] for name in self.schema.names], schema=self.schema
+        )
+        self._writer.write_batch(batch)
+        for column in self._columns.values():
+            column.clear()
+
+    def close(self):
+        """
+        Writes the remaining buffered rows and closes the file.
+
+        Returns:
+            None
+        """
+        self.flush()
+        self._writer.close()
+
+
+def export_traversal(
+    node: Node,
+    path: str,
+    format: str = "parquet",
+    batch_size: int = 65536,
+    cache: Optional[dict] = None,
+    backend: Optional["Backend"] = None,
+) -> int:
+    """
+    Traverses a root directory and writes its nodes to a columnar file, by
+    record batches written while the traversal is still running.
+
+    Args:
+        node (Node): the root directory node
+        path (str): the path of the file to write
+        format (str): the format of the file, either "parquet" or "arrow"
+        batch_size (int): the number of rows per record batch
+        cache (dict): optional mapping of directory SWHIDs to their entries
+        backend (Backend): optional source of the directory entries
+
+    Returns:
+        int: the number of rows written
+    """
+    with NodeTableWriter(path, format=format, batch_size=batch_size) as writer:
+        for directory, children in iter_traverse_root(
+            node, first_iteration=True, cache=cache, bulk=True, backend=backend
+        ):
+            writer.write_directory(directory, children)
+    return writer.row_count
@@ -0,0 +1,69 @@
+import threading
+from typing import Optional
+
+try:
+    from gql.transport.httpx import HTTPXTransport
+    import httpx
+except ImportError:
+    raise ImportError(
+        "httpx is required for HTTP/2 connections, install swh.spdx[http2]"
+    ) from None
+
+# Maximum number of HTTP/2 connections to the archive, each of them carrying
+# many concurrent streams
+MAX_CONNECTIONS = 4
+
+# HTTP client shared by all the queries and downloads of the current process
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Returns the HTTP/2 client shared by the threads of the current process, so
+    that concurrent requests are multiplexed over a few connections.
+
+    Args:
+        None
+
+    Returns:
+        httpx.Client: the shared client
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS),
+                timeout=httpx.Timeout(60.0),
+                follow_redirects=True,
+            )
+        return _http_client
+
+
+def close_http_client():
+    """
+    Closes the shared HTTP/2 client, e.g. before forking worker processes.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+class SharedHTTPXTransport(HTTPXTransport):
+    """GraphQL transport sending the queries with the shared HTTP/2 client,
+    which stays open when gql closes the transport after each query."""
+
+    def connect(self):
+        self.client = get_http_client()
+
+    def close(self):
+        self.client = None
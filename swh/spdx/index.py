@@ -0,0 +1,411 @@
+import mmap
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from swh.spdx.entries import CHECKSUM_SIZES
+from swh.spdx.node import Node
+from swh.spdx.serialize import OBJECT_TYPES, decode_checksums, encode_checksums
+
+MAGIC = b"SWHSPDXI"
+VERSION = 1
+
+# Parent of the root node
+NO_PARENT = 0xFFFFFFFF
+
+# magic, version, number of nodes, number of hash entries, length of the name
+# of the root node, then the offsets of the node, path, children and hash tables
+HEADER = struct.Struct("<8sBxxxIII4Q")
+# offset and length of the path, parent node, first child in the children table,
+# number of children, object type, flags of the checksums set, object id, then
+# the checksums
+NODE = struct.Struct(
+    "<QIIIIBB20s" + "".join(f"{size}s" for size in CHECKSUM_SIZES.values())
+)
+CHILD = struct.Struct("<I")
+# object id, node
+HASH_ENTRY = struct.Struct("<20sI")
+
+
+def encode_path(path: str) -> bytes:
+    """
+    Encodes a path, the way it is sorted in the index.
+
+    Args:
+        path (str): the path
+
+    Returns:
+        bytes: the path, encoded in UTF-8
+    """
+    return path.encode("utf-8", "surrogateescape")
+
+
+def write_tree_index(node_collection: dict, file: BinaryIO) -> int:
+    """
+    Writes the index of the nodes of a traversal, to look them up by path or by
+    object id once memory-mapped with TreeIndex.
+
+    The nodes are sorted by path, so that a path is found with a binary search
+    and the paths having a prefix are contiguous. The child nodes of each
+    directory are listed in a separate table, and the object ids of all the
+    nodes are sorted in a reverse lookup table.
+
+    Args:
+        node_collection (dict): the collection of nodes, as returned by
+            traverse_root, whose first key is the root directory
+        file (BinaryIO): the file to write
+
+    Returns:
+        int: the number of nodes indexed
+    """
+    # Nodes in depth-first order, with the position of their parent
+    nodes: List[Node] = []
+    parents: List[int] = []
+    positions: Dict[Node, int] = {}
+    for directory, children in node_collection.items():
+        if directory not in positions:
+            # Root directory
+            positions[directory] = len(nodes)
+            nodes.append(directory)
+            parents.append(NO_PARENT)
+        parent = positions[directory]
+        for child in children:
+            positions[child] = len(nodes)
+            nodes.append(child)
+            parents.append(parent)
+
+    paths = [node.path_bytes for node in nodes]
+    order = sorted(range(len(nodes)), key=paths.__getitem__)
+    ranks = [0] * len(nodes)
+    for rank, position in enumerate(order):
+        ranks[position] = rank
+
+    root_name = encode_path(nodes[0].name) if nodes else b""
+    path_table = []
+    children_table: List[int] = []
+    node_table = []
+    path_offset = 0
+    for position in order:
+        node = nodes[position]
+        children = node_collection.get(node, []) if node.is_directory else []
+        flags, values = encode_checksums(node.checksums)
+        parent = parents[position]
+        node_table.append(
+            NODE.pack(
+                path_offset,
+                len(paths[position]),
+                NO_PARENT if parent == NO_PARENT else ranks[parent],
+                len(children_table),
+                len(children),
+                OBJECT_TYPES.index(node.swhid.object_type.value),
+                flags,
+                node.swhid.object_id,
+                *values,
+            )
+        )
+        # The children of a directory are sorted like their paths
+        children_table.extend(sorted(ranks[positions[child]] for child in children))
+        path_table.append(paths[position])
+        path_offset += len(paths[position])
+
+    hash_table = sorted(
+        (node.swhid.object_id, ranks[position]) for position, node in enumerate(nodes)
+    )
+
+    nodes_offset = HEADER.size + len(root_name)
+    paths_offset = nodes_offset + len(node_table) * NODE.size
+    children_offset = paths_offset + path_offset
+    hashes_offset = children_offset + len(children_table) * CHILD.size
+    file.write(
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            len(nodes),
+            len(hash_table),
+            len(root_name),
+            nodes_offset,
+            paths_offset,
+            children_offset,
+            hashes_offset,
+        )
+    )
+    file.write(root_name)
+    file.write(b"".join(node_table))
+    file.write(b"".join(path_table))
+    file.write(struct.pack(f"<{len(children_table)}I", *children_table))
+    file.write(b"".join(HASH_ENTRY.pack(*entry) for entry in hash_table))
+    return len(nodes)
+
+
+class TreeIndex:
+    """Lookups in a tree index written by write_tree_index, e.g. memory-mapped.
+
+    Paths are found with a binary search in the sorted node table, so that only
+    the visited records are read and only the requested nodes are built.
+    """
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        """
+        Initialize a new instance of the TreeIndex class.
+
+        Args:
+            buffer: The content of the index file.
+        """
+        self.buffer = buffer
+        (
+            magic,
+            version,
+            self.node_count,
+            self.hash_count,
+            root_name_length,
+            self.nodes_offset,
+            self.paths_offset,
+            self.children_offset,
+            self.hashes_offset,
+        ) = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a tree index file")
+        self.root_name = bytes(
+            buffer[HEADER.size : HEADER.size + root_name_length]
+        ).decode("utf-8", "surrogateescape")
+
+    @classmethod
+    def open(cls, path: str) -> "TreeIndex":
+        """
+        Memory-maps a tree index file.
+
+        Args:
+            path (str): the path of the file
+
+        Returns:
+            TreeIndex: the index of the file
+        """
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.node_count
+
+    def __contains__(self, path: str) -> bool:
+        return self.find(path) is not None
+
+    def close(self):
+        """
+        Unmaps the file, if memory-mapped.
+
+        Returns:
+            None
+        """
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def get_record(self, rank: int) -> tuple:
+        """
+        Returns an unpacked node record.
+
+        Args:
+            rank (int): the position of the node in the sorted node table
+
+        Returns:
+            tuple: the record, unpacked with NODE
+        """
+        return NODE.unpack_from(self.buffer, self.nodes_offset + rank * NODE.size)
+
+    def get_path_bytes(self, rank: int) -> bytes:
+        """
+        Returns the encoded path of a node.
+
+        Args:
+            rank (int): the position of the node in the sorted node table
+
+        Returns:
+            bytes: the path of the node, encoded in UTF-8
+        """
+        offset, length = struct.unpack_from(
+            "<QI", self.buffer, self.nodes_offset + rank * NODE.size
+        )
+        start = self.paths_offset + offset
+        return bytes(self.buffer[start : start + length])
+
+    def bisect(self, path: bytes) -> int:
+        """
+        Finds the position of the first node whose path is not lower than a path.
+
+        Args:
+            path (bytes): the encoded path
+
+        Returns:
+            int: the position in the sorted node table
+        """
+        low, high = 0, self.node_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_path_bytes(middle) < path:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, path: str) -> Optional[int]:
+        """
+        Finds a node by path.
+
+        Args:
+            path (str): the path of the node
+
+        Returns:
+            int: the position of the node in the sorted node table, None if
+            there is no node with this path
+        """
+        encoded_path = encode_path(path)
+        rank = self.bisect(encoded_path)
+        if rank < self.node_count and self.get_path_bytes(rank) == encoded_path:
+            return rank
+        return None
+
+    def get_node(self, rank: int) -> Node:
+        """
+        Builds a node.
+
+        Args:
+            rank (int): the position of the node in the sorted node table
+
+        Returns:
+            Node: the node, with its path and checksums set
+        """
+        from swh.model.swhids import CoreSWHID, ObjectType
+
+        record = self.get_record(rank)
+        parent = record[2]
+        object_type, flags, object_id = record[5:8]
+        path = self.get_path_bytes(rank).decode("utf-8", "surrogateescape")
+        name = self.root_name if parent == NO_PARENT else path.rsplit("/", 1)[-1]
+        swhid = CoreSWHID(
+            object_type=ObjectType(OBJECT_TYPES[object_type]), object_id=object_id
+        )
+        return Node(
+            name=name,
+            swhid=swhid,
+            path=path,
+            checksums=decode_checksums(flags, record[8:]),
+        )
+
+    def lookup(self, path: str) -> Optional[Node]:
+        """
+        Looks up a node by path.
+
+        Args:
+            path (str): the path of the node
+
+        Returns:
+            Node: the node, None if there is no node with this path
+        """
+        rank = self.find(path)
+        return None if rank is None else self.get_node(rank)
+
+    def get_parent(self, path: str) -> Optional[Node]:
+        """
+        Looks up the parent directory of a node.
+
+        Args:
+            path (str): the path of the node
+
+        Returns:
+            Node: the parent directory, None for the root
+        """
+        rank = self.find(path)
+        if rank is None:
+            raise KeyError(path)
+        parent = self.get_record(rank)[2]
+        return None if parent == NO_PARENT else self.get_node(parent)
+
+    def list_directory(self, path: str) -> List[Node]:
+        """
+        Lists the child nodes of a directory.
+
+        Args:
+            path (str): the path of the directory
+
+        Returns:
+            List[Node]: the child nodes of the directory, sorted by name
+        """
+        rank = self.find(path)
+        if rank is None:
+            raise KeyError(path)
+        _, _, _, first_child, child_count = self.get_record(rank)[:5]
+        children = struct.unpack_from(
+            f"<{child_count}I",
+            self.buffer,
+            self.children_offset + first_child * CHILD.size,
+        )
+        return [self.get_node(child) for child in children]
+
+    def iter_prefix(self, prefix: str) -> Iterator[Node]:
+        """
+        Iterates over the nodes whose path starts with a prefix, e.g. all the
+        nodes of a subtree with the path of its directory followed by "/".
+
+        Args:
+            prefix (str): the prefix of the paths
+
+        Yields:
+            Node: the nodes, sorted by path
+        """
+        encoded_prefix = encode_path(prefix)
+        rank = self.bisect(encoded_prefix)
+        while rank < self.node_count and self.get_path_bytes(rank).startswith(
+            encoded_prefix
+        ):
+            yield self.get_node(rank)
+            rank += 1
+
+    def find_paths(self, object_id: Union[str, bytes]) -> List[str]:
+        """
+        Finds the paths of the nodes having an object id, e.g. all the copies of
+        a content in the tree.
+
+        Args:
+            object_id: the object id of the SWHID of the nodes, i.e. the
+                sha1_git of contents, in hexadecimal or binary
+
+        Returns:
+            List[str]: the paths of the nodes, sorted
+        """
+        if isinstance(object_id, str):
+            object_id = bytes.fromhex(object_id)
+        low, high = 0, self.hash_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_hash_entry(middle)[0] < object_id:
+                low = middle + 1
+            else:
+                high = middle
+        paths = []
+        while low < self.hash_count:
+            entry_id, rank = self.get_hash_entry(low)
+            if entry_id != object_id:
+                break
+            paths.append(self.get_path_bytes(rank).decode("utf-8", "surrogateescape"))
+            low += 1
+        return paths
+
+    def get_hash_entry(self, position: int) -> Tuple[bytes, int]:
+        """
+        Returns an entry of the reverse lookup table.
+
+        Args:
+            position (int): the position of the entry
+
+        Returns:
+            Tuple[bytes, int]: the object id and the position of its node in
+            the sorted node table
+        """
+        return HASH_ENTRY.unpack_from(
+            self.buffer, self.hashes_offset + position * HASH_ENTRY.size
+        )
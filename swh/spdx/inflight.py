@@ -0,0 +1,68 @@
+from concurrent.futures import Future
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from swh.spdx.budget import BudgetExceeded
+
+
+class InFlightRequests:
+    """Registry of the requests being sent, to coalesce identical requests.
+
+    When several threads request the same object at the same time, e.g. a
+    directory shared by two subtrees, only the first one sends the request and
+    the others wait for its result instead of sending a duplicate request.
+
+    The requests are charged to the budget of the job of the thread sending
+    them. When that budget is exceeded, the other threads do not share its
+    failure but send the request themselves, within their own budget.
+    """
+
+    def __init__(self):
+        """
+        Initialize a new instance of the InFlightRequests class.
+        """
+        self._futures: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def run(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """
+        Calls fetch, unless a call for the same key is in flight, in which case
+        its result is awaited.
+
+        Args:
+            key: the key identifying the request, e.g. a SWHID or a checksum
+            fetch (Callable): the function sending the request
+
+        Returns:
+            the result of fetch, or of the call in flight; its exception is
+            raised to all the callers if it fails, unless it is BudgetExceeded
+        """
+        while True:
+            with self._lock:
+                future = self._futures.get(key)
+                leader = future is None
+                if leader:
+                    future = self._futures[key] = Future()
+            assert future is not None
+            if leader:
+                break
+            try:
+                return future.result()
+            except BudgetExceeded:
+                # The budget of another job is exceeded, not the one of this
+                # thread, so the request is sent again
+                continue
+        try:
+            result = fetch()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[key]
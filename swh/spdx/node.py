@@ -1,12 +1,34 @@
-from swh.model.swhids import CoreSWHID, ObjectType
-from swh.spdx.children import get_child
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+
+from swh.spdx.children import get_cached_directory_entries, get_child
+from swh.spdx.entries import DirectoryEntries
+from swh.spdx.profile import stage
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+    from swh.spdx.backend import Backend
+
+# Value of swh.model.swhids.ObjectType.DIRECTORY, which is not imported so that
+# nodes can be used without loading swh.model
+DIRECTORY_OBJECT_TYPE = "dir"
+CONTENT_OBJECT_TYPE = "cnt"
 
 
 class Node:
     """Represents a content file or subdirectory node in the directory structure."""
 
+    _swhid: Optional["CoreSWHID"]
+    _checksums: Optional[dict]
+    # Entries the SWHID and checksums of nodes built by from_entries are decoded from
+    _entries: Optional[DirectoryEntries] = None
+    _index: int = 0
+    _length: Optional[int] = None
+    _path: Optional[str] = None
+    # Directory node the path of nodes without a path of their own is joined from
+    parent: Optional["Node"] = None
+
     def __init__(
-        self, name: str, swhid: CoreSWHID, path: str = "", checksums: dict = {}
+        self, name: str, swhid: "CoreSWHID", path: str = "", checksums: dict = {}
     ):
         """
         Initialize a new instance of the Node class.
@@ -14,20 +36,132 @@ class Node:
         Args:
             name (str): The name of the node.
             swhid (CoreSWHID): The Software Heritage CORE identifier of the node.
-            path (str): The directory path of node object.
+            path (str): The directory path of node object, joined from the path
+                of its parent if empty and its parent is set.
             checksums (str): The dictionary containing checksums of node object.
         """
 
         self.name = name
         self.swhid = swhid
         self.path = path
-        self.is_directory = self.swhid.object_type == ObjectType.DIRECTORY
+        self.is_directory = swhid.object_type.value == DIRECTORY_OBJECT_TYPE
         self.checksums = checksums
 
-    def get_children(self):
+    @classmethod
+    def from_entries(
+        cls, entries: DirectoryEntries, parent: Union["Node", str]
+    ) -> List["Node"]:
+        """
+        Builds the nodes of all the entries of a directory at once.
+
+        The SWHID and the checksums of each node are only decoded from the
+        entries when they are first accessed. Given the directory node, the
+        paths of the nodes are only joined when they are accessed.
+
+        Args:
+            entries (DirectoryEntries): The entries of the directory.
+            parent (Union[Node, str]): The directory node, or its path.
+
+        Returns:
+            List[Node]: the child nodes of the directory
+        """
+        nodes = []
+        for index, name in enumerate(entries.names):
+            node = cls.__new__(cls)
+            node.name = name
+            if isinstance(parent, str):
+                node._path = f"{parent}/{name}"
+            else:
+                node.parent = parent
+            node.is_directory = entries.directory_flags[index] == 1
+            node._swhid = None
+            node._checksums = None
+            node._entries = entries
+            node._index = index
+            nodes.append(node)
+        return nodes
+
+    @property
+    def swhid(self) -> "CoreSWHID":
+        if self._swhid is None:
+            assert self._entries is not None
+            self._swhid = self._entries.get_swhid(self._index)
+        return self._swhid
+
+    @swhid.setter
+    def swhid(self, swhid: "CoreSWHID"):
+        self._swhid = swhid
+
+    @property
+    def is_content(self) -> bool:
+        """Whether the node is a file, and not a directory or e.g. the revision
+        of a submodule."""
+        if self._swhid is None and self._entries is not None:
+            return self._entries.is_content(self._index)
+        return self.swhid.object_type.value == CONTENT_OBJECT_TYPE
+
+    @property
+    def path(self) -> str:
+        """The path of the node, from the name of the root directory."""
+        if self._path is not None:
+            return self._path
+        # Names of the node and of its ancestors up to the first one having a path
+        names = []
+        node = self
+        while node._path is None and node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        names.append(node._path or "")
+        return "/".join(reversed(names))
+
+    @path.setter
+    def path(self, path: str):
+        self._path = path or None
+
+    @property
+    def path_bytes(self) -> bytes:
+        """The path of the node, encoded in UTF-8."""
+        return self.path.encode("utf-8", "surrogateescape")
+
+    @property
+    def checksums(self) -> dict:
+        if self._checksums is None:
+            assert self._entries is not None
+            self._checksums = self._entries.get_checksums(self._index)
+        return self._checksums
+
+    @checksums.setter
+    def checksums(self, checksums: dict):
+        self._checksums = checksums
+
+    @property
+    def length(self) -> Optional[int]:
+        """The length of a content in bytes, None if it was not retrieved."""
+        if self._length is None and self._entries is not None:
+            return self._entries.get_length(self._index)
+        return self._length
+
+    @length.setter
+    def length(self, length: Optional[int]):
+        self._length = length
+
+    def get_children(
+        self,
+        cache: Optional[dict] = None,
+        backend: Optional["Backend"] = None,
+        fields: Optional[Iterable[str]] = None,
+    ):
         """
         Retrieve the children nodes of the current directory node.
 
+        Args:
+            cache (dict): Optional mapping of directory SWHIDs to their entries,
+                shared between calls so that a directory is only fetched once.
+            backend (Backend): Optional source of the directory entries, the
+                GraphQL API of the archive is queried if not given.
+            fields (Iterable[str]): The fields of the content entries to
+                retrieve, see get_query_children.
+
         Returns:
             dict: A dictionary of child nodes,
             where the keys are child names and the values is a list of swhid,
@@ -35,10 +169,42 @@ class Node:
 
         """
         if self.is_directory:
-            return get_child(self.swhid, self.path)
+            return get_child(
+                self.swhid, self.path, cache=cache, backend=backend, fields=fields
+            )
         else:
             raise ValueError(f"{str(self.swhid)} is not a valid directory CoreSWHID")
 
+    def get_child_nodes(
+        self,
+        cache: Optional[dict] = None,
+        backend: Optional["Backend"] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> List["Node"]:
+        """
+        Retrieve the children nodes of the current directory node, built in bulk
+        from the entries of the directory.
+
+        Args:
+            cache (dict): Optional mapping of directory SWHIDs to their entries,
+                shared between calls so that a directory is only fetched once.
+            backend (Backend): Optional source of the directory entries, the
+                GraphQL API of the archive is queried if not given.
+            fields (Iterable[str]): The fields of the content entries to
+                retrieve, see get_query_children.
+
+        Returns:
+            List[Node]: the child nodes, with their checksums and path set
+
+        """
+        if not self.is_directory:
+            raise ValueError(f"{str(self.swhid)} is not a valid directory CoreSWHID")
+        entries = get_cached_directory_entries(
+            self.swhid, cache=cache, backend=backend, fields=fields
+        )
+        with stage("nodes", self.swhid):
+            return Node.from_entries(entries, self)
+
     def set_path(self, node_properties: list):
         """
         Set the directory path of the node.
@@ -65,3 +231,4 @@ class Node:
             self.checksums = {"sha1": node_properties[1]["id"]}
         else:
             self.checksums = node_properties[1]["hashes"]
+            self.length = node_properties[1].get("length")
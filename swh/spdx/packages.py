@@ -0,0 +1,207 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from swh.spdx.aggregate import Aggregator
+from swh.spdx.document import build_spdx_document
+from swh.spdx.node import Node
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+
+
+class SubtreeContents:
+    """Content nodes of the subtrees of a traversal.
+
+    The content nodes are listed once, in depth-first order, so that the
+    contents of each subtree are a contiguous slice of the list.
+    """
+
+    def __init__(self, node_collection: dict, root: Optional[Node] = None):
+        """
+        Initialize a new instance of the SubtreeContents class.
+
+        Args:
+            node_collection (dict): the result of traverse_root
+            root (Node): the root directory node, defaults to the first
+                directory of the node collection
+        """
+        if root is None:
+            root = next(iter(node_collection))
+        self.root = root
+        self.contents: List[Node] = []
+        # Start and end of the slice of the contents of each directory
+        self.ranges: Dict[Node, Tuple[int, int]] = {}
+        stack = [self.add_directory(root, node_collection)]
+        while stack:
+            directory, start, subdirectories = stack[-1]
+            subdirectory = next(subdirectories, None)
+            if subdirectory is None:
+                stack.pop()
+                self.ranges[directory] = (start, len(self.contents))
+            else:
+                stack.append(self.add_directory(subdirectory, node_collection))
+
+    def add_directory(self, directory: Node, node_collection: dict) -> tuple:
+        """
+        Lists the content nodes of a directory, before those of its subdirectories.
+
+        Args:
+            directory (Node): the directory node
+            node_collection (dict): the result of traverse_root
+
+        Returns:
+            tuple: the directory, the start of its slice and an iterator over
+            its subdirectories
+        """
+        children = node_collection.get(directory, [])
+        start = len(self.contents)
+        self.contents.extend(child for child in children if not child.is_directory)
+        return (
+            directory,
+            start,
+            iter([child for child in children if child.is_directory]),
+        )
+
+    def get_contents(self, directory: Node) -> List[Node]:
+        """
+        Returns the content nodes of a subtree.
+
+        Args:
+            directory (Node): the directory node of the subtree
+
+        Returns:
+            List[Node]: the content nodes, in traversal order
+        """
+        start, end = self.ranges[directory]
+        return self.contents[start:end]
+
+
+class PackageDocumentGenerator:
+    """Builds the SPDX documents of a package and of its sub-packages, i.e. of
+    its top-level directories, from a single traversal.
+
+    The verification codes and license sets of the packages are taken from the
+    directory aggregates, which are computed once for the subtrees shared by
+    several documents or by several traversals.
+    """
+
+    def __init__(
+        self,
+        subpackages: bool = True,
+        created: Optional[str] = None,
+        aggregator: Optional[Aggregator] = None,
+    ):
+        """
+        Initialize a new instance of the PackageDocumentGenerator class.
+
+        Args:
+            subpackages (bool): Whether to build a document for each top-level
+                directory of the package.
+            created (str): The creation date of the documents, defaults to now.
+            aggregator (Aggregator): Optional aggregator of the directories,
+                e.g. detecting licenses or shared with other generators.
+        """
+        self.subpackages = subpackages
+        self.created = created
+        self.aggregator = aggregator if aggregator is not None else Aggregator()
+
+    def get_documents(
+        self, node_collection: dict, root: Optional[Node] = None
+    ) -> List[Tuple[Node, dict]]:
+        """
+        Builds the SPDX documents of the package of a traversal.
+
+        Args:
+            node_collection (dict): the result of traverse_root
+            root (Node): the root directory node, defaults to the first
+                directory of the node collection
+
+        Returns:
+            List[Tuple[Node, dict]]: the directory node and the SPDX document of
+            the package, then of each sub-package
+        """
+        subtrees = SubtreeContents(node_collection, root)
+        self.aggregator.aggregate(node_collection, subtrees.root)
+        packages = [subtrees.root]
+        if self.subpackages:
+            packages.extend(
+                child
+                for child in node_collection.get(subtrees.root, [])
+                if child.is_directory
+            )
+        documents = []
+        for package in packages:
+            aggregate = self.aggregator.get_aggregate(package)
+            document = build_spdx_document(
+                package,
+                subtrees.get_contents(package),
+                created=self.created,
+                verification_code=aggregate.verification_code,
+                licenses=aggregate.licenses,
+            )
+            documents.append((package, document))
+        return documents
+
+
+def write_document(document: dict, path: str) -> str:
+    """
+    Writes a SPDX document as JSON.
+
+    Args:
+        document (dict): the SPDX document
+        path (str): the path of the file to write
+
+    Returns:
+        str: the path of the file
+    """
+    with open(path, "w") as document_file:
+        json.dump(document, document_file)
+    return path
+
+
+def write_package_documents(
+    node_collections: Iterable[dict],
+    output_dir: str,
+    subpackages: bool = True,
+    max_workers: int = 4,
+    created: Optional[str] = None,
+) -> Dict["CoreSWHID", str]:
+    """
+    Writes the SPDX documents of the packages and sub-packages of one or more
+    traversals, the documents being written by a pool of threads while the next
+    ones are built.
+
+    Each document is named after the SWHID of its directory, so the document of
+    a directory found several times is only written once.
+
+    Args:
+        node_collections (Iterable[dict]): the results of traverse_root, e.g.
+            the values of the result of traverse_roots
+        output_dir (str): the directory the documents are written to
+        subpackages (bool): whether to write a document for each top-level
+            directory of each package
+        max_workers (int): the number of threads writing documents
+        created (str): the creation date of the documents, defaults to now
+
+    Returns:
+        Dict[CoreSWHID, str]: the path of the document of each directory
+    """
+    generator = PackageDocumentGenerator(subpackages=subpackages, created=created)
+    paths: Dict["CoreSWHID", str] = {}
+    futures: List[Future] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for node_collection in node_collections:
+            for package, document in generator.get_documents(node_collection):
+                if package.swhid in paths:
+                    continue
+                file_name = f"dir_{package.swhid.object_id.hex()}.spdx.json"
+                paths[package.swhid] = os.path.join(output_dir, file_name)
+                futures.append(
+                    executor.submit(write_document, document, paths[package.swhid])
+                )
+    for future in futures:
+        # Raises the errors of the writes
+        future.result()
+    return paths
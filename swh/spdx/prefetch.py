@@ -0,0 +1,159 @@
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from contextvars import copy_context
+from fnmatch import fnmatchcase
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+)
+
+from swh.spdx.budget import BudgetExceeded
+from swh.spdx.content import get_content_checksums, get_content_key, get_content_result
+from swh.spdx.node import Node
+
+if TYPE_CHECKING:
+    from swh.spdx.backend import Backend
+
+# Names of the files usually holding the license of a project
+LICENSE_PATTERNS = ("LICENSE*", "LICENCE*", "COPYING*", "COPYRIGHT*", "NOTICE*")
+
+
+class ContentPrefetcher:
+    """Fetches the contents of file nodes in a pool of threads, as soon as the
+    traversal finds them, so that the traversal of the directories and the
+    download of the contents overlap.
+
+    The contents are fetched once per unique content, like with
+    get_contents_from_nodes. The pool of the prefetcher is separate from the
+    requests of the traversal, so each stage has its own concurrency.
+    """
+
+    def __init__(
+        self,
+        patterns: Optional[Iterable[str]] = None,
+        max_workers: int = 4,
+        scan: Optional[Callable[[str], Any]] = None,
+        backend: Optional["Backend"] = None,
+        cache: Optional[MutableMapping] = None,
+        raw: bool = False,
+    ):
+        """
+        Initialize a new instance of the ContentPrefetcher class.
+
+        Args:
+            patterns (Iterable[str]): Optional shell-style patterns, e.g.
+                LICENSE_PATTERNS or "*.c", the file names have to match one of
+                to be fetched; all the files are fetched if not given.
+            max_workers (int): The maximum number of contents fetched at once.
+            scan (Callable): Optional function analysing the text of a content,
+                e.g. to detect licenses.
+            backend (Backend): Optional source of the contents.
+            cache (MutableMapping): Optional cache of the contents.
+            raw (bool): Whether to fetch the raw data of the contents, see
+                get_contents_from_nodes.
+        """
+        self.patterns = tuple(patterns) if patterns is not None else None
+        self.scan = scan
+        self.backend = backend
+        self.cache = cache
+        self.raw = raw
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Fetch of each unique content and the nodes having it, by content key
+        self._futures: Dict[str, Future] = {}
+        self._nodes: Dict[str, List[Node]] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def matches(self, node: Node) -> bool:
+        """
+        Checks if the content of a node is to be fetched.
+
+        Args:
+            node (Node): the node
+
+        Returns:
+            bool: True for content nodes whose name matches one of the patterns
+        """
+        if not node.is_content:
+            return False
+        if self.patterns is None:
+            return True
+        return any(fnmatchcase(node.name, pattern) for pattern in self.patterns)
+
+    def add_nodes(self, nodes: Iterable[Node]):
+        """
+        Starts fetching the contents of nodes, e.g. the children of a directory
+        just traversed. The nodes whose name does not match are ignored.
+
+        The fetches are charged to the budget of the current job, if any.
+
+        Args:
+            nodes (Iterable[Node]): the nodes
+
+        Returns:
+            None
+        """
+        for node in nodes:
+            if not self.matches(node):
+                continue
+            key = get_content_key(node)
+            with self._lock:
+                same_content_nodes = self._nodes.setdefault(key, [])
+                same_content_nodes.append(node)
+                if len(same_content_nodes) > 1:
+                    continue
+                self._futures[key] = self._executor.submit(
+                    copy_context().run,
+                    get_content_result,
+                    get_content_checksums(node),
+                    self.scan,
+                    self.backend,
+                    self.cache,
+                    self.raw,
+                )
+
+    def get_results(self) -> Dict[Node, Any]:
+        """
+        Waits for the contents being fetched.
+
+        Returns:
+            Dict[Node, Any]: the text (or data if raw is set) of each node, or
+            the result of its scan if a scan function is given; the contents
+            whose fetch exceeded the budget of the job, or was cancelled by
+            close, are left out
+        """
+        results = {}
+        with self._lock:
+            fetches = [(self._futures[key], self._nodes[key]) for key in self._futures]
+        for future, same_content_nodes in fetches:
+            try:
+                result = future.result()
+            except (BudgetExceeded, CancelledError):
+                continue
+            for node in same_content_nodes:
+                results[node] = result
+        return results
+
+    def close(self):
+        """
+        Stops the pool of threads, cancelling the fetches not started yet.
+
+        Returns:
+            None
+        """
+        # The cancel_futures argument of shutdown requires Python 3.9
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+        self._executor.shutdown(wait=True)
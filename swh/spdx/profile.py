@@ -0,0 +1,245 @@
+from contextlib import nullcontext
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# Environment variable enabling profiling when the module is loaded: 1 times
+# every stage, N times one out of N entries of each stage
+PROFILE_ENV_VAR = "SWH_SPDX_PROFILE"
+
+# Returned by stage when profiling is disabled
+NULL_STAGE = nullcontext()
+
+# Profiler of the current process, see enable_profiling
+_profiler: Optional["Profiler"] = None
+
+
+class StageTimer:
+    """Context manager adding its duration to a stage of a profiler."""
+
+    __slots__ = ("profiler", "name", "directory", "start")
+
+    def __init__(self, profiler: "Profiler", name: str, directory: Any = None):
+        self.profiler = profiler
+        self.name = name
+        self.directory = directory
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.add(self.name, time.perf_counter() - self.start, self.directory)
+
+
+class Profiler:
+    """Accumulates the time spent in each stage of the processing, and in each
+    directory.
+
+    Stages are timed inclusively: a stage running inside another one, e.g. a
+    query sent while a content is downloaded, is also counted in the outer one.
+    """
+
+    def __init__(self, sample_every: int = 1):
+        """
+        Initialize a new instance of the Profiler class.
+
+        Args:
+            sample_every (int): Only time one out of sample_every entries of each
+                stage, the totals being extrapolated.
+        """
+        self.sample_every = max(1, sample_every)
+        # Number of entries and total seconds, by stage
+        self.stages: Dict[str, List[float]] = {}
+        # Total seconds, by directory SWHID
+        self.directories: Dict[str, float] = {}
+        self._counters: Dict[str, Iterator[int]] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, directory: Any = None):
+        """
+        Returns a context manager timing a stage.
+
+        Args:
+            name (str): the name of the stage, e.g. "query"
+            directory: the SWHID of the directory being processed, if any
+
+        Returns:
+            the context manager, which does nothing if the entry is not sampled
+        """
+        if self.sample_every > 1:
+            counter = self._counters.get(name)
+            if counter is None:
+                counter = self._counters.setdefault(name, itertools.count())
+            if next(counter) % self.sample_every:
+                return NULL_STAGE
+        return StageTimer(self, name, directory)
+
+    def add(self, name: str, seconds: float, directory: Any = None):
+        """
+        Adds a timed entry of a stage.
+
+        Args:
+            name (str): the name of the stage
+            seconds (float): the duration of the entry
+            directory: the SWHID of the directory being processed, if any
+
+        Returns:
+            None
+        """
+        seconds *= self.sample_every
+        with self._lock:
+            totals = self.stages.setdefault(name, [0, 0.0])
+            totals[0] += self.sample_every
+            totals[1] += seconds
+            if directory is not None:
+                key = str(directory)
+                self.directories[key] = self.directories.get(key, 0.0) + seconds
+
+    def get_state(self, reset: bool = False) -> dict:
+        """
+        Returns the accumulated timings, e.g. to send them to another process.
+
+        Args:
+            reset (bool): whether to reset the timings
+
+        Returns:
+            dict: the timings by stage and by directory, see merge
+        """
+        with self._lock:
+            state = {
+                "stages": {name: list(totals) for name, totals in self.stages.items()},
+                "directories": dict(self.directories),
+            }
+            if reset:
+                self.stages.clear()
+                self.directories.clear()
+        return state
+
+    def merge(self, state: dict):
+        """
+        Adds the timings of another profiler, e.g. of a worker process.
+
+        Args:
+            state (dict): the timings returned by get_state
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for name, (count, seconds) in state["stages"].items():
+                totals = self.stages.setdefault(name, [0, 0.0])
+                totals[0] += count
+                totals[1] += seconds
+            for directory, seconds in state["directories"].items():
+                self.directories[directory] = (
+                    self.directories.get(directory, 0.0) + seconds
+                )
+
+    def get_report(self, slowest: int = 10) -> dict:
+        """
+        Builds the report of the timings.
+
+        Args:
+            slowest (int): the number of slowest directories listed
+
+        Returns:
+            dict: the number of entries and total seconds of each stage, from
+            the slowest one, and the slowest directories with their total seconds
+        """
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1][1])
+            directories = sorted(self.directories.items(), key=lambda item: -item[1])
+        return {
+            "sample_every": self.sample_every,
+            "stages": {
+                name: {"count": int(count), "seconds": seconds}
+                for name, (count, seconds) in stages
+            },
+            "slowest_directories": [list(item) for item in directories[:slowest]],
+        }
+
+
+def format_report(report: dict) -> str:
+    """
+    Formats a profiling report as text.
+
+    Args:
+        report (dict): the report returned by Profiler.get_report
+
+    Returns:
+        str: one line per stage, then one line per slowest directory
+    """
+    lines = ["stage          count    seconds"]
+    for name, totals in report["stages"].items():
+        lines.append(f"{name:<12} {totals['count']:>7} {totals['seconds']:>10.3f}")
+    if report["slowest_directories"]:
+        lines.append("slowest directories:")
+        for directory, seconds in report["slowest_directories"]:
+            lines.append(f"{seconds:>10.3f} {directory}")
+    if report["sample_every"] > 1:
+        lines.append(f"(extrapolated from one in {report['sample_every']} entries)")
+    return "\n".join(lines)
+
+
+def enable_profiling(sample_every: int = 1) -> "Profiler":
+    """
+    Enables profiling in the current process, keeping the current profiler if
+    already enabled.
+
+    Args:
+        sample_every (int): only time one out of sample_every entries of each
+            stage
+
+    Returns:
+        Profiler: the profiler of the process
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(sample_every)
+    return _profiler
+
+
+def disable_profiling():
+    """
+    Disables profiling in the current process.
+
+    Returns:
+        None
+    """
+    global _profiler
+    _profiler = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    """
+    Returns the profiler of the current process.
+
+    Returns:
+        Profiler: the profiler, None if profiling is disabled
+    """
+    return _profiler
+
+
+def stage(name: str, directory: Any = None):
+    """
+    Returns a context manager timing a stage with the profiler of the current
+    process, or doing nothing if profiling is disabled.
+
+    Args:
+        name (str): the name of the stage, e.g. "query"
+        directory: the SWHID of the directory being processed, if any
+
+    Returns:
+        the context manager
+    """
+    if _profiler is None:
+        return NULL_STAGE
+    return _profiler.stage(name, directory)
+
+
+_env_value = os.environ.get(PROFILE_ENV_VAR, "")
+if _env_value.isdigit() and int(_env_value) > 0:
+    enable_profiling(int(_env_value))
@@ -1,85 +1,285 @@
-from gql import gql
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
 
+# Checksums of contents which can be queried
+CONTENT_CHECKSUMS = ("sha1", "sha256", "sha1_git", "blake2s256")
 
-def get_query_content():
+# Fields of the content entries which can be queried: their checksums and their
+# length in bytes
+ENTRY_FIELDS = CONTENT_CHECKSUMS + ("length",)
+
+# Fields of the content entries queried by default
+DEFAULT_ENTRY_FIELDS = CONTENT_CHECKSUMS
+
+
+def normalize_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Checks a selection of fields of the content entries, and sorts it so that
+    equal selections give the same query and cache keys.
+
+    Args:
+        fields (Iterable[str]): names of fields of ENTRY_FIELDS, the
+            DEFAULT_ENTRY_FIELDS if None
+
+    Returns:
+        Tuple[str, ...]: the fields, in the order of ENTRY_FIELDS
+    """
+    if fields is None:
+        return DEFAULT_ENTRY_FIELDS
+    fields = set(fields)
+    unknown_fields = fields - set(ENTRY_FIELDS)
+    if unknown_fields:
+        raise ValueError(f"Unknown entry fields {', '.join(sorted(unknown_fields))}")
+    return tuple(field for field in ENTRY_FIELDS if field in fields)
+
+
+def get_content_entry_selection(fields: Tuple[str, ...], indent: int = 28) -> str:
+    """
+    Builds the selection of the fields of the content targets of directory entries.
+
+    Args:
+        fields (Tuple[str, ...]): the normalized fields to select
+        indent (int): the indentation of the selection in the query
+
+    Returns:
+        str: the inline fragment on Content selecting the fields, or an empty
+        string if no field is selected
+    """
+    if not fields:
+        return ""
+    margin = " " * indent
+    lines = [f"{margin}... on Content{{"]
+    checksums = [field for field in fields if field in CONTENT_CHECKSUMS]
+    if checksums:
+        lines.append(f"{margin}  hashes{{")
+        lines.extend(f"{margin}    {checksum}" for checksum in checksums)
+        lines.append(f"{margin}  }}")
+    if "length" in fields:
+        lines.append(f"{margin}  length")
+    lines.append(f"{margin}}}")
+    return "\n" + "\n".join(lines)
+
+
+def get_content_hash_parameters(hash_names: Iterable[str]) -> Tuple[str, str]:
+    """
+    Builds the variable declarations and arguments of the content queries, for
+    the checksums available.
+
+    Args:
+        hash_names (Iterable[str]): names of checksums of CONTENT_CHECKSUMS
+
+    Returns:
+        Tuple[str, str]: the declarations of the variables of the query and the
+        arguments of contentByHashes
+    """
+    known_names = set(hash_names)
+    names = [name for name in CONTENT_CHECKSUMS if name in known_names]
+    if not names:
+        raise ValueError("A content is queried by at least one of its checksums")
+    declarations = ", ".join(f"${name}: String!" for name in names)
+    arguments = ", ".join(f"{name}: ${name}" for name in names)
+    return declarations, arguments
+
+
+def get_query_content(hash_names: Iterable[str] = CONTENT_CHECKSUMS):
     """
     Constructs the initial GraphQL query to retrieve the content of a given SWHID.
 
     Args:
-        None
+        hash_names (Iterable[str]): the names of the checksums the content is
+            queried by, e.g. only the ones retrieved with the directory entries
 
     Returns:
         gql.Query: constructed gql query with hashes as parameters
     """
+    from gql import gql
+
+    declarations, arguments = get_content_hash_parameters(hash_names)
     query = gql(
+        f"""
+        query GetContent({declarations}) {{
+                contentByHashes({arguments}) {{
+                  data {{
+                       url
+                       raw {{ text }}
+                  }}
+                }}
+              }}
         """
-        query GetContent($sha1: String!, $sha256: String!, $sha1_git: String!, $blake2s256: String!) {  # noqa
-                contentByHashes(
-                  sha1: $sha1
-                  sha256: $sha256
-                  sha1_git: $sha1_git
-                  blake2s256: $blake2s256
-                ) {
-                  data {
+    )
+    return query
+
+
+def get_query_content_data(hash_names: Iterable[str] = CONTENT_CHECKSUMS):
+    """
+    Constructs the GraphQL query to retrieve the raw data of a content, encoded
+    in base64, given its hashes.
+
+    Args:
+        hash_names (Iterable[str]): the names of the checksums the content is
+            queried by
+
+    Returns:
+        gql.Query: constructed gql query with hashes as parameters
+    """
+    from gql import gql
+
+    declarations, arguments = get_content_hash_parameters(hash_names)
+    query = gql(
+        f"""
+        query GetContentData({declarations}) {{
+                contentByHashes({arguments}) {{
+                  data {{
                        url
-                       raw { text }
-                  }
-                }
-              }
+                       raw {{ base64 }}
+                  }}
+                }}
+              }}
         """
     )
     return query
 
 
-def get_query_children():
+def get_query_children(fields: Optional[Iterable[str]] = None):
     """
     Constructs the initial GraphQL query to retrieve the directory entries of a given SWHID.
 
     Args:
-        None
+        fields (Iterable[str]): the fields of the content entries to retrieve,
+            e.g. only ("sha1",) to compute a verification code or ("sha1_git",)
+            to deduplicate contents; the DEFAULT_ENTRY_FIELDS if None
+
+    Returns:
+        gql.Query: constructed gql query with swhid and cursor as a parameters
+    """
+    return build_query_children(normalize_fields(fields))
+
+
+@lru_cache()
+def build_query_children(fields: Tuple[str, ...]):
+    """
+    Builds and parses the query of get_query_children, once per selection.
+
+    Args:
+        fields (Tuple[str, ...]): the normalized fields of the content entries
 
     Returns:
         gql.Query: constructed gql query with swhid and cursor as a parameters
     """
+    from gql import gql
+
+    content_fields = get_content_entry_selection(fields)
+
     query = gql(
-        """
-      query Getdir($swhid: SWHID!, $cursor: String) {
+        f"""
+      query Getdir($swhid: SWHID!, $cursor: String) {{
                 directory(
                   swhid: $swhid
-                ) {
+                ) {{
                   swhid
                   entries(first: 16, after: $cursor
-                  ){
+                  ){{
                     totalCount
-                    pageInfo {
+                    pageInfo {{
                       endCursor
                       hasNextPage
-                    }
-                    edges {
-                      node {
-                        name { text }
-                        target {
+                    }}
+                    edges {{
+                      node {{
+                        name {{ text }}
+                        target {{
                           swhid
-                          node {
-                            ... on Content{
-                              hashes{
-                                sha1
-                                sha256
-                                sha1_git
-                                blake2s256
-                              }
-                            }
-                            ... on Directory{
+                          node {{{content_fields}
+                            ... on Directory{{
                               id
-                            }
-                          }
-                        }
-                      }
-                    }
-                  }
-                }
-              }
+                            }}
+                          }}
+                        }}
+                      }}
+                    }}
+                  }}
+                }}
+              }}
+
+        """
+    )
+    return query
+
+
+def get_query_root_directories(swhids: list):
+    """
+    Constructs a batched GraphQL query to retrieve the root directories of several
+    revision, release or snapshot SWHIDs at once.
+
+    Each object is queried under the alias ``o<index>``, with its SWHID given as the
+    ``$s<index>`` parameter. The branches of snapshots whose name contains the
+    ``$b<index>`` parameter are queried, with the alias chain of alias branches,
+    e.g. to resolve the HEAD branch.
+
+    Args:
+        swhids (List[CoreSWHID]): SWHIDs of revisions, releases or snapshots
+
+    Returns:
+        gql.Query: constructed gql query with swhids as parameters
+    """
+    from gql import gql
+
+    fields = {
+        "rev": "revision(swhid: $s{index}) {{ ...RevisionRoot }}",
+        "rel": "release(swhid: $s{index}) {{ ...ReleaseRoot }}",
+        "snp": """snapshot(swhid: $s{index}) {{
+                    branches(first: 10, nameInclude: $b{index}) {{
+                      edges {{
+                        node {{
+                          name {{
+                            text
+                          }}
+                          target {{
+                            type
+                            resolveChain {{
+                              text
+                            }}
+                            node {{
+                              ... on Revision {{ ...RevisionRoot }}
+                              ... on Release {{ ...ReleaseRoot }}
+                              ... on Directory {{ swhid }}
+                            }}
+                          }}
+                        }}
+                      }}
+                    }}
+                  }}""",
+    }
+    variables = []
+    for index, swhid in enumerate(swhids):
+        variables.append(f"$s{index}: SWHID!")
+        if swhid.object_type.value == "snp":
+            variables.append(f"$b{index}: String!")
+    declarations = ", ".join(variables)
+    selections = "\n".join(
+        f"o{index}: " + fields[swhid.object_type.value].format(index=index)
+        for index, swhid in enumerate(swhids)
+    )
+    query = gql(
+        f"""
+      query GetRootDirectories({declarations}) {{
+                {selections}
+              }}
+
+      fragment RevisionRoot on Revision {{
+                directory {{
+                  swhid
+                }}
+              }}
 
+      fragment ReleaseRoot on Release {{
+                target {{
+                  node {{
+                    ... on Revision {{ ...RevisionRoot }}
+                    ... on Directory {{ swhid }}
+                  }}
+                }}
+              }}
         """
     )
     return query
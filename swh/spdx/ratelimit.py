@@ -0,0 +1,60 @@
+import multiprocessing
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of requests sent to the archive.
+
+    The bucket state lives in shared memory, so a single rate limiter can be
+    shared by the threads of a process and by the worker processes it starts.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize a new instance of the RateLimiter class.
+
+        Args:
+            rate (float): The number of requests allowed per second.
+            burst (int): The maximum number of requests that can be sent at once,
+                defaults to one second worth of requests.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._lock = multiprocessing.Lock()
+        self._tokens = multiprocessing.RawValue("d", self.burst)
+        self._last_refill = multiprocessing.RawValue("d", time.monotonic())
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token from the bucket if one is available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the number of seconds to wait
+            before a token is available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_refill.value
+            self._tokens.value = min(
+                self.burst, self._tokens.value + elapsed * self.rate
+            )
+            self._last_refill.value = now
+            if self._tokens.value >= 1:
+                self._tokens.value -= 1
+                return 0.0
+            return (1 - self._tokens.value) / self.rate
+
+    def acquire(self):
+        """
+        Waits until a token is available and takes it.
+
+        Returns:
+            None
+        """
+        wait = self.try_acquire()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.try_acquire()
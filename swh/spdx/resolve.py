@@ -0,0 +1,149 @@
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from swh.spdx.connection import execute_query, get_batch_size, get_graphql_client
+from swh.spdx.query import get_query_root_directories
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+
+
+def get_root_directory_swhid(target: Optional[dict]) -> Optional[str]:
+    """
+    Extracts the root directory SWHID from the response of a revision, a release
+    or the target of a snapshot branch.
+
+    Args:
+        target (dict): the queried object, as returned by the GraphQL server
+
+    Returns:
+        str: the SWHID of the root directory, or None if the object does not
+        point to any directory
+    """
+    if not target:
+        return None
+    if "directory" in target:
+        # Revision
+        return target["directory"]["swhid"]
+    if "target" in target:
+        # Release
+        return get_root_directory_swhid(target["target"]["node"])
+    # Directory
+    return target.get("swhid")
+
+
+def get_branch_target(snapshot: Optional[dict], name: str) -> Optional[dict]:
+    """
+    Extracts the target of a branch from the response of a snapshot, whose
+    branches are queried by a part of their name.
+
+    Args:
+        snapshot (dict): the queried snapshot, as returned by the GraphQL server
+        name (str): the full name of the branch
+
+    Returns:
+        dict: the target of the branch, with its type, alias chain and node, or
+        None if the snapshot has no such branch
+    """
+    if not snapshot:
+        return None
+    for edge in snapshot["branches"]["edges"]:
+        # Other branches may contain the name, e.g. FETCH_HEAD for HEAD
+        if edge["node"]["name"]["text"] == name:
+            return edge["node"]["target"]
+    return None
+
+
+def resolve_root_directories(
+    swhids: List["CoreSWHID"],
+    batch_size: int = 50,
+    errors: Optional[Dict["CoreSWHID", Exception]] = None,
+) -> Dict["CoreSWHID", "CoreSWHID"]:
+    """
+    Resolves revision, release and snapshot SWHIDs to the SWHIDs of their root
+    directories, querying them by batches. Directory SWHIDs are resolved to
+    themselves.
+
+    Snapshots are resolved through their HEAD branch. When it is an alias, e.g.
+    of refs/heads/main, the branch at the end of its alias chain is queried with
+    the next batch.
+
+    Args:
+        swhids (List[CoreSWHID]): SWHIDs of the objects to resolve.
+        batch_size (int): maximum number of objects resolved by a single query.
+        errors (dict): optional mapping the errors of the SWHIDs which can not
+            be resolved are added to, keyed by SWHID, instead of being raised;
+            the errors of the queries are still raised.
+
+    Returns:
+        Dict[CoreSWHID, CoreSWHID]: root directory SWHIDs keyed by given SWHIDs.
+    """
+    from swh.model.swhids import CoreSWHID, ObjectType
+
+    resolvable_object_types = (
+        ObjectType.REVISION,
+        ObjectType.RELEASE,
+        ObjectType.SNAPSHOT,
+    )
+    root_directories = {}
+    pending = []
+
+    def fail(swhid: "CoreSWHID", error: Exception):
+        if errors is None:
+            raise error
+        errors[swhid] = error
+
+    # Names of the branches of the snapshots queried, the last one being
+    # queried next
+    branch_names: Dict["CoreSWHID", List[str]] = {}
+    for swhid in swhids:
+        if swhid.object_type == ObjectType.DIRECTORY:
+            root_directories[swhid] = swhid
+        elif swhid.object_type in resolvable_object_types:
+            if swhid not in pending:
+                pending.append(swhid)
+            if swhid.object_type == ObjectType.SNAPSHOT:
+                branch_names[swhid] = ["HEAD"]
+        else:
+            fail(swhid, ValueError(f"{str(swhid)} can not be resolved to a directory"))
+    if not pending:
+        return root_directories
+
+    client = get_graphql_client()
+    start = 0
+    while start < len(pending):
+        # Batches shrink while the server is congested
+        batch = pending[start : start + get_batch_size(batch_size)]
+        start += len(batch)
+        query = get_query_root_directories(batch)
+        params = {}
+        for index, swhid in enumerate(batch):
+            params[f"s{index}"] = str(swhid)
+            if swhid.object_type == ObjectType.SNAPSHOT:
+                params[f"b{index}"] = branch_names[swhid][-1]
+        response = execute_query(client, query, params, cost=len(batch))
+        for index, swhid in enumerate(batch):
+            target = response[f"o{index}"]
+            if swhid.object_type == ObjectType.SNAPSHOT:
+                branch_target = get_branch_target(target, branch_names[swhid][-1])
+                target = branch_target["node"] if branch_target else None
+            str_dir_swhid = get_root_directory_swhid(target)
+            if (
+                str_dir_swhid is None
+                and swhid.object_type == ObjectType.SNAPSHOT
+                and branch_target is not None
+                and branch_target["type"] == "alias"
+            ):
+                chain = branch_target["resolveChain"] or []
+                if chain and chain[-1]["text"] not in branch_names[swhid]:
+                    # The branch the alias points to is queried by a next batch
+                    branch_names[swhid].append(chain[-1]["text"])
+                    pending.append(swhid)
+                    continue
+            if str_dir_swhid is None:
+                fail(
+                    swhid,
+                    ValueError(f"{str(swhid)} does not point to a root directory"),
+                )
+                continue
+            root_directories[swhid] = CoreSWHID.from_string(str_dir_swhid)
+    return root_directories
@@ -0,0 +1,359 @@
+import base64
+import binascii
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+import heapq
+import itertools
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from swh.spdx.budget import BudgetExceeded, charge_nodes, check_budget
+from swh.spdx.children import get_cached_directory_entries, get_directory_entries_page
+from swh.spdx.connection import get_graphql_client
+from swh.spdx.entries import DirectoryEntries
+from swh.spdx.node import Node
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+    from swh.spdx.backend import Backend
+    from swh.spdx.prefetch import ContentPrefetcher
+
+
+def get_page_cursors(
+    end_cursor: str, page_size: int, total_count: int
+) -> Optional[List[str]]:
+    """
+    Computes the cursors of the pages following the first page of a directory,
+    so that they can be fetched concurrently.
+
+    The cursors of the GraphQL API are base64 encoded offsets. The convention
+    used, i.e. whether the end cursor of a page is the offset of its last entry or
+    of the first entry of the next page, is detected from the first page.
+
+    Args:
+        end_cursor (str): the end cursor of the first page
+        page_size (int): the number of entries of the first page
+        total_count (int): the total number of entries of the directory
+
+    Returns:
+        List[str]: the cursors of the following pages, or None if the end cursor
+        is not an offset the cursors can be computed from
+    """
+    try:
+        offset = int(base64.b64decode(end_cursor, validate=True).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    shift = offset - page_size
+    if page_size <= 0 or shift not in (0, -1):
+        return None
+    return [
+        base64.b64encode(str(start + shift).encode()).decode()
+        for start in range(page_size, total_count, page_size)
+    ]
+
+
+class TraversalScheduler:
+    """Concurrent traversal of a root directory.
+
+    Pending directories are fetched by a pool of workers, largest and deepest
+    expected subtrees first, so that big subtrees do not end up delaying the end
+    of the traversal. The pages of large directories are fetched concurrently.
+
+    A directory found several times in the tree is only fetched once, the other
+    nodes having it waiting for its entries.
+
+    The nodes and requests are charged to the budget of the current job, if
+    any, and the directories traversed until one of its limits is reached are
+    returned.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        cache: Optional[dict] = None,
+        backend: Optional["Backend"] = None,
+        subtree_sizes: Optional[Dict["CoreSWHID", int]] = None,
+        prefetcher: Optional["ContentPrefetcher"] = None,
+    ):
+        """
+        Initialize a new instance of the TraversalScheduler class.
+
+        Args:
+            max_workers (int): The maximum number of concurrent requests.
+            cache (dict): Optional mapping of directory SWHIDs to their entries.
+            backend (Backend): Optional source of the directory entries, the
+                GraphQL API of the archive is queried if not given.
+            subtree_sizes (dict): Optional number of nodes of the subtrees of
+                directories, by SWHID, used to schedule the largest subtrees first.
+                It is updated with the sizes of the traversed subtrees, so it can
+                be shared by the traversals of e.g. several releases.
+            prefetcher (ContentPrefetcher): Optional prefetcher the child nodes
+                of each directory are given to as soon as they are found.
+        """
+        self.max_workers = max_workers
+        self.cache = cache
+        self.backend = backend
+        self.subtree_sizes = subtree_sizes if subtree_sizes is not None else {}
+        self.prefetcher = prefetcher
+        self._frontier: List[tuple] = []
+        self._sequence = itertools.count()
+        # GraphQL client of each worker, a client only sends one query at once
+        self._local = threading.local()
+
+    def get_client(self):
+        """
+        Returns the GraphQL client of the current worker, created on its first
+        query, so that the schema of the API is only fetched once per worker.
+
+        Returns:
+            gql.Client: the client
+        """
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = get_graphql_client()
+        return client
+
+    def get_priority(self, node: Node, depth: int, sibling_count: int) -> tuple:
+        """
+        Ranks a pending directory by its expected subtree size, then its depth.
+
+        Args:
+            node (Node): the pending directory node
+            depth (int): the depth of the directory in the tree
+            sibling_count (int): the number of entries of its parent directory
+
+        Returns:
+            tuple: the priority of the directory, lowest first
+        """
+        expected_size = self.subtree_sizes.get(node.swhid)
+        if (
+            expected_size is None
+            and self.cache is not None
+            and node.swhid in self.cache
+        ):
+            expected_size = len(self.cache[node.swhid])
+        if expected_size is None:
+            # Unknown directory, wide directories tend to have large subdirectories
+            expected_size = sibling_count
+        return (-expected_size, -depth)
+
+    def push(self, priority: tuple, task: tuple):
+        """
+        Adds a task to the frontier.
+
+        Args:
+            priority (tuple): the priority of the task, lowest first
+            task (tuple): the kind of the task, "directory" or "page", and its
+                arguments
+
+        Returns:
+            None
+        """
+        heapq.heappush(self._frontier, (priority, next(self._sequence), task))
+
+    def fetch_directory(self, node: Node) -> Tuple[DirectoryEntries, dict]:
+        """
+        Fetches the entries of a directory, or only its first page if its
+        remaining pages can be fetched concurrently.
+
+        Args:
+            node (Node): the directory node
+
+        Returns:
+            Tuple[DirectoryEntries, dict]: the entries fetched, and the cursors of
+            the remaining pages by page index
+        """
+        if self.backend is not None or (
+            self.cache is not None and node.swhid in self.cache
+        ):
+            entries = get_cached_directory_entries(
+                node.swhid, cache=self.cache, backend=self.backend
+            )
+            return entries, {}
+        page = get_directory_entries_page(node.swhid, client=self.get_client())
+        entries = DirectoryEntries()
+        entries.add_page(page["edges"])
+        page_info = page["pageInfo"]
+        if not page_info["hasNextPage"]:
+            return entries, {}
+        cursors = get_page_cursors(
+            page_info["endCursor"], len(page["edges"]), page["totalCount"]
+        )
+        if cursors is None:
+            # Opaque cursors, the pages can only be fetched one after the other
+            cursor = page_info["endCursor"]
+            while page_info["hasNextPage"]:
+                page = get_directory_entries_page(
+                    node.swhid, cursor, client=self.get_client()
+                )
+                entries.add_page(page["edges"])
+                page_info = page["pageInfo"]
+                cursor = page_info["endCursor"]
+            return entries, {}
+        return entries, dict(enumerate(cursors, start=1))
+
+    def fetch_page(self, node: Node, cursor: str) -> List[dict]:
+        """
+        Fetches a page of the entries of a directory.
+
+        Args:
+            node (Node): the directory node
+            cursor (str): the cursor after which the page starts
+
+        Returns:
+            List[dict]: the edges of the page
+        """
+        page = get_directory_entries_page(node.swhid, cursor, client=self.get_client())
+        return page["edges"]
+
+    def traverse(self, root: Node) -> dict:
+        """
+        Traverses a root directory concurrently.
+
+        Args:
+            root (Node): the root directory node
+
+        Returns:
+            dict: Collection of nodes found in the root directory, with keys as
+            root-directory or sub-directories and value as a list of child nodes,
+            in the same order as traverse_root; only the directories traversed
+            until the budget was exceeded if it was
+        """
+        root.path = root.name
+        depths = {root: 0}
+        results: Dict[Node, List[Node]] = {}
+        # First page entries and edges of the remaining pages of the directories
+        # whose pages are fetched concurrently
+        paginated: Dict[Node, Tuple[DirectoryEntries, Dict[int, Optional[list]]]] = {}
+        running: Dict[Future, tuple] = {}
+        # Entries of the directories fetched by the traversal, and other nodes
+        # of the directories being fetched, by SWHID
+        fetched: Dict["CoreSWHID", DirectoryEntries] = {}
+        waiting: Dict["CoreSWHID", List[Node]] = {root.swhid: []}
+        self.push(self.get_priority(root, 0, 0), ("directory", root))
+
+        def complete_directory(node: Node, entries: DirectoryEntries):
+            fetched[node.swhid] = entries
+            if self.cache is not None:
+                self.cache[node.swhid] = entries
+            ready = [node] + waiting.pop(node.swhid)
+            while ready:
+                node = ready.pop()
+                entries = fetched[node.swhid]
+                children = Node.from_entries(entries, node)
+                results[node] = children
+                charge_nodes(len(children))
+                if self.prefetcher is not None:
+                    self.prefetcher.add_nodes(children)
+                for child in children:
+                    if not child.is_directory:
+                        continue
+                    depths[child] = depths[node] + 1
+                    if child.swhid in fetched:
+                        ready.append(child)
+                    elif child.swhid in waiting:
+                        waiting[child.swhid].append(child)
+                    else:
+                        waiting[child.swhid] = []
+                        self.push(
+                            self.get_priority(child, depths[child], len(entries)),
+                            ("directory", child),
+                        )
+
+        truncated = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while self._frontier or running:
+                    while self._frontier and len(running) < self.max_workers:
+                        check_budget()
+                        _, _, task = heapq.heappop(self._frontier)
+                        # The workers charge their requests to the budget of
+                        # the current job
+                        future: Future
+                        if task[0] == "directory":
+                            future = executor.submit(
+                                copy_context().run, self.fetch_directory, task[1]
+                            )
+                        else:
+                            future = executor.submit(
+                                copy_context().run, self.fetch_page, task[1], task[3]
+                            )
+                        running[future] = task
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        task = running.pop(future)
+                        node = task[1]
+                        if task[0] == "directory":
+                            entries, cursors = future.result()
+                            if not cursors:
+                                complete_directory(node, entries)
+                                continue
+                            paginated[node] = (
+                                entries,
+                                {index: None for index in cursors},
+                            )
+                            for index, cursor in cursors.items():
+                                # Pages of directories being fetched are on the
+                                # critical path, schedule them first
+                                self.push(
+                                    (float("-inf"), -depths[node]),
+                                    ("page", node, index, cursor),
+                                )
+                            continue
+                        entries, pages = paginated[node]
+                        pages[task[2]] = future.result()
+                        if all(edges is not None for edges in pages.values()):
+                            del paginated[node]
+                            for index in sorted(pages):
+                                entries.add_page(pages[index] or [])
+                            complete_directory(node, entries)
+            except BudgetExceeded:
+                # The directories traversed so far are kept, the requests
+                # not started yet are dropped
+                truncated = True
+                self._frontier.clear()
+                for future in running:
+                    future.cancel()
+
+        if root not in results:
+            return {}
+        # Partial subtrees would be bad scheduling hints
+        if not truncated:
+            self.update_subtree_sizes(root, results)
+        # Same order as the depth-first traversal of traverse_root
+        node_collection = {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node_collection[node] = results[node]
+            stack.extend(
+                child
+                for child in reversed(results[node])
+                if child.is_directory and child in results
+            )
+        return node_collection
+
+    def update_subtree_sizes(self, root: Node, results: Dict[Node, List[Node]]):
+        """
+        Records the number of nodes of each traversed subtree.
+
+        Args:
+            root (Node): the root directory node
+            results (dict): the child nodes of each traversed directory
+
+        Returns:
+            None
+        """
+        sizes: Dict[Node, int] = {}
+        # Directories in reverse depth-first order, i.e. children first
+        stack = [root]
+        order = []
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for child in results[node] if child.is_directory)
+        for node in reversed(order):
+            sizes[node] = len(results[node]) + sum(
+                sizes[child] for child in results[node] if child.is_directory
+            )
+            self.subtree_sizes[node.swhid] = sizes[node]
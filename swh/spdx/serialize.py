@@ -0,0 +1,694 @@
+from bisect import bisect_right
+import io
+import mmap
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+import zlib
+
+from swh.spdx.entries import CHECKSUM_SIZES
+from swh.spdx.node import Node
+
+MAGIC = b"SWHSPDXT"
+END_MAGIC = b"SWHSPDXE"
+VERSION = 2
+
+# Compression codecs of the blocks, by identifier stored in the header
+CODECS = ("none", "zlib", "zstd")
+
+# Object types of the SWHIDs of the nodes, by identifier stored in the records
+OBJECT_TYPES = ("cnt", "dir", "rev", "rel", "snp")
+
+# magic, version, codec, length of the path of the root node
+HEADER = struct.Struct("<8sBBI")
+# compressed size of the block, number of records
+BLOCK_HEADER = struct.Struct("<II")
+# parent record (-1 for the root), name index in the string table of the block,
+# object type, flags of the checksums set, length of the content (-1 if not
+# known), object id, then the checksums
+RECORD = struct.Struct("<iIBBq20s" + "".join(f"{s}s" for s in CHECKSUM_SIZES.values()))
+# number of records, number of blocks, end magic
+FOOTER = struct.Struct("<QI8s")
+OFFSET = struct.Struct("<Q")
+COUNT = struct.Struct("<I")
+
+
+def get_codec(compression: Optional[str] = None) -> int:
+    """
+    Returns the identifier of a compression codec.
+
+    Args:
+        compression (str): "zstd", "zlib" or "none"; zstd is used if None and
+            the zstandard module is installed, else zlib
+
+    Returns:
+        int: the identifier of the codec
+    """
+    if compression is None:
+        try:
+            import zstandard  # noqa
+
+            compression = "zstd"
+        except ImportError:
+            compression = "zlib"
+    if compression not in CODECS:
+        raise ValueError(f"Unknown compression {compression}")
+    return CODECS.index(compression)
+
+
+def compress(codec: int, data: bytes) -> bytes:
+    """
+    Compresses the payload of a block.
+
+    Args:
+        codec (int): the identifier of the compression codec
+        data (bytes): the payload
+
+    Returns:
+        bytes: the compressed payload
+    """
+    if CODECS[codec] == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "zstandard is required for zstd compression, install swh.spdx[zstd]"
+            ) from None
+        return zstandard.ZstdCompressor().compress(data)
+    if CODECS[codec] == "zlib":
+        return zlib.compress(data)
+    return data
+
+
+def decompress(codec: int, data: bytes) -> bytes:
+    """
+    Decompresses the payload of a block.
+
+    Args:
+        codec (int): the identifier of the compression codec
+        data (bytes): the compressed payload
+
+    Returns:
+        bytes: the payload
+    """
+    if CODECS[codec] == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "zstandard is required for zstd compression, install swh.spdx[zstd]"
+            ) from None
+        return zstandard.ZstdDecompressor().decompress(data)
+    if CODECS[codec] == "zlib":
+        return zlib.decompress(data)
+    return bytes(data)
+
+
+def encode_block(names: List[str], records: List[bytes]) -> bytes:
+    """
+    Encodes the string table and the records of a block, before compression.
+
+    Args:
+        names (List[str]): the string table of the block
+        records (List[bytes]): the packed records of the block
+
+    Returns:
+        bytes: the payload of the block
+    """
+    encoded_names = [name.encode("utf-8", "surrogateescape") for name in names]
+    return b"".join(
+        [
+            COUNT.pack(len(names)),
+            struct.pack(f"<{len(names)}I", *map(len, encoded_names)),
+            *encoded_names,
+            *records,
+        ]
+    )
+
+
+def decode_block(payload: bytes) -> Tuple[List[str], bytes]:
+    """
+    Decodes the string table of a block.
+
+    Args:
+        payload (bytes): the decompressed payload of the block
+
+    Returns:
+        Tuple[List[str], bytes]: the string table and the packed records
+    """
+    (count,) = COUNT.unpack_from(payload)
+    lengths = struct.unpack_from(f"<{count}I", payload, COUNT.size)
+    offset = COUNT.size + 4 * count
+    names = []
+    for length in lengths:
+        names.append(
+            payload[offset : offset + length].decode("utf-8", "surrogateescape")
+        )
+        offset += length
+    return names, payload[offset:]
+
+
+def encode_checksums(checksums: dict) -> Tuple[int, List[bytes]]:
+    """
+    Encodes the checksums of a node as fixed-width binary values.
+
+    Args:
+        checksums (dict): the hexadecimal checksums of the node
+
+    Returns:
+        Tuple[int, List[bytes]]: the flags of the checksums set, and the
+        values of all the checksums of CHECKSUM_SIZES, zeroed if not set
+    """
+    flags = 0
+    values = []
+    for bit, (checksum, size) in enumerate(CHECKSUM_SIZES.items()):
+        value = checksums.get(checksum)
+        if value:
+            flags |= 1 << bit
+            values.append(bytes.fromhex(value))
+        else:
+            values.append(bytes(size))
+    return flags, values
+
+
+def decode_checksums(flags: int, values: tuple) -> dict:
+    """
+    Decodes the checksums encoded by encode_checksums.
+
+    Args:
+        flags (int): the flags of the checksums set
+        values (tuple): the values of all the checksums of CHECKSUM_SIZES
+
+    Returns:
+        dict: the hexadecimal checksums set
+    """
+    return {
+        checksum: value.hex()
+        for bit, (checksum, value) in enumerate(zip(CHECKSUM_SIZES, values))
+        if flags & (1 << bit)
+    }
+
+
+def decode_record(names: List[str], record: tuple, path: str = "") -> Node:
+    """
+    Decodes the node of an unpacked record.
+
+    Args:
+        names (List[str]): the string table of the block of the record
+        record (tuple): the record, unpacked with RECORD
+        path (str): the path of the node
+
+    Returns:
+        Node: the node, with its name, SWHID, checksums and length set
+    """
+    from swh.model.swhids import CoreSWHID, ObjectType
+
+    _, name_index, object_type, flags, length, object_id = record[:6]
+    checksums = decode_checksums(flags, record[6:])
+    swhid = CoreSWHID(
+        object_type=ObjectType(OBJECT_TYPES[object_type]), object_id=object_id
+    )
+    node = Node(name=names[name_index], swhid=swhid, path=path, checksums=checksums)
+    if length >= 0:
+        node.length = length
+    return node
+
+
+class TreeWriter:
+    """Writes traversed nodes to a compact binary file, by compressed blocks.
+
+    Each node is a fixed-width record holding the index of its parent record,
+    its name as an index in the string table of its block, the length of its
+    content, and its SWHID and checksums as binary values. The blocks are
+    written as soon as they are full, and an index of their offsets is written
+    last for random access.
+    """
+
+    def __init__(
+        self, file: BinaryIO, compression: Optional[str] = None, block_size: int = 4096
+    ):
+        """
+        Initialize a new instance of the TreeWriter class.
+
+        Args:
+            file (BinaryIO): The file to write, which does not need to be seekable.
+            compression (str): The compression of the blocks, see get_codec.
+            block_size (int): The number of records per block.
+        """
+        self.file = file
+        self.codec = get_codec(compression)
+        self.block_size = block_size
+        self.record_count = 0
+        self._offset = 0
+        self._block_offsets: List[int] = []
+        self._names: Dict[str, int] = {}
+        self._records: List[bytes] = []
+        # Record indexes of the directories whose children are not written yet
+        self._directory_records: Dict[Node, int] = {}
+        self._header_written = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write(self, data: bytes):
+        self.file.write(data)
+        self._offset += len(data)
+
+    def _write_header(self, root_path: str):
+        encoded_path = root_path.encode("utf-8", "surrogateescape")
+        self._write(HEADER.pack(MAGIC, VERSION, self.codec, len(encoded_path)))
+        self._write(encoded_path)
+        self._header_written = True
+
+    def add_node(self, node: Node, parent: Optional[int]) -> int:
+        """
+        Buffers the record of a node, and writes a block if the buffer is full.
+
+        Args:
+            node (Node): the node to write
+            parent (int): the record index of the parent directory, None for the
+                root, which must be the first node written
+
+        Returns:
+            int: the record index of the node
+        """
+        if parent is None:
+            if self.record_count:
+                raise ValueError("Only the first node written can be a root")
+            self._write_header(node.path)
+        if node.is_directory:
+            self._directory_records[node] = self.record_count
+        name_index = self._names.setdefault(node.name, len(self._names))
+        flags, values = encode_checksums(node.checksums)
+        self._records.append(
+            RECORD.pack(
+                -1 if parent is None else parent,
+                name_index,
+                OBJECT_TYPES.index(node.swhid.object_type.value),
+                flags,
+                -1 if node.length is None else node.length,
+                node.swhid.object_id,
+                *values,
+            )
+        )
+        self.record_count += 1
+        if len(self._records) >= self.block_size:
+            self.flush()
+        return self.record_count - 1
+
+    def write_directory(self, directory: Node, children: List[Node]):
+        """
+        Writes a directory and its children, as yielded by iter_traverse_root.
+
+        Args:
+            directory (Node): the directory node
+            children (List[Node]): the child nodes of the directory
+
+        Returns:
+            None
+        """
+        if directory not in self._directory_records:
+            # Root directory
+            self.add_node(directory, None)
+        parent = self._directory_records.pop(directory)
+        for child in children:
+            self.add_node(child, parent)
+
+    def flush(self):
+        """
+        Compresses and writes the buffered records as a block.
+
+        Returns:
+            None
+        """
+        if not self._records:
+            return
+        data = compress(self.codec, encode_block(list(self._names), self._records))
+        self._block_offsets.append(self._offset)
+        self._write(BLOCK_HEADER.pack(len(data), len(self._records)))
+        self._write(data)
+        self._names.clear()
+        self._records.clear()
+
+    def close(self):
+        """
+        Writes the remaining buffered records and the block index, the file
+        itself is not closed.
+
+        Returns:
+            None
+        """
+        if not self._header_written:
+            self._write_header("")
+        self.flush()
+        self._write(BLOCK_HEADER.pack(0, 0))
+        for offset in self._block_offsets:
+            self._write(OFFSET.pack(offset))
+        self._write(FOOTER.pack(self.record_count, len(self._block_offsets), END_MAGIC))
+
+
+def read_header(data: Union[bytes, mmap.mmap]) -> Tuple[int, int]:
+    """
+    Decodes the fixed-size part of the header of a tree file.
+
+    Args:
+        data (bytes): the beginning of the file
+
+    Returns:
+        Tuple[int, int]: the codec and the length of the path of the root node,
+        which follows
+    """
+    magic, version, codec, path_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a tree file")
+    return codec, path_length
+
+
+def iter_tree_file(file: BinaryIO) -> Iterator[Tuple[Node, Optional[int]]]:
+    """
+    Reads the nodes of a tree file sequentially, e.g. from a pipe.
+
+    Args:
+        file (BinaryIO): the file to read
+
+    Yields:
+        Tuple[Node, Optional[int]]: each node with its path set, and the record
+        index of its parent directory, None for the root
+    """
+    codec, path_length = read_header(file.read(HEADER.size))
+    root_path = file.read(path_length).decode("utf-8", "surrogateescape")
+    # Paths of the directories read so far, by record index
+    paths: Dict[int, str] = {}
+    index = 0
+    while True:
+        size, count = BLOCK_HEADER.unpack(file.read(BLOCK_HEADER.size))
+        if not count:
+            return
+        names, records = decode_block(decompress(codec, file.read(size)))
+        for record in RECORD.iter_unpack(records):
+            node, parent = build_node(names, record, root_path, paths)
+            if node.is_directory:
+                paths[index] = node.path
+            yield node, parent
+            index += 1
+
+
+def build_node(
+    names: List[str], record: tuple, root_path: str, paths: Dict[int, str]
+) -> Tuple[Node, Optional[int]]:
+    """
+    Builds the node of an unpacked record.
+
+    Args:
+        names (List[str]): the string table of the block of the record
+        record (tuple): the record, unpacked with RECORD
+        root_path (str): the path of the root node
+        paths (Dict[int, str]): the paths of the directories, by record index,
+            holding at least the parent of the record
+
+    Returns:
+        Tuple[Node, Optional[int]]: the node and the record index of its parent
+    """
+    parent = record[0]
+    if parent < 0:
+        return decode_record(names, record, root_path), None
+    path = f"{paths[parent]}/{names[record[1]]}"
+    return decode_record(names, record, path), parent
+
+
+class TreeReader:
+    """Random access to the nodes of a tree file, e.g. memory-mapped.
+
+    Only the blocks holding the requested records are decompressed, and the
+    last decompressed blocks are kept.
+    """
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], cached_blocks: int = 8):
+        """
+        Initialize a new instance of the TreeReader class.
+
+        Args:
+            buffer: The content of the tree file.
+            cached_blocks (int): The number of decompressed blocks kept.
+        """
+        self.buffer = buffer
+        self.codec, path_length = read_header(buffer)
+        self.root_path = bytes(buffer[HEADER.size : HEADER.size + path_length]).decode(
+            "utf-8", "surrogateescape"
+        )
+        footer_offset = len(buffer) - FOOTER.size
+        record_count, block_count, end_magic = FOOTER.unpack_from(buffer, footer_offset)
+        if end_magic != END_MAGIC:
+            raise ValueError("Truncated tree file")
+        self.record_count = record_count
+        index_offset = footer_offset - block_count * OFFSET.size
+        self.block_offsets = [
+            offset
+            for (offset,) in struct.iter_unpack(
+                "<Q", buffer[index_offset:footer_offset]
+            )
+        ]
+        # Index of the first record of each block
+        self.block_starts = []
+        start = 0
+        for offset in self.block_offsets:
+            self.block_starts.append(start)
+            start += BLOCK_HEADER.unpack_from(buffer, offset)[1]
+        self.cached_blocks = cached_blocks
+        self._blocks: Dict[int, Tuple[List[str], bytes]] = {}
+        self._paths: Dict[int, str] = {}
+
+    @classmethod
+    def open(cls, path: str) -> "TreeReader":
+        """
+        Memory-maps a tree file.
+
+        Args:
+            path (str): the path of the file
+
+        Returns:
+            TreeReader: the reader of the file
+        """
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def close(self):
+        """
+        Unmaps the file, if memory-mapped.
+
+        Returns:
+            None
+        """
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def get_block(self, block: int) -> Tuple[List[str], bytes]:
+        """
+        Returns a decompressed block.
+
+        Args:
+            block (int): the index of the block
+
+        Returns:
+            Tuple[List[str], bytes]: the string table and the packed records
+        """
+        if block not in self._blocks:
+            if len(self._blocks) >= self.cached_blocks:
+                del self._blocks[next(iter(self._blocks))]
+            offset = self.block_offsets[block]
+            size, _ = BLOCK_HEADER.unpack_from(self.buffer, offset)
+            start = offset + BLOCK_HEADER.size
+            self._blocks[block] = decode_block(
+                decompress(self.codec, self.buffer[start : start + size])
+            )
+        return self._blocks[block]
+
+    def get_record(self, index: int) -> Tuple[List[str], tuple]:
+        """
+        Returns an unpacked record.
+
+        Args:
+            index (int): the index of the record
+
+        Returns:
+            Tuple[List[str], tuple]: the string table of the block of the
+            record, and the record unpacked with RECORD
+        """
+        if not 0 <= index < self.record_count:
+            raise IndexError(index)
+        block = bisect_right(self.block_starts, index) - 1
+        names, records = self.get_block(block)
+        position = (index - self.block_starts[block]) * RECORD.size
+        return names, RECORD.unpack_from(records, position)
+
+    def get_parent(self, index: int) -> Optional[int]:
+        """
+        Returns the record index of the parent directory of a node.
+
+        Args:
+            index (int): the index of the record of the node
+
+        Returns:
+            int: the index of the record of the parent, None for the root
+        """
+        parent = self.get_record(index)[1][0]
+        return None if parent < 0 else parent
+
+    def get_path(self, index: int) -> str:
+        """
+        Returns the path of a node, built from the names of its ancestors.
+
+        Args:
+            index (int): the index of the record of the node
+
+        Returns:
+            str: the path of the node
+        """
+        if index in self._paths:
+            return self._paths[index]
+        names, record = self.get_record(index)
+        parent = record[0]
+        if parent < 0:
+            return self.root_path
+        path = f"{self.get_path(parent)}/{names[record[1]]}"
+        if record[2] == OBJECT_TYPES.index("dir"):
+            self._paths[index] = path
+        return path
+
+    def get_node(self, index: int) -> Node:
+        """
+        Returns a node.
+
+        Args:
+            index (int): the index of the record of the node
+
+        Returns:
+            Node: the node, with its path, checksums and length set
+        """
+        names, record = self.get_record(index)
+        return decode_record(names, record, self.get_path(index))
+
+    def iter_nodes(self) -> Iterator[Tuple[Node, Optional[int]]]:
+        """
+        Reads all the nodes sequentially.
+
+        Yields:
+            Tuple[Node, Optional[int]]: each node with its path set, and the
+            record index of its parent directory, None for the root
+        """
+        paths: Dict[int, str] = {}
+        index = 0
+        for block in range(len(self.block_offsets)):
+            names, records = self.get_block(block)
+            for record in RECORD.iter_unpack(records):
+                node, parent = build_node(names, record, self.root_path, paths)
+                if node.is_directory:
+                    paths[index] = node.path
+                yield node, parent
+                index += 1
+
+
+def collect_nodes(nodes: Iterator[Tuple[Node, Optional[int]]]) -> dict:
+    """
+    Rebuilds the node collection of a traversal from its nodes.
+
+    Args:
+        nodes (Iterator[Tuple[Node, Optional[int]]]): the nodes and the record
+            indexes of their parents, in the order they were written
+
+    Returns:
+        dict: the collection of nodes, with directories as keys and the lists of
+        their child nodes as values, as returned by traverse_root
+    """
+    node_collection: Dict[Node, List[Node]] = {}
+    directories: Dict[int, Node] = {}
+    for index, (node, parent) in enumerate(nodes):
+        if parent is not None:
+            node_collection[directories[parent]].append(node)
+        if node.is_directory:
+            directories[index] = node
+            node_collection[node] = []
+    return node_collection
+
+
+def dump_node_collection(
+    node_collection: dict,
+    file: BinaryIO,
+    compression: Optional[str] = None,
+    block_size: int = 4096,
+) -> int:
+    """
+    Writes the node collection of a traversal to a tree file.
+
+    Args:
+        node_collection (dict): the collection of nodes, as returned by
+            traverse_root, whose first key is the root directory
+        file (BinaryIO): the file to write
+        compression (str): the compression of the blocks, see get_codec
+        block_size (int): the number of records per block
+
+    Returns:
+        int: the number of records written
+    """
+    with TreeWriter(file, compression=compression, block_size=block_size) as writer:
+        for directory, children in node_collection.items():
+            writer.write_directory(directory, children)
+    return writer.record_count
+
+
+def load_node_collection(file: BinaryIO) -> dict:
+    """
+    Reads the node collection of a traversal from a tree file, sequentially.
+
+    Args:
+        file (BinaryIO): the file to read
+
+    Returns:
+        dict: the collection of nodes, as returned by traverse_root
+    """
+    return collect_nodes(iter_tree_file(file))
+
+
+def serialize_node_collection(
+    node_collection: dict, compression: Optional[str] = None
+) -> bytes:
+    """
+    Serializes the node collection of a traversal, e.g. to pass it to another
+    process.
+
+    Args:
+        node_collection (dict): the collection of nodes, as returned by
+            traverse_root
+        compression (str): the compression of the blocks, see get_codec
+
+    Returns:
+        bytes: the content of a tree file
+    """
+    file = io.BytesIO()
+    dump_node_collection(node_collection, file, compression=compression)
+    return file.getvalue()
+
+
+def deserialize_node_collection(data: bytes) -> dict:
+    """
+    Deserializes the node collection of a traversal.
+
+    Args:
+        data (bytes): the content of a tree file
+
+    Returns:
+        dict: the collection of nodes, as returned by traverse_root
+    """
+    return collect_nodes(TreeReader(data).iter_nodes())
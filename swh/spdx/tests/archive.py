@@ -0,0 +1,482 @@
+import base64
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from graphql import (
+    DocumentNode,
+    build_schema,
+    execute_sync,
+    get_operation_ast,
+    parse,
+    print_ast,
+    validate,
+)
+
+from swh.model.hashutil import MultiHash
+from swh.model.model import Directory, DirectoryEntry
+from swh.model.swhids import CoreSWHID, ObjectType
+from swh.spdx.backend import InMemoryBackend
+
+# Subset of the schema of the GraphQL API of the archive used by the queries
+SCHEMA = build_schema(
+    """
+    scalar SWHID
+
+    type Query {
+      directory(swhid: SWHID!): Directory
+      contentByHashes(
+        sha1: String, sha256: String, sha1_git: String, blake2s256: String
+      ): Content
+    }
+
+    type BinaryString {
+      text: String
+      base64: String
+    }
+
+    type PageInfo {
+      endCursor: String
+      hasNextPage: Boolean!
+    }
+
+    type Directory {
+      swhid: SWHID!
+      id: String!
+      entries(first: Int, after: String): DirectoryEntryConnection!
+    }
+
+    type DirectoryEntryConnection {
+      totalCount: Int!
+      pageInfo: PageInfo!
+      edges: [DirectoryEntryEdge]
+    }
+
+    type DirectoryEntryEdge {
+      cursor: String!
+      node: DirectoryEntry
+    }
+
+    type DirectoryEntry {
+      name: BinaryString
+      target: DirectoryEntryTarget
+    }
+
+    type DirectoryEntryTarget {
+      swhid: SWHID
+      node: DirectoryEntryTargetNode
+    }
+
+    union DirectoryEntryTargetNode = Content | Directory
+
+    type ContentHashes {
+      sha1: String
+      sha256: String
+      sha1_git: String
+      blake2s256: String
+    }
+
+    type ContentData {
+      url: String
+      raw: BinaryString
+    }
+
+    type Content {
+      swhid: SWHID!
+      hashes: ContentHashes
+      length: Int
+      data: ContentData
+    }
+    """
+)
+
+CHECKSUMS = ("sha1", "sha256", "sha1_git", "blake2s256")
+
+# Size above which the server gives the download URL of a content instead of
+# its data
+RAW_SIZE_LIMIT = 10000
+
+# Number of entries of a page of directory entries when the query does not
+# give one
+DEFAULT_PAGE_SIZE = 16
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    return int(base64.b64decode(cursor)) + 1 if cursor else 0
+
+
+@lru_cache(maxsize=64)
+def parse_query(source: str) -> DocumentNode:
+    """
+    Parses and validates a query, once per query text.
+
+    Args:
+        source (str): the text of the query
+
+    Returns:
+        DocumentNode: the parsed query
+    """
+    document = parse(source)
+    errors = validate(SCHEMA, document)
+    if errors:
+        raise ValueError(f"Invalid query: {errors[0].message}")
+    return document
+
+
+class FakeArchive:
+    """Deterministic synthetic archive, serving the directories and contents of
+    a generated Merkle tree with the response shapes of the GraphQL API.
+
+    The tree has depth levels of subdirectories below its root. Each level is
+    made of variants distinct directories, which the directories of the level
+    above point to, so that very large trees to traverse are generated from a
+    few distinct objects, like the shared subtrees of real archives.
+    """
+
+    def __init__(
+        self,
+        depth: int = 3,
+        subdirectories: int = 4,
+        files: int = 20,
+        variants: int = 2,
+        content_count: int = 64,
+        max_content_size: int = 512,
+        large_content_every: int = 0,
+        seed: int = 0,
+        base_url: str = "https://archive.example.org",
+    ):
+        """
+        Initialize a new instance of the FakeArchive class.
+
+        Args:
+            depth (int): The number of levels of subdirectories below the root.
+            subdirectories (int): The number of subdirectories of each
+                directory above the deepest level.
+            files (int): The number of files of each directory, more than the
+                page size of the queries to exercise the pagination.
+            variants (int): The number of distinct directories of each level.
+            content_count (int): The number of distinct contents.
+            max_content_size (int): The maximum size of the contents, in bytes.
+            large_content_every (int): Make one out of large_content_every
+                contents larger than RAW_SIZE_LIMIT, so that it has to be
+                downloaded, none if 0.
+            seed (int): The seed of the generation.
+            base_url (str): The URL the contents are downloaded from.
+        """
+        self.base_url = base_url.rstrip("/")
+        rng = random.Random(seed)
+        # Data and checksums of the contents, by hexadecimal sha1_git
+        self.contents: Dict[str, Tuple[bytes, dict]] = {}
+        content_ids = []
+        for index in range(content_count):
+            size = rng.randint(0, max_content_size)
+            if large_content_every and index % large_content_every == 0:
+                size += RAW_SIZE_LIMIT
+            data = f"content {index}\n".encode() + bytes(
+                rng.choice(b"abcdefghijklmnopqrstuvwxyz \n") for _ in range(size)
+            )
+            hashes = MultiHash.from_data(data, hash_names=set(CHECKSUMS)).hexdigest()
+            self.contents[hashes["sha1_git"]] = (data, hashes)
+            content_ids.append(hashes["sha1_git"])
+        # Entries of the directories, as child name, child SWHID and child
+        # checksums, by directory SWHID
+        self.directories: Dict[CoreSWHID, list] = {}
+        level: List[CoreSWHID] = []
+        for level_depth in range(depth, -1, -1):
+            level_size = 1 if level_depth == 0 else variants
+            level = [
+                self.add_directory(
+                    [rng.choice(content_ids) for _ in range(files)],
+                    [rng.choice(level) for _ in range(subdirectories)] if level else [],
+                )
+                for _ in range(level_size)
+            ]
+        self.root = level[0]
+        self.node_counts: Dict[CoreSWHID, int] = {}
+        # Number of queries received, by operation name
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add_directory(
+        self, content_ids: List[str], directory_ids: List[CoreSWHID]
+    ) -> CoreSWHID:
+        """
+        Adds a directory, computing its SWHID from its entries.
+
+        Args:
+            content_ids (List[str]): the sha1_git of the files of the directory
+            directory_ids (List[CoreSWHID]): the SWHIDs of its subdirectories
+
+        Returns:
+            CoreSWHID: the SWHID of the directory
+        """
+        entries: List[Tuple[str, CoreSWHID, dict]] = [
+            (
+                f"file{index}.txt",
+                CoreSWHID(
+                    object_type=ObjectType.CONTENT,
+                    object_id=bytes.fromhex(content_id),
+                ),
+                {
+                    "hashes": self.contents[content_id][1],
+                    "length": len(self.contents[content_id][0]),
+                },
+            )
+            for index, content_id in enumerate(content_ids)
+        ] + [
+            (f"dir{index}", swhid, {"id": swhid.object_id.hex()})
+            for index, swhid in enumerate(directory_ids)
+        ]
+        directory = Directory(
+            entries=tuple(
+                DirectoryEntry(
+                    name=name.encode(),
+                    type="file" if swhid.object_type == ObjectType.CONTENT else "dir",
+                    target=swhid.object_id,
+                    perms=0o100644
+                    if swhid.object_type == ObjectType.CONTENT
+                    else 0o040000,
+                )
+                for name, swhid, _ in entries
+            )
+        )
+        swhid = CoreSWHID(object_type=ObjectType.DIRECTORY, object_id=directory.id)
+        self.directories[swhid] = entries
+        return swhid
+
+    def count_nodes(self, swhid: Optional[CoreSWHID] = None) -> int:
+        """
+        Counts the nodes of the traversal of a directory, itself included.
+
+        Args:
+            swhid (CoreSWHID): the SWHID of the directory, the root if None
+
+        Returns:
+            int: the number of nodes
+        """
+        if swhid is None:
+            swhid = self.root
+        if swhid not in self.node_counts:
+            self.node_counts[swhid] = 1 + sum(
+                self.count_nodes(child_swhid)
+                if child_swhid.object_type == ObjectType.DIRECTORY
+                else 1
+                for _, child_swhid, _ in self.directories[swhid]
+            )
+        return self.node_counts[swhid]
+
+    def get_backend(self) -> InMemoryBackend:
+        """
+        Returns a backend serving the directories and contents of the archive
+        without going through GraphQL.
+
+        Returns:
+            InMemoryBackend: the backend
+        """
+        return InMemoryBackend(
+            directories=self.directories,
+            contents={
+                content_id: data for content_id, (data, _) in self.contents.items()
+            },
+        )
+
+    def get_content_url(self, sha1_git: str) -> str:
+        return f"{self.base_url}/content/sha1_git:{sha1_git}/raw/"
+
+    def resolve_directory(self, info, swhid: str) -> Optional[dict]:
+        dir_swhid = CoreSWHID.from_string(swhid)
+        entries = self.directories.get(dir_swhid)
+        if entries is None:
+            return None
+
+        def resolve_entries(info, first: int = DEFAULT_PAGE_SIZE, after=None):
+            start = decode_cursor(after)
+            page = entries[start : start + first]
+            edges = []
+            for offset, (name, child_swhid, target) in enumerate(page, start=start):
+                if child_swhid.object_type == ObjectType.CONTENT:
+                    node = dict(target, __typename="Content", swhid=str(child_swhid))
+                else:
+                    node = dict(target, __typename="Directory", swhid=str(child_swhid))
+                edges.append(
+                    {
+                        "cursor": encode_cursor(offset),
+                        "node": {
+                            "name": {"text": name},
+                            "target": {"swhid": str(child_swhid), "node": node},
+                        },
+                    }
+                )
+            end = start + len(page)
+            return {
+                "totalCount": len(entries),
+                "pageInfo": {
+                    "endCursor": encode_cursor(end - 1) if page else after,
+                    "hasNextPage": end < len(entries),
+                },
+                "edges": edges,
+            }
+
+        return {
+            "swhid": swhid,
+            "id": dir_swhid.object_id.hex(),
+            "entries": resolve_entries,
+        }
+
+    def resolve_content(self, info, **hashes) -> Optional[dict]:
+        content = self.contents.get(hashes.get("sha1_git", ""))
+        if content is None:
+            return None
+        data, content_hashes = content
+        if any(content_hashes[name] != value for name, value in hashes.items()):
+            return None
+        raw = None
+        if len(data) <= RAW_SIZE_LIMIT:
+            raw = {
+                "text": data.decode("utf-8", "replace"),
+                "base64": base64.b64encode(data).decode(),
+            }
+        return {
+            "swhid": f"swh:1:cnt:{content_hashes['sha1_git']}",
+            "hashes": content_hashes,
+            "length": len(data),
+            "data": {
+                "url": self.get_content_url(content_hashes["sha1_git"]),
+                "raw": raw,
+            },
+        }
+
+    def execute_source(self, source: str, variables: Optional[dict] = None) -> dict:
+        """
+        Executes a GraphQL query against the archive.
+
+        Args:
+            source (str): the text of the query
+            variables (dict): the values of the variables of the query
+
+        Returns:
+            dict: the result of the query, with its "data" and "errors"
+        """
+        document = parse_query(source)
+        operation = get_operation_ast(document)
+        with self._lock:
+            self.requests[
+                operation.name.value if operation and operation.name else None
+            ] += 1
+        result = execute_sync(
+            SCHEMA,
+            document,
+            root_value={
+                "directory": self.resolve_directory,
+                "contentByHashes": self.resolve_content,
+            },
+            variable_values=variables,
+        )
+        return dict(result.formatted)
+
+    def execute(self, query, variable_values: Optional[dict] = None, **kwargs) -> dict:
+        """
+        Executes a query like gql.Client.execute, to be used as its mock.
+
+        Args:
+            query: the query, as returned by the get_query_* functions
+            variable_values (dict): the values of the variables of the query
+
+        Returns:
+            dict: the data of the result of the query
+        """
+        from gql.transport.exceptions import TransportQueryError
+
+        source = print_ast(getattr(query, "document", query))
+        result = self.execute_source(source, variable_values)
+        if result.get("errors"):
+            raise TransportQueryError(str(result["errors"][0]), errors=result["errors"])
+        return result["data"]
+
+    def download(self, url: str) -> bytes:
+        """
+        Returns the data of a content from its download URL.
+
+        Args:
+            url (str): the URL given by the server
+
+        Returns:
+            bytes: the data of the content
+        """
+        with self._lock:
+            self.requests["download"] += 1
+        sha1_git = url.rstrip("/").rsplit("/", 2)[-2].split(":")[-1]
+        return self.contents[sha1_git][0]
+
+
+class ArchiveRequestHandler(BaseHTTPRequestHandler):
+    """Serves the GraphQL API and the content downloads of a FakeArchive."""
+
+    archive: FakeArchive
+
+    def send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        try:
+            result = self.archive.execute_source(
+                request["query"], request.get("variables")
+            )
+        except ValueError as e:
+            result = {"errors": [{"message": str(e)}]}
+        self.send_body(200, json.dumps(result).encode(), "application/json")
+
+    def do_GET(self):
+        try:
+            data = self.archive.download(self.path)
+        except (KeyError, IndexError, ValueError):
+            self.send_body(404, b"Not found", "text/plain")
+            return
+        self.send_body(200, data, "application/octet-stream")
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve_archive(archive: FakeArchive) -> Iterator[str]:
+    """
+    Serves an archive over HTTP on a local port, in a background thread.
+
+    The content download URLs given by the server point to the same port.
+
+    Args:
+        archive (FakeArchive): the archive to serve
+
+    Yields:
+        str: the URL of the GraphQL endpoint
+    """
+    handler = type(
+        "FakeArchiveRequestHandler", (ArchiveRequestHandler,), {"archive": archive}
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    base_url = archive.base_url
+    archive.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"{archive.base_url}/graphql/"
+    finally:
+        server.shutdown()
+        server.server_close()
+        archive.base_url = base_url
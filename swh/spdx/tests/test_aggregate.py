@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+from swh.spdx.aggregate import Aggregator
+from swh.spdx.document import get_verification_code
+from swh.spdx.node import Node
+from swh.spdx.tests.utils import EMPTY, LIB, ROOT, make_node_collection
+
+
+def test_aggregate():
+    """
+    Tests the totals of the directories of a traversal
+    """
+    node_collection = make_node_collection()
+    for children in node_collection.values():
+        for node in children:
+            if node.name.endswith(".c"):
+                node.length = 100
+    aggregator = Aggregator(
+        get_licenses=lambda node: ["MIT"] if node.name.endswith(".c") else []
+    )
+
+    root = aggregator.aggregate(node_collection)
+
+    assert root.to_dict() == {
+        "file_count": 7,
+        "directory_count": 2,
+        "total_size": 600,
+        "unknown_sizes": 1,
+        "licenses": ["MIT"],
+        "verification_code": get_verification_code(
+            node.checksums["sha1"]
+            for children in node_collection.values()
+            for node in children
+            if not node.is_directory and "sha1" in node.checksums
+        ),
+        "complete": True,
+    }
+    assert aggregator.aggregates[LIB].file_count == 2
+    assert aggregator.aggregates[LIB].total_size == 100
+    assert aggregator.aggregates[EMPTY].file_count == 0
+    assert aggregator.get_aggregate(next(iter(node_collection))) is root
+
+
+def test_aggregate_memoized():
+    """
+    Tests that the subtrees already aggregated are not aggregated again, even
+    when found in another traversal
+    """
+    aggregator = Aggregator()
+    root = aggregator.aggregate(make_node_collection())
+    lib = aggregator.aggregates[LIB]
+    other_root = Node(name="other", swhid=EMPTY)
+    other_collection = {other_root: []}
+    for children in make_node_collection().values():
+        for node in children:
+            if node.swhid == LIB:
+                other_collection[other_root] = [node]
+
+    with patch("swh.spdx.aggregate.DirectoryAggregate") as mock_aggregate:
+        assert aggregator.aggregate(make_node_collection()) is root
+        aggregator.aggregates.pop(EMPTY)
+        aggregator.aggregate(other_collection)
+
+    (call,) = mock_aggregate.call_args_list
+    assert call.args[1] == (lib,)
+    assert set(aggregator.aggregates) == {ROOT, LIB, EMPTY}
+
+
+def test_aggregate_truncated():
+    """
+    Tests that the aggregates of the subtrees missing from a truncated traversal
+    are incomplete, and not memoized
+    """
+    aggregator = Aggregator()
+    truncated = {
+        directory: children
+        for directory, children in make_node_collection().items()
+        if directory.swhid != LIB
+    }
+
+    root = aggregator.aggregate(truncated)
+
+    assert not root.complete
+    assert root.file_count == 5
+    assert aggregator.get_aggregate(next(iter(truncated))) is root
+    assert set(aggregator.aggregates) == {EMPTY}
+    assert aggregator.aggregate(make_node_collection()).to_dict()["file_count"] == 7
+    assert aggregator.aggregates[ROOT].complete
+    assert not aggregator.incomplete
@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+from swh.model.hashutil import MultiHash
+from swh.model.model import Directory, DirectoryEntry
+from swh.model.swhids import ObjectType
+from swh.spdx.content import get_content_data_from_hashes, get_content_from_hashes
+from swh.spdx.node import Node
+from swh.spdx.tests.archive import RAW_SIZE_LIMIT, FakeArchive, serve_archive
+from swh.spdx.traverse import traverse_root
+
+
+def test_fake_archive_is_deterministic():
+    """
+    Tests that the generated archive only depends on its parameters, and that
+    its identifiers are valid
+    """
+    archive = FakeArchive(depth=2, seed=1)
+
+    assert FakeArchive(depth=2, seed=1).root == archive.root
+    assert FakeArchive(depth=2, seed=2).root != archive.root
+    for dir_swhid, entries in archive.directories.items():
+        directory = Directory(
+            entries=tuple(
+                DirectoryEntry(
+                    name=name.encode(),
+                    type="dir" if swhid.object_type == ObjectType.DIRECTORY else "file",
+                    target=swhid.object_id,
+                    perms=0o040000
+                    if swhid.object_type == ObjectType.DIRECTORY
+                    else 0o100644,
+                )
+                for name, swhid, _ in entries
+            )
+        )
+        assert directory.id == dir_swhid.object_id
+    for data, hashes in archive.contents.values():
+        assert MultiHash.from_data(data, hash_names=set(hashes)).hexdigest() == hashes
+    # The root, then two variants of each level
+    assert len(archive.directories) == 5
+    assert archive.count_nodes() == 1 + 20 + 4 * (1 + 20 + 4 * (1 + 20))
+
+
+def test_traverse_fake_archive():
+    """
+    Tests the traversal of a generated archive with paginated directories,
+    each distinct directory being fetched once
+    """
+    archive = FakeArchive(depth=3)
+
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        node_collection = traverse_root(
+            Node(name="root", swhid=archive.root),
+            first_iteration=True,
+            cache={},
+            bulk=True,
+        )
+
+    assert (
+        sum(len(children) for children in node_collection.values()) + 1
+        == archive.count_nodes()
+    )
+    # Two pages of 16 and 8 entries per distinct directory
+    assert archive.requests["Getdir"] == 2 * len(archive.directories)
+    for children in node_collection.values():
+        for node in children:
+            if not node.is_directory:
+                assert node.checksums == archive.contents[node.checksums["sha1_git"]][1]
+
+
+def test_fake_archive_contents():
+    """
+    Tests that the contents are served like the archive does, with a download
+    URL for large contents
+    """
+    archive = FakeArchive(depth=0, content_count=2, large_content_every=2)
+    (large_data, large_hashes), (small_data, small_hashes) = archive.contents.values()
+    assert len(large_data) > RAW_SIZE_LIMIT
+
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        assert get_content_from_hashes(small_hashes) == small_data.decode()
+        with patch("swh.spdx.content.iter_download") as mock_download:
+            mock_download.side_effect = lambda url, *args: iter([archive.download(url)])
+            assert get_content_data_from_hashes(large_hashes) == large_data
+    assert archive.requests["GetContent"] == 1
+    assert archive.requests["GetContentData"] == 1
+    assert archive.requests["download"] == 1
+
+
+def test_serve_fake_archive():
+    """
+    Tests that the queries and the content downloads are served over HTTP
+    """
+    from graphql import print_ast
+    import requests
+
+    from swh.spdx.query import get_query_children
+
+    archive = FakeArchive(depth=1, variants=1, content_count=4, large_content_every=4)
+    large_data, large_hashes = next(iter(archive.contents.values()))
+    query = get_query_children(("sha1", "length"))
+
+    with serve_archive(archive) as url:
+        response = requests.post(
+            url,
+            json={
+                "query": print_ast(getattr(query, "document", query)),
+                "variables": {"swhid": str(archive.root), "cursor": None},
+            },
+        )
+        download = requests.get(archive.get_content_url(large_hashes["sha1_git"]))
+        missing = requests.get(archive.get_content_url("0" * 40))
+
+    entries = response.json()["data"]["directory"]["entries"]
+    assert entries["totalCount"] == 24
+    assert entries["pageInfo"]["hasNextPage"]
+    first_target = entries["edges"][0]["node"]["target"]
+    sha1_git = first_target["swhid"].split(":")[-1]
+    assert first_target["node"] == {
+        "hashes": {"sha1": archive.contents[sha1_git][1]["sha1"]},
+        "length": len(archive.contents[sha1_git][0]),
+    }
+    assert download.content == large_data
+    assert missing.status_code == 404
+    assert archive.requests["Getdir"] == 1
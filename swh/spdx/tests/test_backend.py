@@ -0,0 +1,139 @@
+from unittest.mock import patch
+
+import pytest
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.backend import GraphQLBackend, InMemoryBackend, StorageBackend
+from swh.spdx.content import get_content_from_hashes
+from swh.spdx.node import Node
+from swh.spdx.tests.utils import make_directory_entries
+from swh.spdx.traverse import traverse_root
+
+ROOT = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+LIB = CoreSWHID.from_string("swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3")
+README = CoreSWHID.from_string("swh:1:cnt:791ff53442a421a68ff9db2e808522adfc4d93ca")
+LICENSE = CoreSWHID.from_string("swh:1:cnt:05058cca5546507ced02bad620cb7b856ebf5f63")
+
+README_HASHES = {
+    "sha1": "5e36830e75ea751e8d1323f4c5bdbfdd0143bdca",
+    "sha1_git": "791ff53442a421a68ff9db2e808522adfc4d93ca",
+}
+LICENSE_HASHES = {
+    "sha1": "0ec04e5f1e1826931ef4f9446dc0009b41224d1f",
+    "sha1_git": "05058cca5546507ced02bad620cb7b856ebf5f63",
+}
+
+
+class FakeStorage:
+    """Minimal stand-in of swh.storage, listing a tree with two copies of a
+    vendored library"""
+
+    def __init__(self):
+        self.directory_ls_calls = []
+
+    def directory_ls(self, directory, recursive=False):
+        self.directory_ls_calls.append((directory, recursive))
+        assert directory == ROOT.object_id and recursive
+
+        def file_entry(name, swhid, hashes):
+            return {
+                "type": "file",
+                "name": name,
+                "target": swhid.object_id,
+                **{key: bytes.fromhex(value) for key, value in hashes.items()},
+            }
+
+        def dir_entry(name):
+            return {"type": "dir", "name": name, "target": LIB.object_id}
+
+        return [
+            file_entry(b"README.md", README, README_HASHES),
+            dir_entry(b"vendor"),
+            dir_entry(b"third_party"),
+            file_entry(b"vendor/LICENSE", LICENSE, LICENSE_HASHES),
+            file_entry(b"third_party/LICENSE", LICENSE, LICENSE_HASHES),
+        ]
+
+    def content_get_data(self, content):
+        if content == bytes.fromhex(LICENSE_HASHES["sha1"]):
+            return b"MIT License\n"
+        return None
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_storage_backend_traversal(bulk: bool):
+    """
+    Tests that the storage backend lists the whole tree with a single
+    recursive directory_ls call
+    """
+    storage = FakeStorage()
+    node_collection = traverse_root(
+        Node(name="project", swhid=ROOT),
+        first_iteration=True,
+        bulk=bulk,
+        backend=StorageBackend(storage),
+        cache={},
+    )
+
+    assert len(storage.directory_ls_calls) == 1
+    assert [
+        [(child.path, child.swhid, child.checksums) for child in children]
+        for children in node_collection.values()
+    ] == [
+        [
+            ("project/README.md", README, README_HASHES),
+            ("project/vendor", LIB, {"sha1": LIB.object_id.hex()}),
+            ("project/third_party", LIB, {"sha1": LIB.object_id.hex()}),
+        ],
+        [("project/vendor/LICENSE", LICENSE, LICENSE_HASHES)],
+        [("project/third_party/LICENSE", LICENSE, LICENSE_HASHES)],
+    ]
+
+
+def test_storage_backend_content():
+    """
+    Tests the retrieval of contents from the storage
+    """
+    backend = StorageBackend(FakeStorage())
+    assert get_content_from_hashes(LICENSE_HASHES, backend=backend) == "MIT License\n"
+    with pytest.raises(ValueError):
+        get_content_from_hashes(README_HASHES, backend=backend)
+
+
+def test_in_memory_backend():
+    """
+    Tests the traversal and content retrieval with the in-memory backend
+    """
+    backend = InMemoryBackend(
+        directories={
+            ROOT: [
+                ["LICENSE", LICENSE, {"hashes": LICENSE_HASHES}],
+                ["lib", LIB, {"id": LIB.object_id.hex()}],
+            ],
+            LIB: [["README.md", README, {"hashes": README_HASHES}]],
+        },
+        contents={LICENSE_HASHES["sha1_git"]: "MIT License\n"},
+    )
+    node_collection = traverse_root(
+        Node(name="project", swhid=ROOT), first_iteration=True, backend=backend
+    )
+
+    assert [child.path for child in node_collection[next(iter(node_collection))]] == [
+        "project/LICENSE",
+        "project/lib",
+    ]
+    assert len(node_collection) == 2
+    assert get_content_from_hashes(LICENSE_HASHES, backend=backend) == "MIT License\n"
+    with pytest.raises(ValueError):
+        backend.get_directory_entries(README)
+
+
+@patch("swh.spdx.children.get_directory_entries")
+def test_graphql_backend(mock_get_directory_entries):
+    """
+    Tests that the GraphQL backend queries the GraphQL API
+    """
+    entries = make_directory_entries([["README.md", README, {"hashes": README_HASHES}]])
+    mock_get_directory_entries.return_value = entries
+    assert GraphQLBackend().get_directory_entries(ROOT) is entries
+    mock_get_directory_entries.assert_called_once_with(ROOT)
@@ -0,0 +1,181 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx import batch
+from swh.spdx.batch import process_roots
+from swh.spdx.cache import LRUCache
+from swh.spdx.cli import spdx_cli_group
+from swh.spdx.ratelimit import RateLimiter
+from swh.spdx.tests.utils import make_directory_entries
+
+RELEASE_SWHID = CoreSWHID.from_string(
+    "swh:1:rel:a9a4ae6d5d0f3c3b6f1e2c7e0a6c18d2c1cb5c1f"
+)
+MISSING_RELEASE_SWHID = CoreSWHID.from_string(
+    "swh:1:rel:1c5b04f6e9bc12ab0ab1ca1e3fa4a2ad1a97b1b4"
+)
+ROOT_SWHID = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+MISSING_ROOT_SWHID = CoreSWHID.from_string(
+    "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"
+)
+README_SWHID = CoreSWHID.from_string(
+    "swh:1:cnt:791ff53442a421a68ff9db2e808522adfc4d93ca"
+)
+
+
+@patch("swh.spdx.children.get_directory_entries")
+@patch("swh.spdx.batch.resolve_root_directories")
+def test_process_roots(mock_resolve, mock_get_directory_entries, tmp_path):
+    """
+    Tests that process_roots writes one SPDX document per root and reports
+    the roots that could not be traversed
+    """
+    mock_resolve.return_value = {
+        RELEASE_SWHID: ROOT_SWHID,
+        MISSING_RELEASE_SWHID: MISSING_ROOT_SWHID,
+    }
+    entries = {
+        ROOT_SWHID: [
+            [
+                "README.md",
+                README_SWHID,
+                {
+                    "hashes": {
+                        "sha1": "5e36830e75ea751e8d1323f4c5bdbfdd0143bdca",
+                        "sha1_git": "791ff53442a421a68ff9db2e808522adfc4d93ca",
+                    }
+                },
+            ]
+        ]
+    }
+    mock_get_directory_entries.side_effect = lambda swhid: make_directory_entries(
+        entries[swhid]
+    )
+    cache: dict = {}
+    results = process_roots(
+        [RELEASE_SWHID, MISSING_RELEASE_SWHID], str(tmp_path), cache=cache
+    )
+
+    assert results[0]["error"] is None
+    assert results[0]["nodes"] == 2
+    with open(results[0]["document"]) as document_file:
+        document = json.load(document_file)
+    assert document["files"][0]["fileName"] == "./README.md"
+    assert results[1]["error"] is not None
+    assert list(cache) == [ROOT_SWHID]
+
+
+def test_rate_limiter():
+    """
+    Tests that the rate limiter allows a burst then waits for new tokens
+    """
+    rate_limiter = RateLimiter(rate=50, burst=2)
+    assert rate_limiter.try_acquire() == 0
+    assert rate_limiter.try_acquire() == 0
+    assert rate_limiter.try_acquire() > 0
+    start = time.monotonic()
+    rate_limiter.acquire()
+    assert time.monotonic() - start > 0.01
+
+
+@patch("swh.spdx.batch.run_batch")
+def test_cli_batch(mock_run_batch, tmp_path):
+    """
+    Tests the batch command reads the SWHIDs and reports the summary
+    """
+    mock_run_batch.return_value = {"succeeded": 1, "failed": 0, "seconds": 1.5}
+    swhids_file = tmp_path / "swhids.txt"
+    swhids_file.write_text(f"# releases\n{RELEASE_SWHID}\n\n")
+    output_dir = os.path.join(tmp_path, "output")
+    result = CliRunner().invoke(
+        spdx_cli_group,
+        ["batch", str(swhids_file), "-o", output_dir, "-p", "2", "--rate-limit", "5"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "1 roots processed, 0 failed" in result.output
+    mock_run_batch.assert_called_once_with(
+        [RELEASE_SWHID],
+        output_dir,
+        processes=2,
+        concurrency=4,
+        rate_limit=5.0,
+        profile=False,
+        max_in_flight=None,
+        http2=False,
+        limits=None,
+    )
+
+
+@patch("swh.spdx.children.get_directory_entries")
+@patch("swh.spdx.batch.resolve_root_directories")
+def test_process_roots_limits(mock_resolve, mock_get_directory_entries, tmp_path):
+    """
+    Tests that the roots exceeding their budget get a partial document and are
+    reported as truncated
+    """
+    mock_resolve.return_value = {RELEASE_SWHID: ROOT_SWHID}
+    results = process_roots([RELEASE_SWHID], str(tmp_path), limits={"max_nodes": 0})
+
+    assert results[0]["error"] is None
+    assert results[0]["truncated"] == "nodes"
+    assert results[0]["nodes"] == 1
+    assert os.path.exists(results[0]["document"])
+    mock_get_directory_entries.assert_not_called()
+
+
+@patch("swh.spdx.children.get_directory_entries")
+@patch("swh.spdx.batch.resolve_root_directories")
+def test_worker_cache(mock_resolve, mock_get_directory_entries, tmp_path, monkeypatch):
+    """
+    Tests that each worker caches the directory entries in its own bounded
+    cache, evicting the least recently used ones
+    """
+    monkeypatch.setattr(batch, "_worker_cache", None)
+    monkeypatch.setattr(batch, "_worker_limits", None)
+    mock_resolve.side_effect = lambda swhids, errors: {
+        swhid: ROOT_SWHID for swhid in swhids
+    }
+    mock_get_directory_entries.return_value = make_directory_entries([])
+    batch.init_worker(1000, None)
+
+    batch.process_roots_in_worker([RELEASE_SWHID], str(tmp_path), 1)
+    batch.process_roots_in_worker([MISSING_RELEASE_SWHID], str(tmp_path), 1)
+
+    assert isinstance(batch._worker_cache, LRUCache)
+    assert batch._worker_cache.max_bytes == 1000
+    assert list(batch._worker_cache) == [ROOT_SWHID]
+    assert mock_get_directory_entries.call_count == 1
+
+
+@patch("swh.spdx.children.get_directory_entries")
+@patch("swh.spdx.batch.resolve_root_directories")
+def test_process_roots_unresolved(mock_resolve, mock_get_directory_entries, tmp_path):
+    """
+    Tests that the SWHIDs which can not be resolved are reported as failed
+    without failing the other roots of the chunk
+    """
+
+    def resolve(swhids, errors):
+        if len(swhids) > 1:
+            raise ValueError("Object not found")
+        if swhids == [MISSING_RELEASE_SWHID]:
+            raise ValueError(f"{MISSING_RELEASE_SWHID} not found")
+        return {swhid: ROOT_SWHID for swhid in swhids}
+
+    mock_resolve.side_effect = resolve
+    mock_get_directory_entries.return_value = make_directory_entries([])
+    results = process_roots([MISSING_RELEASE_SWHID, RELEASE_SWHID], str(tmp_path))
+
+    assert [result["swhid"] for result in results] == [
+        str(MISSING_RELEASE_SWHID),
+        str(RELEASE_SWHID),
+    ]
+    assert results[0]["error"] == f"ValueError: {MISSING_RELEASE_SWHID} not found"
+    assert results[1]["error"] is None
+    assert results[1]["directory"] == str(ROOT_SWHID)
@@ -0,0 +1,194 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from swh.spdx.budget import Budget, BudgetExceeded, charge_request, use_budget
+from swh.spdx.content import get_content_from_hashes, get_contents_from_nodes
+from swh.spdx.node import Node
+from swh.spdx.tests.archive import FakeArchive
+from swh.spdx.tests.utils import make_content
+from swh.spdx.traverse import traverse_root, traverse_root_concurrent
+
+
+def test_budget_limits():
+    """
+    Tests that a budget stops the job once a limit is reached, reporting the
+    first limit reached
+    """
+    budget = Budget(max_requests=2, max_bytes=10)
+    budget.charge_request()
+    budget.charge_bytes(10)
+    budget.charge_request()
+    with pytest.raises(BudgetExceeded, match="requests"):
+        budget.charge_request()
+    with pytest.raises(BudgetExceeded, match="requests"):
+        budget.charge_bytes(1)
+
+    assert budget.truncated
+    assert budget.get_state() == {
+        "nodes": 0,
+        "requests": 2,
+        "bytes": 11,
+        "exceeded": "requests",
+    }
+
+    budget = Budget(timeout=0.01)
+    budget.check()
+    time.sleep(0.02)
+    with pytest.raises(BudgetExceeded, match="time"):
+        budget.check()
+
+
+def test_use_budget():
+    """
+    Tests that only the requests sent while a budget is used are charged to it
+    """
+    budget = Budget()
+    charge_request()
+    with use_budget(budget):
+        charge_request()
+        with use_budget(None) as current_budget:
+            assert current_budget is budget
+            charge_request()
+    charge_request()
+
+    assert budget.requests == 2
+
+
+@pytest.mark.parametrize(
+    "limits,reason",
+    [({"max_nodes": 100}, "nodes"), ({"max_requests": 5}, "requests")],
+)
+def test_traverse_root_budget(limits, reason):
+    """
+    Tests that a traversal exceeding its budget returns the directories
+    traversed until then
+    """
+    archive = FakeArchive(depth=3)
+    budget = Budget(**limits)
+
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        node_collection = traverse_root(
+            Node(name="root", swhid=archive.root), first_iteration=True, budget=budget
+        )
+
+    assert budget.exceeded == reason
+    assert 0 < len(node_collection) < archive.count_nodes()
+    assert budget.nodes == sum(len(children) for children in node_collection.values())
+    assert budget.nodes < 100 + 24
+    assert archive.requests["Getdir"] == budget.requests
+
+
+def test_get_contents_budget():
+    """
+    Tests that the contents fetched until the bytes budget is exceeded are
+    returned
+    """
+    archive = FakeArchive(depth=0, content_count=8)
+    node_collection = traverse_root(
+        Node(name="root", swhid=archive.root),
+        first_iteration=True,
+        backend=archive.get_backend(),
+    )
+    nodes = node_collection[next(iter(node_collection))]
+    budget = Budget(max_bytes=1000)
+
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        contents = get_contents_from_nodes(nodes, budget=budget)
+
+    assert budget.exceeded == "bytes"
+    assert 0 < len(contents) < len(nodes)
+    assert budget.bytes >= 1000
+
+
+def test_concurrent_jobs_budgets():
+    """
+    Tests that a job waiting on a directory fetched by a job exceeding its
+    budget fetches the directory within its own budget
+    """
+    archive = FakeArchive(depth=2)
+    started = threading.Event()
+    release = threading.Event()
+
+    def execute(query, variable_values=None, **kwargs):
+        # Holds the first page of the root until both jobs asked for it
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        return archive.execute(query, variable_values)
+
+    limited, unlimited = Budget(max_requests=1), Budget()
+
+    def traverse(budget):
+        return traverse_root(
+            Node(name="root", swhid=archive.root),
+            first_iteration=True,
+            cache={},
+            budget=budget,
+        )
+
+    with patch("gql.Client.execute", side_effect=execute):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(traverse, limited)
+            started.wait(5)
+            second = executor.submit(traverse, unlimited)
+            time.sleep(0.1)
+            release.set()
+            limited_collection, unlimited_collection = first.result(), second.result()
+
+    assert limited.exceeded == "requests"
+    assert limited_collection == {}
+    assert not unlimited.truncated
+    assert unlimited.nodes == archive.count_nodes() - 1
+    assert (
+        sum(len(children) for children in unlimited_collection.values())
+        == archive.count_nodes() - 1
+    )
+
+
+@patch("gql.Client.execute")
+def test_text_content_bytes(mock_execute):
+    """
+    Tests that the bytes of the text contents are charged, not their characters
+    """
+    mock_execute.return_value = {
+        "contentByHashes": {
+            "data": {"url": "https://example.org", "raw": {"text": "é€"}}
+        }
+    }
+    budget = Budget()
+
+    with use_budget(budget):
+        assert get_content_from_hashes(make_content(1)[1]) == "é€"
+
+    assert budget.bytes == 5
+
+
+@pytest.mark.parametrize(
+    "limits,reason",
+    [({"max_nodes": 100}, "nodes"), ({"max_requests": 5}, "requests")],
+)
+def test_traverse_root_concurrent_budget(limits, reason):
+    """
+    Tests that a concurrent traversal charges the nodes and the requests of its
+    workers to its budget, and returns the directories traversed until it is
+    exceeded
+    """
+    archive = FakeArchive(depth=3)
+    budget = Budget(**limits)
+
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        node_collection = traverse_root_concurrent(
+            Node(name="root", swhid=archive.root), max_workers=4, budget=budget
+        )
+
+    assert budget.exceeded == reason
+    assert 0 < len(node_collection) < archive.count_nodes()
+    assert budget.nodes >= sum(len(children) for children in node_collection.values())
+    assert archive.requests["Getdir"] == budget.requests
+    for children in node_collection.values():
+        for child in children:
+            assert child.path.startswith("root/")
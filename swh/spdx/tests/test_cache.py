@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.cache import LRUCache
+from swh.spdx.children import get_child
+from swh.spdx.content import get_content_from_hashes
+from swh.spdx.tests.utils import make_directory_entries
+
+
+def test_lru_eviction():
+    """
+    Tests that the least recently used values are evicted when over budget.
+    """
+    cache = LRUCache(max_bytes=10)
+    cache["a"] = "aaaa"
+    cache["b"] = "bbbb"
+    assert cache.get("a") == "aaaa"
+    cache["c"] = "cccc"
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.nbytes == 8
+    # Values larger than the whole cache are not kept
+    cache["d"] = "d" * 11
+    assert "d" not in cache
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 0,
+        "hit_ratio": 1.0,
+        "evictions": 1,
+        "items": 2,
+        "bytes": 8,
+    }
+
+
+def test_lru_max_items_and_invalidation():
+    """
+    Tests the item limit and the invalidation of cached values.
+    """
+    cache = LRUCache(max_items=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["c"] = 3
+
+    assert list(cache) == ["b", "c"]
+    assert cache.invalidate("b")
+    assert not cache.invalidate("b")
+    assert cache.get("b") is None
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+    assert cache.stats()["misses"] == 1
+
+
+@patch("swh.spdx.children.get_directory_entries")
+def test_get_child_with_lru_cache(mock_get_entries):
+    """
+    Tests that get_child only fetches the entries of a directory once.
+    """
+    swhid = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+    entries = make_directory_entries(
+        [
+            [
+                "README.md",
+                "swh:1:cnt:d64a256e7816aa1c8bcda766597b3ae8dca0eabc",
+                {"hashes": {"sha1_git": "d64a256e7816aa1c8bcda766597b3ae8dca0eabc"}},
+            ]
+        ]
+    )
+    mock_get_entries.return_value = entries
+    cache = LRUCache()
+
+    first = get_child(swhid, "logtree", cache=cache)
+    second = get_child(swhid, "logtree", cache=cache)
+
+    assert first == second
+    mock_get_entries.assert_called_once_with(swhid)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.nbytes == entries.nbytes > 0
+
+
+@patch("swh.spdx.content.fetch_content_from_hashes")
+def test_get_content_with_lru_cache(mock_fetch):
+    """
+    Tests that contents are cached by sha1_git.
+    """
+    mock_fetch.return_value = "MIT License\n"
+    checksums = {
+        "sha1": "08b0b931d7d7566b7d88b712ff38e04e129331ad",
+        "sha1_git": "d64a256e7816aa1c8bcda766597b3ae8dca0eabc",
+    }
+    cache = LRUCache()
+
+    assert get_content_from_hashes(checksums, cache=cache) == "MIT License\n"
+    assert get_content_from_hashes(checksums, cache=cache) == "MIT License\n"
+
+    mock_fetch.assert_called_once_with(checksums, backend=None)
+    assert cache.get("d64a256e7816aa1c8bcda766597b3ae8dca0eabc") == "MIT License\n"
@@ -3,7 +3,12 @@ from unittest.mock import patch
 import pytest
 
 from swh.model.swhids import CoreSWHID, ObjectType
-from swh.spdx.children import get_child
+from swh.spdx.children import (
+    get_cached_directory_entries,
+    get_child,
+    get_directory_entries,
+)
+from swh.spdx.query import get_query_children
 
 
 @patch("gql.Client.execute")
@@ -487,3 +492,80 @@ def test_get_child_invalid_swhid(
             invalid_dir_swhid,
             "test_string",  # to invoke the exception used "test_string" as dir_name argument
         )
+
+
+@patch("gql.Client.execute")
+def test_get_directory_entries_selected_fields(mock_get):
+    """
+    Test case for retrieving only the sha1 checksum and the length of the entries.
+    """
+    from graphql import print_ast
+
+    mock_get.return_value = {
+        "directory": {
+            "swhid": "swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324",
+            "entries": {
+                "totalCount": 1,
+                "pageInfo": {"endCursor": "MA==", "hasNextPage": False},
+                "edges": [
+                    {
+                        "node": {
+                            "name": {"text": "README.md"},
+                            "target": {
+                                "swhid": "swh:1:cnt:d64a256e7816aa1c8bcda766597b3ae8dca0eabc",  # noqa
+                                "node": {
+                                    "hashes": {
+                                        "sha1": "08b0b931d7d7566b7d88b712ff38e04e129331ad"  # noqa
+                                    },
+                                    "length": 42,
+                                },
+                            },
+                        }
+                    }
+                ],
+            },
+        }
+    }
+    entries = get_directory_entries(
+        CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324"),
+        fields=("length", "sha1"),
+    )
+
+    assert entries.get_checksums(0) == {
+        "sha1": "08b0b931d7d7566b7d88b712ff38e04e129331ad"
+    }
+    assert entries.get_length(0) == 42
+    query = mock_get.call_args[0][0]
+    assert query is get_query_children(("sha1", "length"))
+    query_text = print_ast(getattr(query, "document", query))
+    assert "sha1\n" in query_text
+    assert "length" in query_text
+    assert "sha256" not in query_text
+    assert "sha1_git" not in query_text
+    with pytest.raises(ValueError):
+        get_query_children(("md5",))
+
+
+@patch("swh.spdx.children.get_directory_entries")
+def test_get_cached_directory_entries_fields(mock_get):
+    """
+    Test case for caching the entries retrieved with other fields separately.
+    """
+    dir_swhid = CoreSWHID.from_string(
+        "swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324"
+    )
+    cache: dict = {}
+
+    default_entries = get_cached_directory_entries(dir_swhid, cache=cache)
+    length_entries = get_cached_directory_entries(
+        dir_swhid, cache=cache, fields=("length", "sha1")
+    )
+    get_cached_directory_entries(dir_swhid, cache=cache, fields=["sha1", "length"])
+
+    assert mock_get.call_count == 2
+    mock_get.assert_any_call(dir_swhid)
+    mock_get.assert_any_call(dir_swhid, fields=("sha1", "length"))
+    assert cache == {
+        dir_swhid: default_entries,
+        (dir_swhid, ("sha1", "length")): length_entries,
+    }
@@ -0,0 +1,109 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from swh.spdx.concurrency import ConcurrencyController, is_congestion_error
+from swh.spdx.connection import (
+    execute_query,
+    get_batch_size,
+    set_concurrency_controller,
+)
+
+
+class ServerError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+@pytest.fixture
+def controller():
+    controller = ConcurrencyController(max_limit=4, max_batch_size=8)
+    set_concurrency_controller(controller)
+    yield controller
+    set_concurrency_controller(None)
+
+
+def test_additive_increase_multiplicative_decrease():
+    """
+    Tests that the limit grows with successes and halves on congestion
+    """
+    controller = ConcurrencyController(max_limit=4)
+    for _ in range(10):
+        controller.acquire()
+        controller.release(1, 0.01)
+    assert controller.limit == 4
+    assert controller.in_flight == 0
+
+    controller.acquire()
+    controller.release(1, 0.01, error=ServerError(429))
+    assert controller.limit == 2
+    # The queries sent before the decrease do not decrease the limit again
+    controller.release(0, 0.01, error=ServerError(503))
+    assert controller.limit == 2
+    assert controller.congestions == 1
+
+    # Errors of the queries themselves are not congestion
+    controller.release(0, 0.0, error=ValueError("Object not found"))
+    assert controller.limit == 2
+    assert not is_congestion_error(ServerError(400))
+
+
+def test_latency_congestion():
+    """
+    Tests that a query much slower than the fastest ones decreases the limit
+    """
+    controller = ConcurrencyController(max_limit=8, initial_limit=8)
+    for latency in (0.01, 0.02, 0.1):
+        controller.acquire()
+        controller.release(1, latency)
+    assert controller.limit == 4
+    # Latencies are compared by cost unit
+    controller.acquire(10)
+    controller.release(10, 0.2)
+    assert controller.limit > 4
+    assert controller.congestions == 1
+
+
+def test_acquire_waits_for_capacity():
+    """
+    Tests that queries wait until the queries in flight leave room for them
+    """
+    controller = ConcurrencyController(max_limit=1)
+    controller.acquire()
+    acquired = threading.Event()
+
+    def acquire():
+        controller.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    time.sleep(0.05)
+    assert not acquired.is_set()
+    controller.release(1, 0.01)
+    thread.join(5)
+    assert acquired.is_set()
+    assert controller.in_flight == 1
+
+
+def test_execute_query_with_controller(controller):
+    """
+    Tests that the queries report their outcome and batches shrink on congestion
+    """
+    client = Mock()
+    client.execute.return_value = {"directory": None}
+    assert execute_query(client, "query", {"swhid": "swh:1:dir:0"}) == {
+        "directory": None
+    }
+    assert controller.successes == 1
+    assert get_batch_size(50) == 8
+
+    client.execute.side_effect = ServerError(429)
+    with pytest.raises(ServerError):
+        execute_query(client, "query", {"s0": "swh:1:rev:0"}, cost=8)
+    assert controller.in_flight == 0
+    assert controller.limit == 1
+    assert get_batch_size(50) == 4
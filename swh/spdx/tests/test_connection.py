@@ -0,0 +1,66 @@
+import httpx
+import pytest
+from requests.exceptions import HTTPError
+
+from swh.spdx import http2
+from swh.spdx.connection import (
+    download_text,
+    get_accept_encoding,
+    get_graphql_client,
+    get_json_deserializer,
+    iter_download,
+    set_http2,
+)
+
+CONTENT_URL = "https://archive.softwareheritage.org/api/1/content/sha1:0/raw/"
+
+
+@pytest.fixture
+def http_client(monkeypatch):
+    """
+    Shared HTTP client answering with fake contents
+    """
+
+    def handler(request):
+        if request.url.path.endswith("/missing/raw/"):
+            return httpx.Response(404)
+        return httpx.Response(200, content=b"MIT License\n" * 3)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http2, "_http_client", client)
+    set_http2(True)
+    yield client
+    set_http2(False)
+
+
+def test_http2_transport_shares_client(http_client):
+    """
+    Tests that the GraphQL transports reuse the shared client and keep it open
+    """
+    transports = [get_graphql_client().transport for _ in range(2)]
+    for transport in transports:
+        assert isinstance(transport, http2.SharedHTTPXTransport)
+        transport.connect()
+        assert transport.client is http_client
+        transport.close()
+    assert not http_client.is_closed
+
+
+def test_http2_downloads(http_client):
+    """
+    Tests the downloads of contents with the shared client
+    """
+    assert download_text(CONTENT_URL) == "MIT License\n" * 3
+    assert b"".join(iter_download(CONTENT_URL, chunk_size=12)) == (b"MIT License\n" * 3)
+    with pytest.raises(HTTPError):
+        download_text(CONTENT_URL.replace("/raw/", "/missing/raw/"))
+
+
+def test_response_decoding():
+    """
+    Tests the negotiation of compressed responses and their JSON decoder
+    """
+    encodings = get_accept_encoding().split(", ")
+    assert encodings[:2] == ["gzip", "deflate"]
+    assert set(encodings) <= {"gzip", "deflate", "br", "zstd"}
+    assert get_json_deserializer()(b'{"directory": null}') == {"directory": None}
@@ -1,8 +1,21 @@
-from unittest.mock import patch
+import codecs
+from unittest.mock import Mock, patch
 
 import pytest
 
-from swh.spdx.content import get_content_from_hashes
+from swh.model.swhids import CoreSWHID
+from swh.spdx.backend import InMemoryBackend
+from swh.spdx.content import (
+    decode_content,
+    get_content_data_from_hashes,
+    get_content_from_hashes,
+    get_contents_from_nodes,
+    is_binary,
+)
+from swh.spdx.document import get_spdx_document
+from swh.spdx.node import Node
+from swh.spdx.tests.archive import FakeArchive
+from swh.spdx.traverse import traverse_root
 
 
 @pytest.fixture
@@ -61,3 +74,273 @@ def test_non_empty_content(mock, non_empty_content_object_hashes: dict):
     }
     text_content = get_content_from_hashes(non_empty_content_object_hashes)
     assert text_content == "a_cv2_text_effects\n"
+
+
+@patch("swh.spdx.content.get_content_from_hashes")
+def test_get_contents_from_nodes_deduplicated(
+    mock_get_content, empty_content_object_hashes: dict
+):
+    """
+    Tests that get_contents_from_nodes fetches and scans each unique content
+    once and shares the result between all the nodes having it
+    """
+    license_swhid = CoreSWHID.from_string(
+        "swh:1:cnt:05058cca5546507ced02bad620cb7b856ebf5f63"
+    )
+    license_checksums = {
+        "sha1": "0ec04e5f1e1826931ef4f9446dc0009b41224d1f",
+        "sha1_git": "05058cca5546507ced02bad620cb7b856ebf5f63",
+    }
+    licenses = [
+        Node(
+            name="LICENSE",
+            swhid=license_swhid,
+            path=f"project/{vendor}/LICENSE",
+            checksums=license_checksums,
+        )
+        for vendor in ("libfoo", "libbar", "libbaz")
+    ]
+    empty = Node(
+        name="__init__.py",
+        swhid=CoreSWHID.from_string(
+            "swh:1:cnt:8b137891791fe96927ad78e64b0aad7bded08bdc"
+        ),
+        path="project/__init__.py",
+        checksums=empty_content_object_hashes,
+    )
+    directory = Node(
+        name="libfoo",
+        swhid=CoreSWHID.from_string(
+            "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"
+        ),
+    )
+    mock_get_content.side_effect = lambda checksums, **kwargs: (
+        "MIT License\n" if checksums is license_checksums else "\n"
+    )
+    scan = Mock(side_effect=lambda text: text.strip() or None)
+
+    results = get_contents_from_nodes(licenses + [empty, directory], scan=scan)
+
+    assert mock_get_content.call_count == 2
+    assert scan.call_count == 2
+    assert results == {
+        licenses[0]: "MIT License",
+        licenses[1]: "MIT License",
+        licenses[2]: "MIT License",
+        empty: None,
+    }
+
+
+@patch("gql.Client.execute")
+def test_content_data(mock, non_empty_content_object_hashes: dict):
+    """
+    Tests the get_content_data_from_hashes() on a small content
+    """
+    mock.return_value = {
+        "contentByHashes": {
+            "data": {
+                "url": "https://archive.softwareheritage.org/api/1/content/sha1:b6b52b421d2b70dc9091fcee8c4d64f151eb3690/raw/",  # noqa
+                "raw": {"base64": "YV9jdjJfdGV4dF9lZmZlY3RzCg=="},
+            }
+        }
+    }
+    data = get_content_data_from_hashes(non_empty_content_object_hashes)
+    assert data == b"a_cv2_text_effects\n"
+
+
+@patch("requests.get")
+@patch("gql.Client.execute")
+def test_large_binary_content_skipped(
+    mock_execute, mock_download, non_empty_content_object_hashes: dict
+):
+    """
+    Tests that the download of a large binary content stops after its first bytes
+    """
+    mock_execute.return_value = {
+        "contentByHashes": {
+            "data": {
+                "url": "https://archive.softwareheritage.org/api/1/content/sha1:b6b52b421d2b70dc9091fcee8c4d64f151eb3690/raw/",  # noqa
+                "raw": None,
+            }
+        }
+    }
+    chunks = [b"PK\x03\x04\0\0" + b"x" * 65530, b"y" * 65536]
+    response = mock_download.return_value.__enter__.return_value
+    response.status_code = 200
+    response.iter_content.return_value = iter(chunks)
+
+    data = get_content_data_from_hashes(
+        non_empty_content_object_hashes, skip_binary=True
+    )
+
+    assert data is None
+    response.iter_content.return_value = iter(chunks)
+    assert get_content_data_from_hashes(non_empty_content_object_hashes) == b"".join(
+        chunks
+    )
+
+
+def test_is_binary():
+    """
+    Tests the detection of binary data from its first bytes
+    """
+    assert not is_binary(b"MIT License\n")
+    assert is_binary(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR")
+    assert not is_binary(b"x" * 8000 + b"\0")
+    assert not is_binary("MIT License\n".encode("utf-16"))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "Copyright © 2024\n".encode(),
+        "Copyright © 2024\n".encode("utf-8-sig"),
+        "Copyright © 2024\n".encode("utf-16"),
+        codecs.BOM_UTF16_BE + "Copyright © 2024\n".encode("utf-16-be"),
+        "Copyright © 2024\n".encode("utf-32"),
+        "Copyright © 2024\n".encode("latin-1"),
+    ],
+)
+def test_decode_content(data):
+    """
+    Tests that the encoding of the texts is detected from their byte order mark,
+    UTF-8 being tried before the fallback encoding
+    """
+    assert decode_content(data) == "Copyright © 2024\n"
+
+
+def test_get_contents_from_nodes_raw(non_empty_content_object_hashes: dict):
+    """
+    Tests that only the text contents are decoded and scanned in raw mode
+    """
+    binary_checksums = dict(
+        non_empty_content_object_hashes,
+        sha1_git="05058cca5546507ced02bad620cb7b856ebf5f63",
+    )
+    text = Node(
+        name="LICENSE",
+        swhid=CoreSWHID.from_string(
+            "swh:1:cnt:eba78c7438d05474605f79d0a68affbf805e2309"
+        ),
+        path="project/LICENSE",
+        checksums=non_empty_content_object_hashes,
+    )
+    binary = Node(
+        name="logo.png",
+        swhid=CoreSWHID.from_string(
+            "swh:1:cnt:05058cca5546507ced02bad620cb7b856ebf5f63"
+        ),
+        path="project/logo.png",
+        checksums=binary_checksums,
+    )
+    backend = InMemoryBackend(
+        contents={
+            "eba78c7438d05474605f79d0a68affbf805e2309": "MIT License\n",
+            "05058cca5546507ced02bad620cb7b856ebf5f63": b"\x89PNG\r\n\x1a\n\0",
+        }
+    )
+    scan = Mock(side_effect=lambda text: text.strip())
+
+    results = get_contents_from_nodes(
+        [text, binary], scan=scan, backend=backend, raw=True
+    )
+
+    scan.assert_called_once_with("MIT License\n")
+    assert results == {text: "MIT License", binary: None}
+    assert get_contents_from_nodes([text, binary], backend=backend, raw=True) == {
+        text: b"MIT License\n",
+        binary: b"\x89PNG\r\n\x1a\n\0",
+    }
+
+
+@pytest.mark.parametrize("fields", [("length",), ("sha1_git",), ("sha256",)])
+def test_contents_with_selected_fields(fields):
+    """
+    Tests that the contents and documents of a traversal retrieving only some
+    of the checksums of the contents are built from the checksums retrieved
+    """
+    archive = FakeArchive(depth=0, files=4)
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        node_collection = traverse_root(
+            Node(name="root", swhid=archive.root), first_iteration=True, fields=fields
+        )
+        nodes = node_collection[next(iter(node_collection))]
+        contents = get_contents_from_nodes(nodes)
+        data = get_contents_from_nodes(nodes, raw=True)
+
+    assert contents == {
+        node: archive.contents[node.swhid.object_id.hex()][0].decode() for node in nodes
+    }
+    assert data == {
+        node: archive.contents[node.swhid.object_id.hex()][0] for node in nodes
+    }
+    document = get_spdx_document(node_collection)
+    assert len(document["files"]) == len(nodes)
+
+
+def test_skipped_binary_content_cached(non_empty_content_object_hashes: dict):
+    """
+    Tests that the binary contents skipped are cached, so that they are not
+    fetched again, unless their data is needed
+    """
+    backend = InMemoryBackend(
+        contents={
+            non_empty_content_object_hashes["sha1_git"]: b"\x89PNG\r\n\x1a\n\0",
+        }
+    )
+    cache: dict = {}
+
+    with patch.object(
+        backend, "get_content_data", wraps=backend.get_content_data
+    ) as mock_get_content_data:
+        for _ in range(2):
+            assert (
+                get_content_data_from_hashes(
+                    non_empty_content_object_hashes,
+                    backend=backend,
+                    cache=cache,
+                    skip_binary=True,
+                )
+                is None
+            )
+        assert mock_get_content_data.call_count == 1
+        assert (
+            get_content_data_from_hashes(
+                non_empty_content_object_hashes, backend=backend, cache=cache
+            )
+            == b"\x89PNG\r\n\x1a\n\0"
+        )
+        assert mock_get_content_data.call_count == 2
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_submodules_skipped(bulk, non_empty_content_object_hashes: dict):
+    """
+    Tests that the revisions of submodules, which are not contents, are not
+    fetched with the contents of a directory
+    """
+    root = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+    license_swhid = CoreSWHID.from_string(
+        "swh:1:cnt:eba78c7438d05474605f79d0a68affbf805e2309"
+    )
+    submodule_swhid = CoreSWHID.from_string(
+        "swh:1:rev:0000000000000000000000000000000000000001"
+    )
+    backend = InMemoryBackend(
+        directories={
+            root: [
+                ["LICENSE", license_swhid, {"hashes": non_empty_content_object_hashes}],
+                ["vendor", submodule_swhid, None],
+            ]
+        },
+        contents={license_swhid.object_id.hex(): "MIT License\n"},
+    )
+    node_collection = traverse_root(
+        Node(name="root", swhid=root), first_iteration=True, bulk=bulk, backend=backend
+    )
+    nodes = node_collection[next(iter(node_collection))]
+
+    assert [node.is_content for node in nodes] == [True, False]
+    assert get_contents_from_nodes(nodes, backend=backend) == {
+        nodes[0]: "MIT License\n"
+    }
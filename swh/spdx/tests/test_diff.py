@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+import pytest
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.diff import diff_roots
+from swh.spdx.node import Node
+
+OLD_ROOT = CoreSWHID.from_string("swh:1:dir:de0f1edd306d6e9fc67ddf9b741aa7b9954e21d9")
+NEW_ROOT = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+UNCHANGED_DIR = CoreSWHID.from_string(
+    "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"
+)
+OLD_SRC_DIR = CoreSWHID.from_string(
+    "swh:1:dir:6e73f50e8f1176fe1b5907ce973f14381008fa79"
+)
+NEW_SRC_DIR = CoreSWHID.from_string(
+    "swh:1:dir:6dd0504b43b4459d52e9f13f71a91cc0fc445a19"
+)
+DOCS_DIR = CoreSWHID.from_string("swh:1:dir:6436d2c9b06cf9bd9efb0b4e463c3fe6b868eadc")
+README = CoreSWHID.from_string("swh:1:cnt:791ff53442a421a68ff9db2e808522adfc4d93ca")
+OLD_MAIN = CoreSWHID.from_string("swh:1:cnt:bce1e1f42d45a425b828abf2e3b7c45cda6188ca")
+NEW_MAIN = CoreSWHID.from_string("swh:1:cnt:b1e56aad066fcff343882e830cefd0ce082f0ccf")
+SETUP = CoreSWHID.from_string("swh:1:cnt:05058cca5546507ced02bad620cb7b856ebf5f63")
+INDEX = CoreSWHID.from_string("swh:1:cnt:aa4046a1143322e93dd86f40861fa0be0b08f07e")
+
+
+def content_entry(name, swhid):
+    return [name, swhid, {"hashes": {"sha1_git": swhid.object_id.hex()}}]
+
+
+def directory_entry(name, swhid):
+    return [name, swhid, {"id": swhid.object_id.hex()}]
+
+
+ENTRIES = {
+    OLD_ROOT: [
+        directory_entry("unchanged", UNCHANGED_DIR),
+        directory_entry("src", OLD_SRC_DIR),
+        content_entry("setup.py", SETUP),
+    ],
+    NEW_ROOT: [
+        directory_entry("unchanged", UNCHANGED_DIR),
+        directory_entry("src", NEW_SRC_DIR),
+        directory_entry("docs", DOCS_DIR),
+    ],
+    OLD_SRC_DIR: [
+        content_entry("main.py", OLD_MAIN),
+        content_entry("README", README),
+    ],
+    NEW_SRC_DIR: [
+        content_entry("main.py", NEW_MAIN),
+        content_entry("README", README),
+    ],
+    DOCS_DIR: [content_entry("index.rst", INDEX)],
+}
+
+
+@patch("swh.spdx.children.get_directory_entries")
+def test_diff_roots(mock_get_directory_entries):
+    """
+    Tests diff_roots on two versions of a tree, with an unchanged subdirectory,
+    a modified one, an added one and a removed file
+    """
+    mock_get_directory_entries.side_effect = lambda swhid: ENTRIES[swhid]
+    diff = diff_roots(
+        Node(name="project", swhid=OLD_ROOT), Node(name="project", swhid=NEW_ROOT)
+    )
+
+    fetched = [call[0][0] for call in mock_get_directory_entries.call_args_list]
+    assert UNCHANGED_DIR not in fetched
+    assert [node.path for node in diff["added"]] == [
+        "project/docs",
+        "project/docs/index.rst",
+    ]
+    assert [node.path for node in diff["removed"]] == ["project/setup.py"]
+    assert [(old.swhid, new.swhid) for old, new in diff["modified"]] == [
+        (OLD_SRC_DIR, NEW_SRC_DIR),
+        (OLD_MAIN, NEW_MAIN),
+    ]
+    assert diff["modified"][1][1].path == "project/src/main.py"
+
+
+@patch("swh.spdx.children.get_directory_entries")
+def test_diff_roots_identical(mock_get_directory_entries):
+    """
+    Tests that diffing a root against itself does not fetch anything
+    """
+    diff = diff_roots(
+        Node(name="project", swhid=OLD_ROOT), Node(name="project", swhid=OLD_ROOT)
+    )
+    assert mock_get_directory_entries.call_count == 0
+    assert diff == {"added": [], "removed": [], "modified": []}
+
+
+def test_diff_roots_content_node():
+    """
+    Tests that diff_roots only accepts directory nodes
+    """
+    with pytest.raises(ValueError):
+        diff_roots(Node(name="README", swhid=README), Node(name="root", swhid=NEW_ROOT))
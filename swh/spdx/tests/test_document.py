@@ -0,0 +1,85 @@
+import hashlib
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.document import get_spdx_document, get_verification_code
+from swh.spdx.node import Node
+
+
+def test_get_verification_code():
+    """
+    Tests that the verification code does not depend on the order of the files
+    """
+    sha1s = [
+        "5e36830e75ea751e8d1323f4c5bdbfdd0143bdca",
+        "0ec04e5f1e1826931ef4f9446dc0009b41224d1f",
+    ]
+    expected = hashlib.sha1("".join(sorted(sha1s)).encode()).hexdigest()
+    assert get_verification_code(sha1s) == expected
+    assert get_verification_code(reversed(sha1s)) == expected
+
+
+def test_get_spdx_document():
+    """
+    Tests the SPDX document built from a small node collection
+    """
+    root = Node(
+        name="ipython-cosmos-0.1.5",
+        swhid=CoreSWHID.from_string(
+            "swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324"
+        ),
+        path="ipython-cosmos-0.1.5",
+    )
+    sub_directory = Node(
+        name="cosmos_sql",
+        swhid=CoreSWHID.from_string(
+            "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"
+        ),
+        path="ipython-cosmos-0.1.5/cosmos_sql",
+        checksums={"sha1": "504251e6894262e5f9c603a7178042e4034dfdc3"},
+    )
+    version = Node(
+        name="VERSION",
+        swhid=CoreSWHID.from_string(
+            "swh:1:cnt:9faa1b7a7339db85692f91ad4b922554624a3ef7"
+        ),
+        path="ipython-cosmos-0.1.5/cosmos_sql/VERSION",
+        checksums={
+            "sha1": "77ba406cbdaa641f1f4ca09902edf5f03a0e0a1e",
+            "sha256": "800cf1c0392b24de7c0a1c6ea6778ecb433dec71c49a150bce96a98477527b2f",  # noqa
+            "sha1_git": "9faa1b7a7339db85692f91ad4b922554624a3ef7",
+        },
+    )
+    document = get_spdx_document(
+        {root: [sub_directory], sub_directory: [version]},
+        created="2023-01-01T00:00:00Z",
+    )
+
+    assert document["spdxVersion"] == "SPDX-2.3"
+    assert document["creationInfo"]["created"] == "2023-01-01T00:00:00Z"
+    (package,) = document["packages"]
+    assert package["name"] == "ipython-cosmos-0.1.5"
+    assert package["externalRefs"][0]["referenceLocator"] == str(root.swhid)
+    assert package["packageVerificationCode"][
+        "packageVerificationCodeValue"
+    ] == get_verification_code(["77ba406cbdaa641f1f4ca09902edf5f03a0e0a1e"])
+    assert document["files"] == [
+        {
+            "SPDXID": "SPDXRef-File-1",
+            "fileName": "./cosmos_sql/VERSION",
+            "checksums": [
+                {
+                    "algorithm": "SHA1",
+                    "checksumValue": "77ba406cbdaa641f1f4ca09902edf5f03a0e0a1e",
+                },
+                {
+                    "algorithm": "SHA256",
+                    "checksumValue": "800cf1c0392b24de7c0a1c6ea6778ecb433dec71c49a150bce96a98477527b2f",  # noqa
+                },
+            ],
+            "licenseConcluded": "NOASSERTION",
+            "copyrightText": "NOASSERTION",
+        }
+    ]
+    assert [
+        relationship["relationshipType"] for relationship in document["relationships"]
+    ] == ["DESCRIBES", "CONTAINS"]
@@ -0,0 +1,99 @@
+import pytest
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.entries import DirectoryEntries
+
+
+@pytest.fixture
+def sample_edges():
+    """
+    Page of entries with a content and a directory, as returned by the server.
+    """
+    return [
+        {
+            "node": {
+                "name": {"text": "README.md"},
+                "target": {
+                    "swhid": "swh:1:cnt:d64a256e7816aa1c8bcda766597b3ae8dca0eabc",
+                    "node": {
+                        "hashes": {
+                            "sha1": "08b0b931d7d7566b7d88b712ff38e04e129331ad",
+                            "sha256": "3af77bd23c20924fcd0b2b5fcefd60d4c27a35f27c88de9bf5a9d69205afe083",  # noqa
+                            "sha1_git": "d64a256e7816aa1c8bcda766597b3ae8dca0eabc",
+                            "blake2s256": "0affbded2ce35080e559a3012c56f3a60833754bf96b7bad691c8e824e2a3853",  # noqa
+                        }
+                    },
+                },
+            }
+        },
+        {
+            "node": {
+                "name": {"text": "logtree"},
+                "target": {
+                    "swhid": "swh:1:dir:6e73f50e8f1176fe1b5907ce973f14381008fa79",
+                    "node": {"id": "6e73f50e8f1176fe1b5907ce973f14381008fa79"},
+                },
+            }
+        },
+    ]
+
+
+def test_add_page(sample_edges: list):
+    """
+    Tests the decoding of a page of entries into compact arrays.
+    """
+    entries = DirectoryEntries()
+    entries.add_page(sample_edges)
+
+    assert len(entries) == 2
+    assert entries.names == ["README.md", "logtree"]
+    assert not entries.is_directory(0)
+    assert entries.is_directory(1)
+    assert len(entries.checksums["sha256"]) == 2 * 32
+    assert entries.get_checksum(0, "sha1_git") == bytes.fromhex(
+        "d64a256e7816aa1c8bcda766597b3ae8dca0eabc"
+    )
+    assert entries.get_checksum(1, "sha256") is None
+    assert entries.get_checksums(1) == {
+        "sha1": "6e73f50e8f1176fe1b5907ce973f14381008fa79"
+    }
+    assert entries.get_swhid(0) == CoreSWHID.from_string(
+        "swh:1:cnt:d64a256e7816aa1c8bcda766597b3ae8dca0eabc"
+    )
+
+
+def test_iter(sample_edges: list):
+    """
+    Tests that iterating over the entries gives them back in the shape
+    returned by the server.
+    """
+    entries = DirectoryEntries()
+    entries.add_page(sample_edges)
+
+    assert list(entries) == [
+        [
+            edge["node"]["name"]["text"],
+            CoreSWHID.from_string(edge["node"]["target"]["swhid"]),
+            edge["node"]["target"]["node"],
+        ]
+        for edge in sample_edges
+    ]
+
+
+def test_lengths(sample_edges: list):
+    """
+    Tests that the lengths of contents are kept when they are retrieved.
+    """
+    from swh.spdx.node import Node
+
+    sample_edges[0]["node"]["target"]["node"]["length"] = 1234
+    entries = DirectoryEntries()
+    entries.add_page(sample_edges)
+
+    assert entries.get_length(0) == 1234
+    assert entries.get_length(1) is None
+    assert list(entries)[0][2]["length"] == 1234
+    assert [node.length for node in Node.from_entries(entries, "root")] == [
+        1234,
+        None,
+    ]
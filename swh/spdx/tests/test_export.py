@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+import pytest
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.export import export_traversal
+from swh.spdx.node import Node
+from swh.spdx.tests.utils import make_directory_entries
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+ROOT = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+SUB_DIRECTORY = CoreSWHID.from_string(
+    "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"
+)
+README = CoreSWHID.from_string("swh:1:cnt:791ff53442a421a68ff9db2e808522adfc4d93ca")
+VERSION = CoreSWHID.from_string("swh:1:cnt:9faa1b7a7339db85692f91ad4b922554624a3ef7")
+
+ENTRIES = {
+    ROOT: [
+        [
+            "README.md",
+            README,
+            {
+                "hashes": {
+                    "sha1": "5e36830e75ea751e8d1323f4c5bdbfdd0143bdca",
+                    "sha1_git": "791ff53442a421a68ff9db2e808522adfc4d93ca",
+                }
+            },
+        ],
+        [
+            "cosmos_sql",
+            SUB_DIRECTORY,
+            {"id": "504251e6894262e5f9c603a7178042e4034dfdc3"},
+        ],
+    ],
+    SUB_DIRECTORY: [
+        [
+            "VERSION",
+            VERSION,
+            {
+                "hashes": {
+                    "sha1": "77ba406cbdaa641f1f4ca09902edf5f03a0e0a1e",
+                    "sha256": "800cf1c0392b24de7c0a1c6ea6778ecb433dec71c49a150bce96a98477527b2f",  # noqa
+                    "sha1_git": "9faa1b7a7339db85692f91ad4b922554624a3ef7",
+                }
+            },
+        ]
+    ],
+}
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+@patch("swh.spdx.children.get_directory_entries")
+def test_export_traversal(mock_get_directory_entries, format, tmp_path):
+    """
+    Tests the columnar export of a traversal, written by batches of 2 rows
+    """
+    mock_get_directory_entries.side_effect = lambda swhid: make_directory_entries(
+        ENTRIES[swhid]
+    )
+    path = str(tmp_path / f"nodes.{format}")
+
+    row_count = export_traversal(
+        Node(name="cosmos", swhid=ROOT), path, format=format, batch_size=2
+    )
+
+    if format == "parquet":
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert row_count == table.num_rows == 4
+    assert table.column("path").to_pylist() == [
+        "cosmos",
+        "cosmos/README.md",
+        "cosmos/cosmos_sql",
+        "cosmos/cosmos_sql/VERSION",
+    ]
+    assert table.column("type").to_pylist() == ["dir", "cnt", "dir", "cnt"]
+    assert table.column("parent").to_pylist() == [None, 0, 0, 2]
+    assert table.column("sha1_git").to_pylist()[3] == bytes.fromhex(
+        "9faa1b7a7339db85692f91ad4b922554624a3ef7"
+    )
+    assert table.column("sha256").to_pylist()[1] is None
+    assert table.column("sha1").to_pylist() == [
+        None,
+        bytes.fromhex("5e36830e75ea751e8d1323f4c5bdbfdd0143bdca"),
+        None,
+        bytes.fromhex("77ba406cbdaa641f1f4ca09902edf5f03a0e0a1e"),
+    ]
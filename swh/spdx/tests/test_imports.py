@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import pytest
+
+# Dependencies which must only be imported on the first network call
+NETWORK_MODULES = ("aiohttp", "gql", "httpx", "requests", "swh.model")
+
+
+def get_loaded_modules(module: str) -> list:
+    """
+    Lists the network dependencies loaded when importing a module in a
+    fresh interpreter.
+
+    Args:
+        module (str): name of the module to import
+
+    Returns:
+        list: the network dependencies loaded
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; "
+            f"print(' '.join(m for m in {NETWORK_MODULES!r} if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "swh.spdx.node",
+        "swh.spdx.traverse",
+        "swh.spdx.diff",
+        "swh.spdx.document",
+        "swh.spdx.cli",
+    ],
+)
+def test_no_network_modules_imported(module):
+    """
+    Tests that the network dependencies are not loaded on import
+    """
+    assert get_loaded_modules(module) == []
@@ -0,0 +1,63 @@
+import pytest
+
+from swh.spdx.index import TreeIndex, write_tree_index
+from swh.spdx.tests.utils import LIB, make_content, make_node_collection
+
+
+@pytest.fixture
+def tree_index(tmp_path):
+    path = tmp_path / "project.index"
+    with open(path, "wb") as file:
+        assert write_tree_index(make_node_collection(), file) == 10
+    with TreeIndex.open(str(path)) as tree_index:
+        yield tree_index
+
+
+def test_lookup(tree_index):
+    """
+    Tests the lookup of nodes by path
+    """
+    assert len(tree_index) == 10
+    root = tree_index.lookup("project")
+    assert root.name == "project"
+    assert root.path == "project"
+    lib = tree_index.lookup("project/lib")
+    assert lib.swhid == LIB
+    assert lib.checksums == {"sha1": LIB.object_id.hex()}
+    readme = tree_index.lookup("project/lib/résumé.txt")
+    assert readme.name == "résumé.txt"
+    assert readme.swhid == make_content(10)[0]
+    assert readme.checksums == {"sha1_git": make_content(10)[1]["sha1_git"]}
+    assert tree_index.lookup("project/li") is None
+    assert "project/file4.c" in tree_index
+    assert "project/file5.c" not in tree_index
+    assert tree_index.get_parent("project/lib/file0.c").path == "project/lib"
+    assert tree_index.get_parent("project") is None
+
+
+def test_listings(tree_index):
+    """
+    Tests the listing of directories, the prefix listings and reverse lookups
+    """
+    assert [node.name for node in tree_index.list_directory("project")] == [
+        "empty",
+        "file0.c",
+        "file1.c",
+        "file2.c",
+        "file3.c",
+        "file4.c",
+        "lib",
+    ]
+    assert tree_index.list_directory("project/empty") == []
+    with pytest.raises(KeyError):
+        tree_index.list_directory("project/src")
+    assert [node.path for node in tree_index.iter_prefix("project/lib/")] == [
+        "project/lib/file0.c",
+        "project/lib/résumé.txt",
+    ]
+    assert tree_index.find_paths(make_content(1)[1]["sha1_git"]) == [
+        "project/file0.c",
+        "project/lib/file0.c",
+    ]
+    assert tree_index.find_paths(LIB.object_id) == ["project/lib"]
+    assert tree_index.find_paths(make_content(42)[0].object_id) == []
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from swh.spdx.budget import BudgetExceeded
+from swh.spdx.inflight import InFlightRequests
+
+
+def test_concurrent_requests_are_coalesced():
+    """
+    Tests that concurrent requests for the same key are only sent once.
+    """
+    requests = InFlightRequests()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        return "entries"
+
+    fetch_mock = Mock(side_effect=fetch)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(requests.run, "swh:1:dir:0", fetch_mock)
+        started.wait(5)
+        others = [
+            executor.submit(requests.run, "swh:1:dir:0", fetch_mock) for _ in range(3)
+        ]
+        # Wait until the other callers are blocked on the request in flight
+        while not all(future.running() for future in others):
+            time.sleep(0.01)
+        time.sleep(0.1)
+        release.set()
+        results = [first.result()] + [future.result() for future in others]
+
+    assert results == ["entries"] * 4
+    assert fetch_mock.call_count == 1
+    assert len(requests) == 0
+
+
+def test_failed_request_is_not_kept():
+    """
+    Tests that a failure is raised to the caller and the next call retries.
+    """
+    requests = InFlightRequests()
+
+    with pytest.raises(ValueError):
+        requests.run("swh:1:cnt:0", Mock(side_effect=ValueError("not found")))
+
+    assert len(requests) == 0
+    assert requests.run("swh:1:cnt:0", lambda: "text") == "text"
+
+
+def test_exceeded_budget_is_not_shared():
+    """
+    Tests that a caller waiting on a request whose sender exceeded its budget
+    sends the request itself.
+    """
+    requests = InFlightRequests()
+    started = threading.Event()
+    release = threading.Event()
+
+    def exceed():
+        started.set()
+        release.wait(5)
+        raise BudgetExceeded("requests")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(requests.run, "swh:1:dir:0", exceed)
+        started.wait(5)
+        second = executor.submit(requests.run, "swh:1:dir:0", lambda: "entries")
+        while not second.running():
+            time.sleep(0.01)
+        time.sleep(0.1)
+        release.set()
+
+        with pytest.raises(BudgetExceeded):
+            first.result()
+        assert second.result() == "entries"
+    assert len(requests) == 0
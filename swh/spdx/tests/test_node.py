@@ -4,6 +4,7 @@ import pytest
 
 from swh.model.swhids import CoreSWHID, ObjectType
 from swh.spdx.node import Node
+from swh.spdx.tests.utils import assert_node, make_directory_entries
 
 
 @pytest.fixture
@@ -194,3 +195,58 @@ def test_set_checksums(
         "sha1_git": "d057105f2bea6b982e6c526cab5dee920a6ee02b",
         "blake2s256": "c16e47ecfc279bb595443bcf2fb40d88c5e755be15a7d4bc377ea9dc5b313134",
     }
+
+
+def test_from_entries(
+    sample_directory_node_properties: list, sample_content_node_properties: list
+):
+    """
+    Test the `from_entries` method builds the same nodes as `set_checksums`
+    and `set_path`, decoding the SWHIDs lazily.
+    """
+    entries = make_directory_entries(
+        [
+            ["rfcreader"] + sample_directory_node_properties[:2],
+            ["rfcreader.py"] + sample_content_node_properties[:2],
+        ]
+    )
+    directory_node, content_node = Node.from_entries(entries, "rfcreader-0.4")
+
+    assert directory_node.is_directory is True
+    assert content_node.is_directory is False
+    assert content_node._swhid is None
+    for node, properties in [
+        (directory_node, sample_directory_node_properties),
+        (content_node, sample_content_node_properties),
+    ]:
+        expected_node = Node(
+            name=node.name, swhid=properties[0], path=f"rfcreader-0.4/{node.name}"
+        )
+        expected_node.set_checksums(properties)
+        assert assert_node(node, expected_node)
+
+
+def test_from_entries_parent_path(
+    sample_directory_node_properties: list, sample_content_node_properties: list
+):
+    """
+    Test that the paths of nodes built from the entries of a directory node are
+    only joined when accessed, as str or bytes.
+    """
+    entries = make_directory_entries(
+        [
+            ["rfcreader"] + sample_directory_node_properties[:2],
+            ["résumé.py"] + sample_content_node_properties[:2],
+        ]
+    )
+    root = Node(name="rfcreader-0.4", swhid=sample_directory_node_properties[0])
+    root.path = root.name
+    directory_node, _ = Node.from_entries(entries, root)
+    (_, content_node) = Node.from_entries(entries, directory_node)
+
+    assert content_node._path is None
+    assert content_node.path == "rfcreader-0.4/rfcreader/résumé.py"
+    assert content_node.path_bytes == "rfcreader-0.4/rfcreader/résumé.py".encode()
+    assert content_node.name is entries.names[1]
+    directory_node.path = "renamed"
+    assert content_node.path == "renamed/résumé.py"
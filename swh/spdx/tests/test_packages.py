@@ -0,0 +1,158 @@
+import json
+import os
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.backend import InMemoryBackend
+from swh.spdx.cli import spdx_cli_group
+from swh.spdx.document import get_spdx_document, get_verification_code
+from swh.spdx.node import Node
+from swh.spdx.packages import (
+    PackageDocumentGenerator,
+    SubtreeContents,
+    write_package_documents,
+)
+from swh.spdx.tests.utils import EMPTY, LIB, ROOT, make_content
+from swh.spdx.traverse import traverse_root
+
+SRC = CoreSWHID.from_string("swh:1:dir:0000000000000000000000000000000000000005")
+
+
+def make_backend() -> InMemoryBackend:
+    """
+    Builds a tree with a file, a library, a copy of the library and a source
+    directory containing the empty directory.
+    """
+    directory_entries = {}
+    contents = dict(enumerate(map(make_content, range(1, 5))))
+
+    def content_entry(name, index):
+        swhid, hashes = contents[index]
+        return [name, swhid, {"hashes": hashes}]
+
+    def directory_entry(name, swhid):
+        return [name, swhid, {"id": swhid.object_id.hex()}]
+
+    directory_entries[ROOT] = [
+        content_entry("README", 0),
+        directory_entry("lib", LIB),
+        directory_entry("vendor", LIB),
+        directory_entry("src", SRC),
+    ]
+    directory_entries[LIB] = [content_entry("lib.c", 1), content_entry("lib.h", 2)]
+    directory_entries[SRC] = [
+        content_entry("main.c", 3),
+        directory_entry("empty", EMPTY),
+    ]
+    directory_entries[EMPTY] = []
+    return InMemoryBackend(directories=directory_entries)
+
+
+def make_traversal() -> dict:
+    return traverse_root(
+        Node(name="project", swhid=ROOT), first_iteration=True, backend=make_backend()
+    )
+
+
+def test_subtree_contents():
+    """
+    Tests that the contents of each subtree are listed in traversal order
+    """
+    node_collection = make_traversal()
+    subtrees = SubtreeContents(node_collection)
+
+    assert [node.path for node in subtrees.contents] == [
+        node.path
+        for children in node_collection.values()
+        for node in children
+        if not node.is_directory
+    ]
+    lib, vendor, src = [
+        child for child in node_collection[subtrees.root] if child.is_directory
+    ]
+    assert [node.path for node in subtrees.get_contents(vendor)] == [
+        "project/vendor/lib.c",
+        "project/vendor/lib.h",
+    ]
+    assert [node.path for node in subtrees.get_contents(src)] == ["project/src/main.c"]
+    _, empty = node_collection[src]
+    assert subtrees.get_contents(empty) == []
+
+
+def test_get_documents():
+    """
+    Tests that the documents of the package and of its sub-packages are built
+    from a single traversal, with the verification codes of shared subtrees
+    computed once
+    """
+    node_collection = make_traversal()
+    generator = PackageDocumentGenerator(created="2023-01-01T00:00:00Z")
+
+    with patch(
+        "swh.spdx.aggregate.get_verification_code", wraps=get_verification_code
+    ) as mock_code:
+        documents = generator.get_documents(node_collection)
+
+    assert [package.name for package, _ in documents] == [
+        "project",
+        "lib",
+        "vendor",
+        "src",
+    ]
+    assert mock_code.call_count == 3
+    root, full_document = documents[0]
+    assert full_document == get_spdx_document(
+        node_collection, root, created="2023-01-01T00:00:00Z"
+    )
+    _, lib_document = documents[1]
+    assert [spdx_file["fileName"] for spdx_file in lib_document["files"]] == [
+        "./lib.c",
+        "./lib.h",
+    ]
+    assert lib_document["packages"][0]["externalRefs"][0]["referenceLocator"] == str(
+        LIB
+    )
+
+
+def test_write_package_documents(tmp_path):
+    """
+    Tests that the documents of several traversals are written once per
+    directory
+    """
+    paths = write_package_documents(
+        [make_traversal(), make_traversal()], str(tmp_path), max_workers=2
+    )
+
+    assert set(paths) == {ROOT, LIB, SRC}
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path) for path in paths.values()
+    )
+    with open(paths[SRC]) as document_file:
+        assert json.load(document_file)["name"] == "src"
+
+    paths = write_package_documents(
+        [make_traversal()], str(tmp_path), subpackages=False
+    )
+    assert list(paths) == [ROOT]
+
+
+@patch("swh.spdx.resolve.resolve_root_directories")
+@patch("swh.spdx.children.get_directory_entries")
+def test_cli_packages(mock_get_directory_entries, mock_resolve, tmp_path):
+    """
+    Tests that the packages command traverses each root once
+    """
+    backend = make_backend()
+    mock_get_directory_entries.side_effect = backend.get_directory_entries
+    mock_resolve.return_value = {ROOT: ROOT}
+    output_dir = os.path.join(tmp_path, "output")
+
+    result = CliRunner().invoke(
+        spdx_cli_group, ["packages", str(ROOT), "-o", output_dir]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "3 documents written" in result.output
+    assert mock_get_directory_entries.call_count == 4
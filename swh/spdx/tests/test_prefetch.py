@@ -0,0 +1,134 @@
+import threading
+from unittest.mock import patch
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.budget import Budget
+from swh.spdx.node import Node
+from swh.spdx.prefetch import LICENSE_PATTERNS, ContentPrefetcher
+from swh.spdx.tests.archive import FakeArchive
+from swh.spdx.tests.utils import ROOT, make_content
+from swh.spdx.traverse import traverse_root, traverse_root_concurrent
+
+
+def make_node(name: str) -> Node:
+    swhid, hashes = make_content(1)
+    return Node(name=name, swhid=swhid, checksums=hashes)
+
+
+def test_matches():
+    """
+    Tests that only the content nodes whose name matches a pattern are fetched
+    """
+    prefetcher = ContentPrefetcher(LICENSE_PATTERNS + ("*.c",))
+    assert prefetcher.matches(make_node("LICENSE.md"))
+    assert prefetcher.matches(make_node("COPYING"))
+    assert prefetcher.matches(make_node("main.c"))
+    assert not prefetcher.matches(make_node("main.cpp"))
+    assert not prefetcher.matches(Node(name="LICENSES", swhid=ROOT))
+    submodule = CoreSWHID.from_string(
+        "swh:1:rev:0000000000000000000000000000000000000001"
+    )
+    assert not ContentPrefetcher().matches(Node(name="LICENSE", swhid=submodule))
+    assert ContentPrefetcher().matches(make_node("main.cpp"))
+    prefetcher.close()
+
+
+def test_traverse_root_prefetch():
+    """
+    Tests that the contents of the matching files are fetched once per unique
+    content, and charged to the budget of the job
+    """
+    archive = FakeArchive(depth=2)
+    budget = Budget()
+
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        with ContentPrefetcher(["file1*.txt"], max_workers=2) as prefetcher:
+            node_collection = traverse_root(
+                Node(name="root", swhid=archive.root),
+                first_iteration=True,
+                budget=budget,
+                prefetcher=prefetcher,
+            )
+            results = prefetcher.get_results()
+
+    expected = {
+        node: archive.contents[node.checksums["sha1_git"]][0].decode()
+        for children in node_collection.values()
+        for node in children
+        if node.name.startswith("file1")
+    }
+    assert results == expected
+    unique_contents = {node.checksums["sha1_git"] for node in expected}
+    assert archive.requests["GetContent"] == len(unique_contents)
+    assert budget.requests == archive.requests["Getdir"] + len(unique_contents)
+
+
+def test_prefetch_during_traversal():
+    """
+    Tests that the contents are fetched while the traversal goes on, the
+    traversal of the subdirectories waiting here for the first content
+    """
+    archive = FakeArchive(depth=1, variants=1)
+    backend = archive.get_backend()
+    get_directory_entries = backend.get_directory_entries
+    scanned = threading.Event()
+
+    def wait_for_scan(dir_swhid):
+        if dir_swhid != archive.root:
+            assert scanned.wait(5)
+        return get_directory_entries(dir_swhid)
+
+    def scan(text):
+        scanned.set()
+        return len(text)
+
+    with patch.object(backend, "get_directory_entries", side_effect=wait_for_scan):
+        for traverse in (traverse_root, traverse_root_concurrent):
+            scanned.clear()
+            with ContentPrefetcher(
+                ["file0.txt"], scan=scan, backend=backend
+            ) as prefetcher:
+                if traverse is traverse_root:
+                    traverse_root(
+                        Node(name="root", swhid=archive.root),
+                        first_iteration=True,
+                        backend=backend,
+                        prefetcher=prefetcher,
+                    )
+                else:
+                    traverse_root_concurrent(
+                        Node(name="root", swhid=archive.root),
+                        backend=backend,
+                        prefetcher=prefetcher,
+                    )
+                results = prefetcher.get_results()
+            assert len(results) == 1 + 4
+            assert all(isinstance(result, int) for result in results.values())
+
+
+def test_close_cancels_pending_fetches():
+    """
+    Tests that closing the prefetcher cancels the fetches not started yet,
+    whose contents are left out of the results
+    """
+    archive = FakeArchive(depth=0, files=4, content_count=4, seed=1)
+    backend = archive.get_backend()
+    node_collection = traverse_root(
+        Node(name="root", swhid=archive.root), first_iteration=True, backend=backend
+    )
+    nodes = next(iter(node_collection.values()))
+    release = threading.Event()
+
+    def scan(text):
+        assert release.wait(5)
+        return len(text)
+
+    prefetcher = ContentPrefetcher(scan=scan, backend=backend, max_workers=1)
+    prefetcher.add_nodes(nodes)
+    # Releases the first fetch once the others are cancelled
+    threading.Timer(0.1, release.set).start()
+    prefetcher.close()
+    results = prefetcher.get_results()
+
+    assert len(results) >= 1
+    assert len({node.checksums["sha1_git"] for node in results}) == 1
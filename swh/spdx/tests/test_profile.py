@@ -0,0 +1,70 @@
+import pytest
+
+from swh.spdx import profile
+from swh.spdx.profile import (
+    NULL_STAGE,
+    Profiler,
+    disable_profiling,
+    enable_profiling,
+    format_report,
+)
+from swh.spdx.tests.utils import LIB, ROOT, make_node_collection
+
+
+@pytest.fixture
+def profiler():
+    yield enable_profiling()
+    disable_profiling()
+
+
+def test_disabled_profiling():
+    """
+    Tests that stages do nothing when profiling is disabled
+    """
+    assert profile.get_profiler() is None
+    assert profile.stage("query") is NULL_STAGE
+
+
+def test_traversal_profile(profiler):
+    """
+    Tests the timings of the stages of a traversal, by directory
+    """
+    make_node_collection()
+    report = profiler.get_report(slowest=2)
+
+    assert set(report["stages"]) == {"swhid", "nodes"}
+    assert report["stages"]["nodes"]["count"] == 3
+    assert len(report["slowest_directories"]) == 2
+    assert {directory for directory, _ in report["slowest_directories"]} <= {
+        str(ROOT),
+        str(LIB),
+        "swh:1:dir:4b825dc642cb6eb9a060e54bf8d69288fbee4904",
+    }
+    text = format_report(report)
+    assert text.splitlines()[0].split() == ["stage", "count", "seconds"]
+    assert "slowest directories:" in text
+
+
+def test_sampling_and_merge():
+    """
+    Tests that sampled timings are extrapolated and merged
+    """
+    sampled = Profiler(sample_every=4)
+    for _ in range(8):
+        with sampled.stage("decode", ROOT):
+            pass
+    state = sampled.get_state(reset=True)
+
+    assert state["stages"]["decode"][0] == 8
+    assert sampled.get_state()["stages"] == {}
+
+    merged = Profiler()
+    merged.add("decode", 0.5, LIB)
+    merged.merge(state)
+    report = merged.get_report()
+    assert report["stages"]["decode"]["count"] == 9
+    assert report["slowest_directories"][0] == [str(LIB), 0.5]
+    assert [directory for directory, _ in report["slowest_directories"]] == [
+        str(LIB),
+        str(ROOT),
+    ]
@@ -0,0 +1,176 @@
+from unittest.mock import patch
+
+import pytest
+
+from swh.model.swhids import CoreSWHID, ObjectType
+from swh.spdx.resolve import resolve_root_directories
+
+REVISION_SWHID = CoreSWHID.from_string(
+    "swh:1:rev:6dd0504b43b4459d52e9f13f71a91cc0fc445a19"
+)
+RELEASE_SWHID = CoreSWHID.from_string(
+    "swh:1:rel:a9a4ae6d5d0f3c3b6f1e2c7e0a6c18d2c1cb5c1f"
+)
+SNAPSHOT_SWHID = CoreSWHID.from_string(
+    "swh:1:snp:6436d2c9b06cf9bd9efb0b4e463c3fe6b868eadc"
+)
+DIRECTORY_SWHID = CoreSWHID.from_string(
+    "swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324"
+)
+
+
+def snapshot_branch(name: str, target: dict) -> dict:
+    return {"node": {"name": {"text": name}, "target": target}}
+
+
+@patch("gql.Client.execute")
+def test_resolve_root_directories(mock_execute):
+    """
+    Tests the resolution of revision, release, snapshot and directory SWHIDs
+    to root directories with batched queries, the HEAD branch of the snapshot
+    being an alias.
+    """
+    head_response = {
+        "o0": {
+            "directory": {"swhid": "swh:1:dir:de0f1edd306d6e9fc67ddf9b741aa7b9954e21d9"}
+        },
+        "o1": {
+            "target": {
+                "node": {
+                    "directory": {
+                        "swhid": "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"  # noqa
+                    }
+                }
+            }
+        },
+        "o2": {
+            "branches": {
+                "edges": [
+                    # Matches the name, but is not the HEAD branch
+                    snapshot_branch(
+                        "FETCH_HEAD",
+                        {
+                            "type": "revision",
+                            "resolveChain": None,
+                            "node": {
+                                "directory": {
+                                    "swhid": "swh:1:dir:de0f1edd306d6e9fc67ddf9b741aa7b9954e21d9"  # noqa
+                                }
+                            },
+                        },
+                    ),
+                    snapshot_branch(
+                        "HEAD",
+                        {
+                            "type": "alias",
+                            "resolveChain": [
+                                {"text": "HEAD"},
+                                {"text": "refs/heads/main"},
+                            ],
+                            "node": {},
+                        },
+                    ),
+                ]
+            }
+        },
+    }
+    main_response = {
+        "o0": {
+            "branches": {
+                "edges": [
+                    snapshot_branch(
+                        "refs/heads/main",
+                        {
+                            "type": "revision",
+                            "resolveChain": None,
+                            "node": {"directory": {"swhid": str(DIRECTORY_SWHID)}},
+                        },
+                    )
+                ]
+            }
+        }
+    }
+    mock_execute.side_effect = [head_response, main_response]
+    result = resolve_root_directories(
+        [REVISION_SWHID, RELEASE_SWHID, SNAPSHOT_SWHID, DIRECTORY_SWHID]
+    )
+    assert mock_execute.call_count == 2
+    assert mock_execute.call_args_list[0][0][1] == {
+        "s0": str(REVISION_SWHID),
+        "s1": str(RELEASE_SWHID),
+        "s2": str(SNAPSHOT_SWHID),
+        "b2": "HEAD",
+    }
+    # The HEAD alias is followed to the branch it points to
+    assert mock_execute.call_args_list[1][0][1] == {
+        "s0": str(SNAPSHOT_SWHID),
+        "b0": "refs/heads/main",
+    }
+    assert result == {
+        REVISION_SWHID: CoreSWHID.from_string(
+            "swh:1:dir:de0f1edd306d6e9fc67ddf9b741aa7b9954e21d9"
+        ),
+        RELEASE_SWHID: CoreSWHID.from_string(
+            "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"
+        ),
+        SNAPSHOT_SWHID: DIRECTORY_SWHID,
+        DIRECTORY_SWHID: DIRECTORY_SWHID,
+    }
+
+
+@patch("gql.Client.execute")
+def test_resolve_root_directories_batches(mock_execute):
+    """
+    Tests that objects are resolved by batches of at most batch_size objects.
+    """
+    mock_execute.side_effect = [
+        {
+            "o0": {
+                "directory": {
+                    "swhid": "swh:1:dir:de0f1edd306d6e9fc67ddf9b741aa7b9954e21d9"
+                }
+            },
+            "o1": {"target": {"node": {"swhid": str(DIRECTORY_SWHID)}}},
+        },
+        {"o0": {"branches": {"edges": []}}},
+    ]
+    with pytest.raises(ValueError):
+        resolve_root_directories(
+            [REVISION_SWHID, RELEASE_SWHID, SNAPSHOT_SWHID], batch_size=2
+        )
+    assert mock_execute.call_count == 2
+
+
+def test_resolve_root_directories_invalid_swhid():
+    """
+    Tests that content SWHIDs can not be resolved to root directories.
+    """
+    with pytest.raises(ValueError):
+        resolve_root_directories(
+            [
+                CoreSWHID(
+                    object_type=ObjectType.CONTENT,
+                    object_id=bytes.fromhex("6e73f50e8f1176fe1b5907ce973f14381008fa79"),
+                )
+            ]
+        )
+
+
+def test_resolve_root_directories_errors():
+    """
+    Tests that the errors of the SWHIDs which can not be resolved are reported
+    separately when requested.
+    """
+    content = CoreSWHID.from_string(
+        "swh:1:cnt:6e73f50e8f1176fe1b5907ce973f14381008fa79"
+    )
+    directory = CoreSWHID.from_string(
+        "swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324"
+    )
+    errors: dict = {}
+
+    assert resolve_root_directories([content, directory], errors=errors) == {
+        directory: directory
+    }
+    assert list(errors) == [content]
+    assert isinstance(errors[content], ValueError)
@@ -0,0 +1,175 @@
+import base64
+from unittest.mock import patch
+
+from swh.model.swhids import CoreSWHID
+from swh.spdx.backend import InMemoryBackend
+from swh.spdx.connection import get_graphql_client
+from swh.spdx.node import Node
+from swh.spdx.scheduler import get_page_cursors
+from swh.spdx.tests.archive import FakeArchive
+from swh.spdx.traverse import traverse_root, traverse_root_concurrent
+
+ROOT = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+SMALL_DIR = CoreSWHID.from_string("swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3")
+LARGE_DIR = CoreSWHID.from_string("swh:1:dir:6e73f50e8f1176fe1b5907ce973f14381008fa79")
+DEEP_DIR = CoreSWHID.from_string("swh:1:dir:6dd0504b43b4459d52e9f13f71a91cc0fc445a19")
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.b64encode(str(offset).encode()).decode()
+
+
+def content_entry(name: str, index: int) -> list:
+    sha1_git = f"{index:040x}"
+    return [
+        name,
+        CoreSWHID.from_string(f"swh:1:cnt:{sha1_git}"),
+        {"hashes": {"sha1": sha1_git, "sha1_git": sha1_git}},
+    ]
+
+
+def directory_entry(name: str, swhid: CoreSWHID) -> list:
+    return [name, swhid, {"id": swhid.object_id.hex()}]
+
+
+DIRECTORIES = {
+    ROOT: [directory_entry("small", SMALL_DIR), directory_entry("large", LARGE_DIR)]
+    + [content_entry(f"file{index}.c", index) for index in range(38)],
+    SMALL_DIR: [content_entry("README", 100)],
+    LARGE_DIR: [directory_entry("deep", DEEP_DIR)]
+    + [content_entry(f"module{index}.py", 200 + index) for index in range(20)],
+    DEEP_DIR: [content_entry("LICENSE", 300)],
+}
+
+
+def execute_directory_query(query, params):
+    """
+    Serves the pages of 16 entries of DIRECTORIES, as the GraphQL API does.
+    """
+    entries = DIRECTORIES[CoreSWHID.from_string(params["swhid"])]
+    offset = 0
+    if params["cursor"] is not None:
+        offset = int(base64.b64decode(params["cursor"]))
+    page = entries[offset : offset + 16]
+    return {
+        "directory": {
+            "entries": {
+                "totalCount": len(entries),
+                "pageInfo": {
+                    "endCursor": encode_cursor(offset + len(page)),
+                    "hasNextPage": offset + len(page) < len(entries),
+                },
+                "edges": [
+                    {
+                        "node": {
+                            "name": {"text": name},
+                            "target": {"swhid": str(swhid), "node": target},
+                        }
+                    }
+                    for name, swhid, target in page
+                ],
+            }
+        }
+    }
+
+
+def test_get_page_cursors():
+    """
+    Tests the computation of the cursors of the following pages, for both
+    cursor conventions and for opaque cursors
+    """
+    assert get_page_cursors(encode_cursor(16), 16, 40) == [
+        encode_cursor(16),
+        encode_cursor(32),
+    ]
+    assert get_page_cursors(encode_cursor(15), 16, 40) == [
+        encode_cursor(15),
+        encode_cursor(31),
+    ]
+    assert get_page_cursors("not-an-offset", 16, 40) is None
+    assert get_page_cursors(encode_cursor(3), 16, 40) is None
+
+
+@patch("gql.Client.execute")
+def test_traverse_root_concurrent(mock_execute):
+    """
+    Tests that the concurrent traversal finds the same nodes, in the same
+    order, as traverse_root, and fetches the pages of large directories
+    concurrently
+    """
+    mock_execute.side_effect = execute_directory_query
+    subtree_sizes: dict = {}
+    node_collection = traverse_root_concurrent(
+        Node(name="project", swhid=ROOT), max_workers=4, subtree_sizes=subtree_sizes
+    )
+    expected_node_collection = traverse_root(
+        Node(name="project", swhid=ROOT), first_iteration=True
+    )
+
+    assert [
+        (directory.path, [(child.path, child.swhid) for child in children])
+        for directory, children in node_collection.items()
+    ] == [
+        (directory.path, [(child.path, child.swhid) for child in children])
+        for directory, children in expected_node_collection.items()
+    ]
+    # Three pages for the root directory and two for the large one
+    queried_cursors = [call[0][1]["cursor"] for call in mock_execute.call_args_list]
+    assert queried_cursors.count(encode_cursor(32)) == 2
+    assert subtree_sizes[ROOT] == 40 + 1 + 21 + 1
+    assert subtree_sizes[LARGE_DIR] == 22
+
+
+def test_traverse_root_concurrent_priority():
+    """
+    Tests that the directories with the largest expected subtrees are
+    fetched first
+    """
+    fetched = []
+
+    class RecordingBackend(InMemoryBackend):
+        def get_directory_entries(self, dir_swhid):
+            fetched.append(dir_swhid)
+            return super().get_directory_entries(dir_swhid)
+
+    traverse_root_concurrent(
+        Node(name="project", swhid=ROOT),
+        max_workers=1,
+        backend=RecordingBackend(directories=DIRECTORIES),
+        subtree_sizes={SMALL_DIR: 1, LARGE_DIR: 22},
+    )
+
+    assert fetched == [ROOT, LARGE_DIR, DEEP_DIR, SMALL_DIR]
+
+
+def test_traverse_root_concurrent_shared_subtrees():
+    """
+    Tests that the directories found several times in the tree are fetched
+    once, with one GraphQL client per worker
+    """
+    archive = FakeArchive(depth=3, files=40)
+    with patch("gql.Client.execute", side_effect=archive.execute):
+        expected_node_collection = traverse_root(
+            Node(name="root", swhid=archive.root),
+            first_iteration=True,
+            cache={},
+            bulk=True,
+        )
+        expected_requests = archive.requests["Getdir"]
+        archive.requests.clear()
+        with patch(
+            "swh.spdx.scheduler.get_graphql_client", wraps=get_graphql_client
+        ) as mock_get_client:
+            node_collection = traverse_root_concurrent(
+                Node(name="root", swhid=archive.root), max_workers=4, cache={}
+            )
+
+    assert [
+        (directory.path, [child.swhid for child in children])
+        for directory, children in node_collection.items()
+    ] == [
+        (directory.path, [child.swhid for child in children])
+        for directory, children in expected_node_collection.items()
+    ]
+    assert archive.requests["Getdir"] == expected_requests
+    assert mock_get_client.call_count <= 4
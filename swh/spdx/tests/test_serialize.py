@@ -0,0 +1,91 @@
+import pytest
+
+from swh.spdx.aggregate import Aggregator
+from swh.spdx.node import Node
+from swh.spdx.serialize import (
+    TreeReader,
+    deserialize_node_collection,
+    dump_node_collection,
+    load_node_collection,
+    serialize_node_collection,
+)
+from swh.spdx.tests.archive import FakeArchive
+from swh.spdx.tests.utils import EMPTY, make_node_collection
+from swh.spdx.traverse import traverse_root
+
+
+@pytest.fixture
+def node_collection():
+    return make_node_collection()
+
+
+def get_values(node_collection: dict) -> list:
+    return [
+        (
+            (directory.name, directory.swhid, directory.path),
+            [
+                (child.name, child.swhid, child.path, child.checksums, child.length)
+                for child in children
+            ],
+        )
+        for directory, children in node_collection.items()
+    ]
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib", "zstd"])
+def test_serialize_round_trip(node_collection: dict, compression: str):
+    """
+    Tests that a node collection is identical once serialized and deserialized
+    """
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    data = serialize_node_collection(node_collection, compression=compression)
+
+    assert get_values(deserialize_node_collection(data)) == get_values(node_collection)
+
+
+def test_streaming_and_random_access(node_collection: dict, tmp_path):
+    """
+    Tests the sequential reading of a tree file and its random access with mmap
+    """
+    path = tmp_path / "project.tree"
+    with open(path, "wb") as file:
+        assert dump_node_collection(node_collection, file, block_size=3) == 10
+
+    with open(path, "rb") as file:
+        assert get_values(load_node_collection(file)) == get_values(node_collection)
+
+    with TreeReader.open(str(path)) as reader:
+        assert len(reader) == 10
+        assert len(reader.block_offsets) == 4
+        readme = reader.get_node(8)
+        assert readme.path == "project/lib/résumé.txt"
+        assert readme.checksums == {"sha1_git": f"{10:040x}"}
+        assert reader.get_parent(8) == 6
+        assert reader.get_parent(0) is None
+        assert reader.get_node(7).swhid == EMPTY
+        with pytest.raises(IndexError):
+            reader.get_node(10)
+
+
+def test_content_lengths_round_trip():
+    """
+    Tests that the lengths of the contents are kept, so that the aggregates of
+    a deserialized tree have the sizes of the traversed one
+    """
+    archive = FakeArchive(depth=2)
+    node_collection = traverse_root(
+        Node(name="root", swhid=archive.root),
+        first_iteration=True,
+        backend=archive.get_backend(),
+    )
+    deserialized = deserialize_node_collection(
+        serialize_node_collection(node_collection)
+    )
+
+    assert sorted(get_values(deserialized)) == sorted(get_values(node_collection))
+    total_size = Aggregator().aggregate(node_collection).total_size
+    assert total_size > 0
+    aggregate = Aggregator().aggregate(deserialized)
+    assert aggregate.total_size == total_size
+    assert aggregate.unknown_sizes == 0
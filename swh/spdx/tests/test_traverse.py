@@ -4,8 +4,8 @@ import pytest
 
 from swh.model.swhids import CoreSWHID, ObjectType
 from swh.spdx.node import Node
-from swh.spdx.tests.utils import assert_node
-from swh.spdx.traverse import traverse_root
+from swh.spdx.tests.utils import LIB, assert_node, make_node_collection
+from swh.spdx.traverse import traverse_root, traverse_roots
 
 
 @pytest.fixture
@@ -164,14 +164,14 @@ def sample_node_collection():
     return NODE_COLLECTION_OF_SAMPLE_ROOT_DIRECTORY
 
 
-@patch("swh.spdx.node.get_child")
+@patch("swh.spdx.traverse.get_cached_directory_entries")
 def test_traverse_root_success(
-    mock_get_child, sample_node_collection: dict, sample_root_directory: dict
+    mock_get_entries, sample_node_collection: dict, sample_root_directory: dict
 ):
     """
     Tests the traverse_root function over the sample root directory
     """
-    mock_get_child.side_effect = [
+    child_details = [
         # First response is child details of sample_root_directory
         {
             "README.md": [
@@ -185,7 +185,6 @@ def test_traverse_root_success(
                         "sha256": "7936ae3d6ce0d039223a2fc51c6a6c2ff17e114abf59d0e3e93cc3221dc2161a",  # noqa
                     }
                 },
-                "ipython-cosmos-0.1.5/README.md",
             ],
             "cosmos_sql": [
                 CoreSWHID(
@@ -193,7 +192,6 @@ def test_traverse_root_success(
                     object_id=bytes.fromhex("504251e6894262e5f9c603a7178042e4034dfdc3"),
                 ),  # noqa
                 {"id": "504251e6894262e5f9c603a7178042e4034dfdc3"},
-                "ipython-cosmos-0.1.5/cosmos_sql",
             ],
             "PKG-INFO": [
                 CoreSWHID(
@@ -206,7 +204,6 @@ def test_traverse_root_success(
                         "sha256": "4a15bc736fbf8a7f9cdeb7b74038d7e033ed0990690c4fc609406cdd8e5f73e9",  # noqa
                     }
                 },
-                "ipython-cosmos-0.1.5/PKG-INFO",
             ],
             "setup.py": [
                 CoreSWHID(
@@ -219,7 +216,6 @@ def test_traverse_root_success(
                         "sha256": "51af40f2a7a43c60538d59368671df3f6fb4cd394a7c219bf4c6b20fde4d334c",  # noqa
                     }
                 },
-                "ipython-cosmos-0.1.5/setup.py",
             ],
             "LICENSE.txt": [
                 CoreSWHID(
@@ -232,7 +228,6 @@ def test_traverse_root_success(
                         "sha256": "55c3b9c2351473c9e61a5b326f631261fd4cb50eec2a7eef750df6ca45150732",  # noqa
                     }
                 },
-                "ipython-cosmos-0.1.5/LICENSE.txt",
             ],
         },
         # Second response is child details of sub_directory cosmos_sql
@@ -248,7 +243,6 @@ def test_traverse_root_success(
                         "sha256": "9bbe64a2168837d0bbee62f1734077ad3053b6661f8c9b0c9093bdf0224cf183",  # noqa
                     }
                 },
-                "ipython-cosmos-0.1.5/cosmos_sql/__init__.py",
             ],
             "VERSION": [
                 CoreSWHID(
@@ -261,10 +255,13 @@ def test_traverse_root_success(
                         "sha256": "800cf1c0392b24de7c0a1c6ea6778ecb433dec71c49a150bce96a98477527b2f",  # noqa
                     }
                 },
-                "ipython-cosmos-0.1.5/cosmos_sql/VERSION",
             ],
         },
     ]
+    mock_get_entries.side_effect = [
+        [[name, *properties] for name, properties in details.items()]
+        for details in child_details
+    ]
     test_node = Node(
         name=sample_root_directory["name"],
         swhid=sample_root_directory["swhid"],
@@ -275,3 +272,82 @@ def test_traverse_root_success(
         assert assert_node(item[0][0], item[1][0]) and len(item[0][1]) == len(
             item[1][1]
         )
+
+
+@patch("swh.spdx.children.get_directory_entries")
+@patch("swh.spdx.traverse.resolve_root_directories")
+def test_traverse_roots_shared_subtree(mock_resolve, mock_get_directory_entries):
+    """
+    Tests that traverse_roots only fetches the entries of the subtrees
+    shared between releases once
+    """
+    first_release = CoreSWHID.from_string(
+        "swh:1:rel:a9a4ae6d5d0f3c3b6f1e2c7e0a6c18d2c1cb5c1f"
+    )
+    second_release = CoreSWHID.from_string(
+        "swh:1:rel:1c5b04f6e9bc12ab0ab1ca1e3fa4a2ad1a97b1b4"
+    )
+    first_root = CoreSWHID.from_string(
+        "swh:1:dir:de0f1edd306d6e9fc67ddf9b741aa7b9954e21d9"
+    )
+    second_root = CoreSWHID.from_string(
+        "swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324"
+    )
+    shared_directory = CoreSWHID.from_string(
+        "swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3"
+    )
+    version = CoreSWHID.from_string(
+        "swh:1:cnt:9faa1b7a7339db85692f91ad4b922554624a3ef7"
+    )
+    mock_resolve.return_value = {
+        first_release: first_root,
+        second_release: second_root,
+    }
+    entries = {
+        first_root: [
+            ["cosmos_sql", shared_directory, {"id": str(shared_directory)}],
+        ],
+        second_root: [
+            ["cosmos_sql", shared_directory, {"id": str(shared_directory)}],
+            ["VERSION", version, {"hashes": {"sha1_git": str(version)}}],
+        ],
+        shared_directory: [
+            ["VERSION", version, {"hashes": {"sha1_git": str(version)}}],
+        ],
+    }
+    mock_get_directory_entries.side_effect = lambda swhid: entries[swhid]
+
+    node_collections = traverse_roots(
+        [first_release, second_release],
+        names={first_release: "cosmos-0.1", second_release: "cosmos-0.2"},
+    )
+
+    assert mock_get_directory_entries.call_count == 3
+    assert [
+        [child.path for child in children]
+        for children in node_collections[second_release].values()
+    ] == [
+        ["cosmos-0.2/cosmos_sql", "cosmos-0.2/VERSION"],
+        ["cosmos-0.2/cosmos_sql/VERSION"],
+    ]
+    assert len(node_collections[first_release]) == 2
+
+
+@patch("swh.spdx.node.get_child")
+def test_traverse_root_without_child_paths(mock_get_child):
+    """
+    Tests that the traversal does not build the paths of the entries, which
+    are joined from the paths of the directories when accessed
+    """
+    node_collection = make_node_collection()
+
+    mock_get_child.assert_not_called()
+    library = next(
+        children
+        for directory, children in node_collection.items()
+        if directory.swhid == LIB
+    )
+    assert [child.path for child in library] == [
+        "project/lib/résumé.txt",
+        "project/lib/file0.c",
+    ]
@@ -1,4 +1,68 @@
+from swh.model.swhids import CoreSWHID
+from swh.spdx.backend import InMemoryBackend
+from swh.spdx.entries import DirectoryEntries
 from swh.spdx.node import Node
+from swh.spdx.traverse import traverse_root
+
+ROOT = CoreSWHID.from_string("swh:1:dir:d4c2954acfd72686a1b80e6217ddd2d7a9f09324")
+LIB = CoreSWHID.from_string("swh:1:dir:504251e6894262e5f9c603a7178042e4034dfdc3")
+EMPTY = CoreSWHID.from_string("swh:1:dir:4b825dc642cb6eb9a060e54bf8d69288fbee4904")
+
+
+def make_content(index: int):
+    """
+    Builds the SWHID and checksums of a fake content.
+
+    Args:
+        index (int): the number of the content
+
+    Returns:
+        Tuple[CoreSWHID, dict]: the SWHID and the checksums of the content
+    """
+    swhid = CoreSWHID.from_string(f"swh:1:cnt:{index:040x}")
+    hashes = {
+        "sha1": f"{index + 1:040x}",
+        "sha256": f"{index + 2:064x}",
+        "sha1_git": f"{index:040x}",
+        "blake2s256": f"{index + 3:064x}",
+    }
+    return swhid, hashes
+
+
+def make_node_collection() -> dict:
+    """
+    Traverses a tree with a library, an empty directory, a file without all
+    its checksums and a file copied in the library.
+
+    Returns:
+        dict: the collection of nodes, as returned by traverse_root
+    """
+    readme_swhid, readme_hashes = make_content(10)
+    copy_swhid, copy_hashes = make_content(1)
+    backend = InMemoryBackend(
+        directories={
+            ROOT: [
+                [f"file{index}.c", swhid, {"hashes": hashes}]
+                for index, (swhid, hashes) in enumerate(map(make_content, range(1, 6)))
+            ]
+            + [
+                ["lib", LIB, {"id": LIB.object_id.hex()}],
+                ["empty", EMPTY, {"id": EMPTY.object_id.hex()}],
+            ],
+            LIB: [
+                [
+                    "résumé.txt",
+                    readme_swhid,
+                    {"hashes": {"sha1_git": readme_hashes["sha1_git"]}},
+                ],
+                ["file0.c", copy_swhid, {"hashes": copy_hashes}],
+            ],
+            EMPTY: [],
+        }
+    )
+    return traverse_root(
+        Node(name="project", swhid=ROOT), first_iteration=True, backend=backend
+    )
 
 
 def assert_node(node1, node2):
@@ -20,3 +84,23 @@ def assert_node(node1, node2):
             and node1.checksums == node2.checksums
         )
     return False
+
+
+def make_directory_entries(entries: list) -> DirectoryEntries:
+    """
+    Builds the entries of a directory.
+
+    Args:
+        entries (list): list of child name, child swhid and child checksums,
+            in the shape returned by the GraphQL server
+
+    Returns:
+        DirectoryEntries: the entries of the directory
+    """
+    directory_entries = DirectoryEntries()
+    directory_entries.add_entries(
+        [entry[0] for entry in entries],
+        [str(entry[1]) for entry in entries],
+        [entry[2] for entry in entries],
+    )
+    return directory_entries
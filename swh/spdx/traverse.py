@@ -1,8 +1,99 @@
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from swh.spdx.budget import (
+    Budget,
+    BudgetExceeded,
+    charge_nodes,
+    check_budget,
+    use_budget,
+)
+from swh.spdx.children import get_cached_directory_entries
 from swh.spdx.node import Node
+from swh.spdx.profile import stage
+from swh.spdx.resolve import resolve_root_directories
+from swh.spdx.scheduler import TraversalScheduler
+
+if TYPE_CHECKING:
+    from swh.model.swhids import CoreSWHID
+    from swh.spdx.backend import Backend
+    from swh.spdx.prefetch import ContentPrefetcher
+
+
+def iter_traverse_root(
+    node: Node,
+    first_iteration: bool = False,
+    cache: Optional[dict] = None,
+    bulk: bool = False,
+    backend: Optional["Backend"] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> Iterator[Tuple[Node, List[Node]]]:
+    """
+    Recursively traverses the root directory and yields each directory found
+    along with its child nodes, as soon as they are retrieved.
+
+    The nodes and requests are charged to the budget of the current job, if
+    any, BudgetExceeded being raised when one of its limits is reached.
+
+    Args:
+        node: The current node to process.
+        first_iteration: represents if the iteration is first or not
+        cache: optional mapping of directory SWHIDs to their entries,
+            shared between traversals so that common subtrees are fetched once
+        bulk: build the child nodes of each directory at once with
+            Node.get_child_nodes, decoding their SWHID and checksums lazily
+        backend: optional source of the directory entries, the GraphQL API
+            of the archive is queried if not given
+        fields: the fields of the content entries to retrieve, see
+            get_query_children
+
+    Yields:
+        Tuple[Node, List[Node]]: a directory node and its child nodes,
+        in depth-first order
+    """
+    # Set the path for the root directory node
+    if first_iteration:
+        node.path = node.name
+
+    if not node.is_directory:
+        return
+    check_budget()
+    if bulk:
+        children = node.get_child_nodes(cache=cache, backend=backend, fields=fields)
+    else:
+        children = []
+        entries = get_cached_directory_entries(
+            node.swhid, cache=cache, backend=backend, fields=fields
+        )
+        # Decodes the SWHIDs and checksums of the entries
+        with stage("swhid", node.swhid):
+            rows = list(entries)
+        with stage("nodes", node.swhid):
+            for child_name, child_swhid, child_checksums in rows:
+                child = Node(name=child_name, swhid=child_swhid)
+                child.set_checksums([child_swhid, child_checksums])
+                # The path of the child is joined from the path of the node
+                # when accessed
+                child.parent = node
+                children.append(child)
+    charge_nodes(len(children))
+    yield node, children
+    for child in children:
+        if child.is_directory:
+            yield from iter_traverse_root(
+                child, cache=cache, bulk=bulk, backend=backend, fields=fields
+            )
 
 
 def traverse_root(
-    node: Node, first_iteration: bool = False, node_collection: dict = {}
+    node: Node,
+    first_iteration: bool = False,
+    node_collection: Optional[dict] = None,
+    cache: Optional[dict] = None,
+    bulk: bool = False,
+    backend: Optional["Backend"] = None,
+    fields: Optional[Iterable[str]] = None,
+    budget: Optional[Budget] = None,
+    prefetcher: Optional["ContentPrefetcher"] = None,
 ) -> dict:
     """
     Recursively traverses the root directory and collects each node found.
@@ -11,29 +102,142 @@ def traverse_root(
         node: The current node to process.
         first_iteration: represents if the iteration is first or not
         node_collection: collection of nodes found
+        cache: optional mapping of directory SWHIDs to their entries,
+            shared between traversals so that common subtrees are fetched once
+        bulk: build the child nodes of each directory at once, see
+            iter_traverse_root
+        backend: optional source of the directory entries, the GraphQL API
+            of the archive is queried if not given
+        fields: the fields of the content entries to retrieve, see
+            get_query_children
+        budget: optional limits of the nodes, requests and duration of the
+            traversal, otherwise those of the current job apply; the
+            directories traversed until a limit is reached are returned, and
+            the budget is marked as exceeded
+        prefetcher: optional prefetcher the child nodes of each directory are
+            given to as soon as they are found, so that their contents are
+            fetched while the traversal goes on
 
     Returns:
         node_collection: Collection of nodes found in the root directory,
         with keys as root-directory or sub-directories and value as a list of child nodes
     """
-    # Set the path for the root directory node
+    if node_collection is None:
+        node_collection = {}
+    with use_budget(budget):
+        try:
+            for directory, children in iter_traverse_root(
+                node,
+                first_iteration=first_iteration,
+                cache=cache,
+                bulk=bulk,
+                backend=backend,
+                fields=fields,
+            ):
+                # Key is a root-directory or sub-directory and value is the list
+                # of all its children nodes
+                node_collection[directory] = children
+                if prefetcher is not None:
+                    prefetcher.add_nodes(children)
+        except BudgetExceeded:
+            # The directories traversed so far are kept
+            pass
+    return node_collection
 
-    if first_iteration:
-        node.path = node.name
 
-    if node.is_directory:
-        # Initializing node_collection with key as a root-directory or sub-directory
-        # and value as empty list which will then contain all children nodes
-        node_collection[node] = []
-        for (
-            child_name,
-            child_properties,
-        ) in node.get_children().items():
-            child_swhid = child_properties[0]
-            child = Node(name=child_name, swhid=child_swhid)
-            child.set_checksums(child_properties)
-            child.set_path(child_properties)
-            # Appending each child node found to the 'value' list of 'key' directory
-            node_collection[node].append(child)
-            traverse_root(node=child, node_collection=node_collection)
-    return node_collection
+def traverse_root_concurrent(
+    node: Node,
+    max_workers: int = 8,
+    cache: Optional[dict] = None,
+    backend: Optional["Backend"] = None,
+    subtree_sizes: Optional[Dict["CoreSWHID", int]] = None,
+    prefetcher: Optional["ContentPrefetcher"] = None,
+    budget: Optional[Budget] = None,
+) -> dict:
+    """
+    Traverses the root directory with concurrent requests, fetching the largest
+    and deepest expected subtrees first and the pages of large directories
+    concurrently.
+
+    Args:
+        node: The root directory node.
+        max_workers: the maximum number of concurrent requests
+        cache: optional mapping of directory SWHIDs to their entries
+        backend: optional source of the directory entries, the GraphQL API
+            of the archive is queried if not given
+        subtree_sizes: optional number of nodes of the subtrees of directories,
+            by SWHID, used as scheduling hints and updated by the traversal
+        prefetcher: optional prefetcher the child nodes of each directory are
+            given to as soon as they are found
+        budget: optional limits of the nodes, requests and duration of the
+            traversal, otherwise those of the current job apply; the
+            directories traversed until a limit is reached are returned, and
+            the budget is marked as exceeded
+
+    Returns:
+        node_collection: Collection of nodes found in the root directory,
+        with keys as root-directory or sub-directories and value as a list of child nodes
+    """
+    scheduler = TraversalScheduler(
+        max_workers=max_workers,
+        cache=cache,
+        backend=backend,
+        subtree_sizes=subtree_sizes,
+        prefetcher=prefetcher,
+    )
+    with use_budget(budget):
+        return scheduler.traverse(node)
+
+
+def traverse_roots(
+    swhids: List["CoreSWHID"],
+    names: Optional[Dict["CoreSWHID", str]] = None,
+    cache: Optional[dict] = None,
+    bulk: bool = False,
+    backend: Optional["Backend"] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> Dict["CoreSWHID", dict]:
+    """
+    Traverses the root directories of several directories, revisions,
+    releases or snapshots, e.g. all the releases of a project.
+
+    Directory entries are cached by SWHID across the whole batch, so the
+    subtrees shared between roots are only fetched once.
+
+    Args:
+        swhids: SWHIDs of the objects to traverse.
+        names: optional names of the root directory nodes, keyed by SWHID,
+            defaulting to the hexadecimal identifier of the object
+        cache: optional mapping of directory SWHIDs to their entries,
+            reused and filled by the traversals
+        bulk: build the child nodes of each directory at once, see
+            iter_traverse_root
+        backend: optional source of the directory entries, the GraphQL API
+            of the archive is queried if not given
+        fields: the fields of the content entries to retrieve, see
+            get_query_children
+
+    Returns:
+        Dict[CoreSWHID, dict]: node collection of each root, keyed by the given SWHID
+    """
+    if names is None:
+        names = {}
+    if cache is None:
+        cache = {}
+    root_directories = resolve_root_directories(swhids)
+    node_collections = {}
+    for swhid in swhids:
+        root = Node(
+            name=names.get(swhid, swhid.object_id.hex()),
+            swhid=root_directories[swhid],
+        )
+        node_collections[swhid] = traverse_root(
+            root,
+            first_iteration=True,
+            node_collection={},
+            cache=cache,
+            bulk=bulk,
+            backend=backend,
+            fields=fields,
+        )
+    return node_collections